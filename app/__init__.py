@@ -1,6 +1,16 @@
-from flask import Flask
+import time
+from flask import Flask, g, request
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config import Config
-from app.database import init_db, close_db
+from app.database import configure_database, init_db, close_db
+from app.throttle import Throttle
+from app.verification_store import create_code_store
+from app.metrics import HTTP_REQUEST_SECONDS
+from app.lifecycle import register_shutdown
+from app.export import export_command
+from app.content_filter import load_filter_rules
+from app.identity import Identity
+from app.broadcast_schedule import BreakCalendar
 
 def create_app():
     """
@@ -12,21 +22,68 @@ def create_app():
     # Załaduj konfigurację
     app.config.from_object(Config)
     
-    # Waliduj konfigurację
-    try:
-        Config.validate()
-    except ValueError as e:
-        print(f"❌ BŁĄD KONFIGURACJI: {e}")
-        print("💡 Upewnij się, że plik .env jest poprawnie skonfigurowany")
-        exit(1)
+    # Waliduj konfigurację (ValueError - obsługuje wywołujący, np. run.py)
+    Config.validate()
     
     # Inicjalizuj bazę danych
+    configure_database(
+        path=app.config['DATABASE_PATH'],
+        busy_timeout_ms=app.config['SQLITE_BUSY_TIMEOUT_MS'],
+        mmap_size=app.config['SQLITE_MMAP_SIZE'],
+        cached_statements=app.config['SQLITE_CACHED_STATEMENTS'],
+        instrument=app.config['METRICS_ENABLED']
+    )
     with app.app_context():
         init_db()
     
+    # Domeny szkolne, admini i hashe emaili - przygotowane raz dla wszystkich requestów
+    app.extensions['identity'] = Identity.from_config(app.config)
+    
+    # Magazyn kodów weryfikacyjnych
+    app.extensions['code_store'] = create_code_store(app.config)
+    
+    # Reguły filtra wulgaryzmów (ValueError przy błędnym pliku - jak przy konfiguracji)
+    load_filter_rules(app.config['FILTER_RULES_PATH'])
+    
+    # Godziny przerw dla planu emisji (ValueError przy błędnym formacie)
+    if app.config['BROADCAST_SCHEDULE_ENABLED']:
+        app.extensions['break_calendar'] = BreakCalendar.from_config(app.config)
+    
+    # Limity requestów (token bucket)
+    app.extensions['throttle'] = Throttle.from_config(app.config)
+    
+    # Za reverse proxy request.remote_addr to adres proxy - wspólny limit dla wszystkich klientów
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    
+    # Czas obsługi requestów (metryka radio_http_request_duration_seconds)
+    if app.config['METRICS_ENABLED']:
+        @app.before_request
+        def start_request_timer():
+            g.request_started = time.perf_counter()
+
+        @app.after_request
+        def observe_request_time(response):
+            started = g.pop('request_started', None)
+            if started is not None:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    request.endpoint or 'unknown',
+                    request.method,
+                    str(response.status_code)
+                )
+            return response
+    
     # Rejestruj zamykanie połączenia z bazą przy końcu requestu
     app.teardown_appcontext(close_db)
     
+    # Zaległe zadania w tle są przetwarzane przed końcem procesu
+    register_shutdown(app)
+    
+    # Komendy CLI (flask --app wsgi export-submissions ...)
+    app.cli.add_command(export_command)
+    
     # Zarejestruj routes
     from app.routes import bp
     app.register_blueprint(bp)
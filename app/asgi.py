@@ -0,0 +1,510 @@
+"""
+Serwer ASGI (asyncio) dla /api/request-code, /api/submit i /api/stats.
+
+Wywołania Spotify idą przez httpx.AsyncClient (app/spotify_async.py),
+więc oczekujące zgłoszenie nie zajmuje wątku. SQLite, magazyn kodów
+i limity działają w puli wątków (ASGI_DB_THREADS). Pozostałe adresy
+(panel admina, statyczne pliki, /metrics, /readyz...) obsługuje
+niezmieniona aplikacja Flask zamontowana jako WSGI.
+
+W /api/submit sprawdzenie duplikatów, limit zgłoszeń i filtr treści
+działają równolegle w puli wątków, a wyszukiwanie na Spotify startuje
+dopiero, gdy wszystkie przejdą - odrzucone zgłoszenia nie zużywają
+limitu wywołań Spotify API.
+
+Uruchomienie:
+    uvicorn asgi:app --workers 2
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+Wymaga pakietów z requirements-asgi.txt.
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from app import create_app
+from app.database import save_submission, count_user_submissions_in_period
+from app.spotify_client import get_spotify_client
+from app.spotify_async import AsyncSpotifyClient
+from app.spotify_resilience import SpotifyUnavailableError
+from app.submission_queue import ensure_submission_queue, get_submission_queue
+from app.playlist_writer import get_playlist_writer
+from app.playlist_mirror import ensure_playlist_mirror
+from app.verification_store import get_code_store
+from app.stats import get_today_stats, stats_etag
+from app.metrics import HTTP_REQUEST_SECONDS, timed
+from app.content_filter import ensure_rules_watcher, is_content_appropriate
+from app.broadcast_schedule import ensure_broadcast_scheduler
+from app.utils import sanitize_input, song_fingerprint
+from app.dedup import check_known_song, is_recently_added, DUPLICATE_REASON, EXPLICIT_REASON
+from app.email_sender import ensure_email_sender, generate_verification_code, send_verification_email
+from app.lifecycle import shutdown_app
+
+def create_asgi_app(flask_app=None):
+    """Tworzy aplikację ASGI (asynchroniczne endpointy + Flask dla reszty)"""
+    flask_app = flask_app or create_app()
+    server = AsyncSubmissionServer(flask_app)
+
+    routes = [
+        Route('/api/request-code', server.request_code, methods=['POST']),
+        Route('/api/submit', server.submit, methods=['POST']),
+        Route('/api/stats', server.stats, methods=['GET']),
+        # Aliasy dla kompatybilności
+        Route('/request-code', server.request_code, methods=['POST']),
+        Route('/submit', server.submit, methods=['POST']),
+        Route('/stats', server.stats, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(flask_app))
+    ]
+
+    middleware = []
+    hops = flask_app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        middleware.append(Middleware(ProxyHeadersMiddleware, hops=hops))
+
+    app = Starlette(routes=routes, middleware=middleware, lifespan=server.lifespan)
+    app.state.flask_app = flask_app
+    return app
+
+class ProxyHeadersMiddleware:
+    """
+    Odpowiednik werkzeug ProxyFix dla ASGI: adres klienta i schemat z X-Forwarded-For
+    i X-Forwarded-Proto (n-ty wpis od końca, n - liczba zaufanych proxy).
+
+    Zamontowana aplikacja Flask ma własny ProxyFix - czyta te same nagłówki,
+    więc oba widzą ten sam adres.
+    """
+
+    def __init__(self, app, hops=1):
+        self.app = app
+        self.hops = hops
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            headers = dict(scope['headers'])
+            client_ip = self._trusted_value(headers.get(b'x-forwarded-for'))
+            scheme = self._trusted_value(headers.get(b'x-forwarded-proto'))
+
+            if client_ip or scheme:
+                scope = dict(scope)
+                if client_ip:
+                    scope['client'] = (client_ip, 0)
+                if scheme:
+                    scope['scheme'] = scheme.lower()
+
+        await self.app(scope, receive, send)
+
+    def _trusted_value(self, header):
+        """Wpis dopisany przez najdalsze zaufane proxy (wcześniejsze mógł podać klient)"""
+        if not header:
+            return None
+        values = [value.strip() for value in header.decode('latin-1').split(',')]
+        if len(values) < self.hops:
+            return None
+        return values[-self.hops] or None
+
+def _instrumented(endpoint):
+    """Mierzy czas requestu i zamienia nieobsłużone wyjątki na odpowiedź 500"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(self, request):
+            started = time.perf_counter()
+            try:
+                with self.flask_app.app_context():
+                    response = await handler(self, request)
+            except Exception as e:
+                self.flask_app.logger.error(f"Błąd w {request.url.path}: {e}")
+                response = JSONResponse({
+                    'success': False,
+                    'message': 'Wystąpił nieoczekiwany błąd. Spróbuj ponownie później.'
+                }, status_code=500)
+
+            if self.flask_app.config['METRICS_ENABLED']:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    endpoint,
+                    request.method,
+                    str(response.status_code)
+                )
+            return response
+        return wrapper
+    return decorator
+
+class AsyncSubmissionServer:
+    """Asynchroniczne odpowiedniki endpointów z app/routes.py"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.identity = flask_app.extensions['identity']
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config['ASGI_DB_THREADS'],
+            thread_name_prefix='asgi-db'
+        )
+        self.spotify = None
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        with self.flask_app.app_context():
+            self.spotify = AsyncSpotifyClient(
+                get_spotify_client(),
+                self.config,
+                self.executor,
+                self.flask_app.logger
+            )
+            ensure_submission_queue()
+            ensure_playlist_mirror()
+            ensure_rules_watcher()
+            ensure_broadcast_scheduler()
+            ensure_email_sender()
+
+        yield
+
+        await self.spotify.aclose()
+        # Zaległe zadania w tle (kolejka, writer, emaile) - bez blokowania pętli
+        await asyncio.get_running_loop().run_in_executor(None, shutdown_app, self.flask_app)
+        self.executor.shutdown(wait=True)
+
+    def _call_in_app_context(self, fn, args, kwargs):
+        with self.flask_app.app_context():
+            return fn(*args, **kwargs)
+
+    async def _run(self, fn, *args, **kwargs):
+        """Wykonuje blokującą funkcję (SQLite, magazyn kodów) w puli wątków"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(self._call_in_app_context, fn, args, kwargs)
+        )
+
+    async def _timed_run(self, stage, fn, *args, **kwargs):
+        with timed(stage):
+            return await self._run(fn, *args, **kwargs)
+
+    async def _timed_search(self, artist, title):
+        with timed('spotify_search'):
+            return await self.spotify.search_track(artist, title)
+
+    async def _throttled(self, limit_name, key):
+        """Zwraca odpowiedź 429 jeśli limit requestów został przekroczony, inaczej None"""
+        retry_after = await self._run(self.flask_app.extensions['throttle'].check, limit_name, key)
+        if not retry_after:
+            return None
+
+        return JSONResponse({
+            'success': False,
+            'message': f'Zbyt wiele prób. Spróbuj ponownie za {retry_after} s.'
+        }, status_code=429, headers={'Retry-After': str(retry_after)})
+
+    async def _json(self, request):
+        try:
+            return await request.json()
+        except ValueError:
+            return None
+
+    @_instrumented('asgi.request_code')
+    async def request_code(self, request):
+        """Wysyła kod weryfikacyjny na email"""
+        client_ip = request.client.host if request.client else None
+
+        throttled = await self._throttled('request_code_ip', client_ip)
+        if throttled:
+            return throttled
+
+        data = await self._json(request) or {}
+        email = data.get('email', '').strip().lower()
+
+        throttled = await self._throttled('request_code_email', email)
+        if throttled:
+            return throttled
+
+        if not self.identity.is_school_email(email):
+            return JSONResponse({
+                'success': False,
+                'message': self.identity.domain_message
+            }, status_code=400)
+
+        code = generate_verification_code()
+        await self._run(get_code_store().save, email, code, expires_minutes=10)
+        await self._run(send_verification_email, email, code)
+
+        return JSONResponse({
+            'success': True,
+            'message': f'Kod weryfikacyjny został wysłany na {email}'
+        })
+
+    @_instrumented('asgi.stats')
+    async def stats(self, request):
+        """Statystyki z ETagiem (304, jeśli się nie zmieniły)"""
+        stats = await self._run(get_today_stats, ttl=self.config['STATS_CACHE_TTL'])
+
+        etag = f'"{stats_etag(stats)}"'
+        headers = {'ETag': etag, 'Cache-Control': 'public, no-cache'}
+
+        if_none_match = request.headers.get('if-none-match', '')
+        if etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(',')):
+            return Response(status_code=304, headers=headers)
+
+        return JSONResponse({'success': True, **stats}, headers=headers)
+
+    @_instrumented('asgi.submit')
+    async def submit(self, request):
+        """Zgłoszenie piosenki (ta sama logika i odpowiedzi co routes.submit_song)"""
+        client_ip = request.client.host if request.client else None
+
+        throttled = await self._throttled('submit_ip', client_ip)
+        if throttled:
+            return throttled
+
+        data = await self._json(request)
+        if not data:
+            return JSONResponse({
+                'success': False,
+                'message': 'Brak danych w requeście'
+            }, status_code=400)
+
+        email = data.get('email', '').strip().lower()
+        verification_code = data.get('code', '').strip()
+        artist = sanitize_input(data.get('artist', ''))
+        title = sanitize_input(data.get('title', ''))
+
+        throttled = await self._throttled('submit_email', email)
+        if throttled:
+            return throttled
+
+        if not email or not artist or not title or not verification_code:
+            return JSONResponse({
+                'success': False,
+                'message': 'Wszystkie pola są wymagane'
+            }, status_code=400)
+
+        if not self.identity.is_school_email(email):
+            return JSONResponse({
+                'success': False,
+                'message': self.identity.domain_message
+            }, status_code=400)
+
+        if not await self._timed_run('code_verify', get_code_store().verify, email, verification_code):
+            return JSONResponse({
+                'success': False,
+                'message': 'Nieprawidłowy lub wygasły kod weryfikacyjny'
+            }, status_code=400)
+
+        email_hash = self.identity.hash_email(email)
+        fingerprint = song_fingerprint(artist, title)
+        window_days = self.config['DUPLICATE_WINDOW_DAYS']
+        save = functools.partial(self._run, save_submission, email=email, email_hash=email_hash, fingerprint=fingerprint)
+
+        limit_days = self.config.get('LIMIT_PERIOD_DAYS', 2)
+        max_songs = self.config.get('MAX_SONGS_PER_PERIOD', 1)
+        is_admin = self.identity.is_admin(email)
+
+        # Sprawdzenia lokalne równolegle (pula wątków) - filtr treści nie blokuje pętli zdarzeń
+        checks = [
+            self._timed_run('duplicate_check', check_known_song, fingerprint, window_days),
+            self._timed_run('content_filter', is_content_appropriate, artist, title)
+        ]
+        if not is_admin:
+            checks.append(self._timed_run('rate_limit', count_user_submissions_in_period, email_hash, days=limit_days))
+
+        results = await asyncio.gather(*checks)
+        known_reason, known_track = results[0]
+        is_ok, reason = results[1]
+
+        # Wyniki w tej samej kolejności co w routes.submit_song
+        if is_admin:
+            # Bez adresu w logach - skrót hasha wystarczy do powiązania wpisów
+            self.flask_app.logger.info(f"👑 Admin {email_hash[:12]} - pominięto limit zgłoszeń")
+        elif results[2] >= max_songs:
+            return JSONResponse({
+                'success': False,
+                'message': f'Możesz zgłosić maksymalnie {max_songs} piosenkę na {limit_days} dni. Spróbuj ponownie później!'
+            }, status_code=429)
+
+        if not is_ok:
+            await save(
+                artist=artist,
+                title=title,
+                spotify_track_id=None,
+                spotify_track_uri=None,
+                status='rejected',
+                rejection_reason=reason
+            )
+            return JSONResponse({
+                'success': False,
+                'message': f'Zgłoszenie odrzucone: {reason}'
+            }, status_code=400)
+
+        if known_reason:
+            await save(
+                artist=artist,
+                title=title,
+                spotify_track_id=None,
+                spotify_track_uri=None,
+                status='rejected',
+                rejection_reason=known_reason
+            )
+            return JSONResponse({
+                'success': False,
+                'message': f'Zgłoszenie odrzucone: {known_reason}'
+            }, status_code=400)
+
+        if self.config.get('ASYNC_SUBMISSIONS'):
+            return await self._queue_pending(
+                save, artist, title,
+                '⏳ Zgłoszenie przyjęte, szukamy piosenki na Spotify...'
+            )
+
+        if known_track:
+            track = known_track
+        else:
+            try:
+                track = await self._timed_search(artist, title)
+            except SpotifyUnavailableError as e:
+                return await self._spotify_unavailable(e, save, artist, title)
+
+        if not track:
+            await save(
+                artist=artist,
+                title=title,
+                spotify_track_id=None,
+                spotify_track_uri=None,
+                status='rejected',
+                rejection_reason='Nie znaleziono utworu na Spotify'
+            )
+            return JSONResponse({
+                'success': False,
+                'message': 'Nie znaleziono utworu na Spotify. Sprawdź poprawność nazwy wykonawcy i tytułu.'
+            }, status_code=404)
+
+        if await self._run(is_recently_added, track['id'], window_days):
+            await save(
+                artist=artist,
+                title=title,
+                spotify_track_id=track['id'],
+                spotify_track_uri=track['uri'],
+                status='rejected',
+                rejection_reason=DUPLICATE_REASON
+            )
+            return JSONResponse({
+                'success': False,
+                'message': f'Zgłoszenie odrzucone: {DUPLICATE_REASON}'
+            }, status_code=400)
+
+        spotify = self.spotify.spotify
+        with timed('explicit_check'):
+            is_explicit = spotify.is_track_explicit(track)
+
+        if is_explicit:
+            await save(
+                artist=artist,
+                title=title,
+                spotify_track_id=track['id'],
+                spotify_track_uri=track['uri'],
+                status='rejected',
+                rejection_reason=EXPLICIT_REASON
+            )
+            return JSONResponse({
+                'success': False,
+                'message': 'Utwór zawiera treści explicit i nie może być dodany'
+            }, status_code=400)
+
+        track_info = spotify.get_track_info(track)
+        track_fields = dict(
+            artist=track_info['artist'],
+            title=track_info['name'],
+            spotify_track_id=track_info['id'],
+            spotify_track_uri=track_info['uri'],
+            duration_ms=track_info['duration_ms']
+        )
+
+        if self.config.get('PLAYLIST_BATCH_WRITES'):
+            with timed('db_save'):
+                submission_id = await save(status='pending', **track_fields)
+            future = get_playlist_writer().submit(submission_id, track_info['uri'], track_info['id'])
+
+            try:
+                with timed('playlist_add'):
+                    # shield - przekroczenie czasu nie może anulować zapisu w writerze
+                    success = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(future)),
+                        timeout=self.config['PLAYLIST_BATCH_WINDOW'] + 10
+                    )
+            except asyncio.TimeoutError:
+                success = None
+
+            # Zapis trwa albo Spotify jest niedostępne - zgłoszenie dokończy kolejka w tle
+            if success is None:
+                return JSONResponse({
+                    'success': True,
+                    'pending': True,
+                    'job_id': submission_id,
+                    'message': '⏳ Zgłoszenie przyjęte, trwa dodawanie do playlisty...'
+                }, status_code=202)
+        else:
+            try:
+                with timed('playlist_add'):
+                    success = await self.spotify.add_to_playlist(track['uri'])
+            except SpotifyUnavailableError as e:
+                return await self._spotify_unavailable(e, save, artist, title)
+
+            if success:
+                with timed('db_save'):
+                    await save(status='approved', rejection_reason=None, **track_fields)
+
+        if not success:
+            return JSONResponse({
+                'success': False,
+                'message': 'Błąd podczas dodawania do playlisty. Spróbuj ponownie później.'
+            }, status_code=500)
+
+        return JSONResponse({
+            'success': True,
+            'message': '✅ Piosenka została pomyślnie dodana do playlisty! 🎵',
+            'track': {
+                'artist': track_info['artist'],
+                'title': track_info['name'],
+                'url': track_info['url'],
+                'album_art': track_info.get('album_art'),
+                'duration': track_info.get('duration_ms')
+            }
+        })
+
+    async def _spotify_unavailable(self, error, save, artist, title):
+        """Spotify niedostępne: 503 albo (SPOTIFY_QUEUE_WHEN_DOWN) zgłoszenie 'pending' dla kolejki"""
+        self.flask_app.logger.warning(f"Spotify niedostępne podczas zgłoszenia: {error}")
+
+        if not self.config.get('SPOTIFY_QUEUE_WHEN_DOWN'):
+            return JSONResponse({
+                'success': False,
+                'message': 'Spotify jest chwilowo niedostępne. Spróbuj ponownie za kilka minut.'
+            }, status_code=503)
+
+        return await self._queue_pending(
+            save, artist, title,
+            '⏳ Spotify chwilowo nie odpowiada - zgłoszenie zostanie przetworzone automatycznie'
+        )
+
+    async def _queue_pending(self, save, artist, title, message):
+        """Zapisuje zgłoszenie jako 'pending' dla kolejki w tle i zwraca 202"""
+        submission_id = await save(
+            artist=artist,
+            title=title,
+            spotify_track_id=None,
+            spotify_track_uri=None,
+            status='pending'
+        )
+        get_submission_queue().enqueue(submission_id)
+
+        return JSONResponse({
+            'success': True,
+            'pending': True,
+            'job_id': submission_id,
+            'message': message
+        }, status_code=202)
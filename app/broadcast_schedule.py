@@ -0,0 +1,549 @@
+"""
+Plan emisji zgłoszeń w przerwach.
+
+Zaakceptowane utwory trafiają do lokalnej kolejki (tabela broadcast_queue)
+razem z długością i wykonawcą. Wątek w tle co BROADCAST_PLAN_INTERVAL sekund:
+- oznacza jako wyemitowane utwory z przerw, które już się skończyły,
+- dopisuje nowe zgłoszenia do istniejącego planu (first fit: najwcześniejsza
+  przerwa, w której utwór się mieści i nie łamie odstępu między utworami
+  tego samego wykonawcy). Zaplanowane utwory nie są przesuwane, więc plan
+  nie jest liczony od nowa - cykl bez nowych zgłoszeń nic nie zmienia,
+- ustawia playlistę w kolejności planu: najbliższe przerwy na początku,
+  pozostałe utwory za nimi w dotychczasowej kolejności.
+
+Zmiany playlisty są wyliczane z lustra playlisty: przenoszone są tylko
+utwory spoza najdłuższego podciągu, który już stoi w dobrej kolejności
+(sąsiednie utwory razem, jednym wywołaniem). Gdy przeniesień byłoby więcej
+niż wywołań potrzebnych do zastąpienia całej playlisty, jest ona zastępowana.
+
+Przy kilku workerach plan aktualizuje jeden z nich naraz (dzierżawa w shared_state).
+"""
+
+import bisect
+import os
+import secrets
+import threading
+import time
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app.database import (
+    acquire_state_lease, find_unqueued_approved, get_broadcast_queue, get_playlist_tracks_page,
+    mark_broadcast_aired, replace_playlist_tracks, save_broadcast_entries
+)
+from app.playlist_mirror import get_playlist_mirror, mirror_state
+from app.spotify_client import get_spotify_client
+from app.utils import normalize_text
+
+# Klucz dzierżawy planowania w tabeli shared_state
+SCHEDULE_LEASE_KEY = 'broadcast_schedule'
+
+# Przerwa zaczynająca się za mniej niż tyle sekund nie przyjmuje już nowych utworów
+FREEZE_SECONDS = 60
+
+# Limit utworów w jednym wywołaniu zapisu playlisty
+PLAYLIST_BATCH = 100
+
+# Blokada tworzenia wątku planowania (jeden na proces)
+_scheduler_lock = threading.Lock()
+
+def get_broadcast_scheduler():
+    """Zwraca planowanie emisji dla bieżącej aplikacji (uruchamiane przy pierwszym użyciu)"""
+    scheduler = current_app.extensions.get('broadcast_scheduler')
+    if scheduler is None:
+        with _scheduler_lock:
+            scheduler = current_app.extensions.get('broadcast_scheduler')
+            if scheduler is None:
+                app = current_app._get_current_object()
+                scheduler = BroadcastScheduler(
+                    app,
+                    get_spotify_client(),
+                    app.extensions['break_calendar'],
+                    horizon_days=app.config['BROADCAST_PLAN_DAYS'],
+                    spacing=app.config['BROADCAST_ARTIST_SPACING'],
+                    max_age=app.config['BROADCAST_MAX_AGE_HOURS'] * 3600,
+                    interval=app.config['BROADCAST_PLAN_INTERVAL']
+                )
+                scheduler.start()
+                app.extensions['broadcast_scheduler'] = scheduler
+    return scheduler
+
+def ensure_broadcast_scheduler():
+    """Uruchamia planowanie w tle, jeśli jest włączone (wywoływane przy pierwszym requeście)"""
+    if current_app.config['BROADCAST_SCHEDULE_ENABLED'] and 'broadcast_scheduler' not in current_app.extensions:
+        get_broadcast_scheduler()
+
+def artist_names(artist):
+    """Znormalizowani wykonawcy utworu ('A, B' -> {'a', 'b'}) do sprawdzania odstępu"""
+    return frozenset(normalize_text(name) for name in (artist or '').split(',') if name.strip())
+
+def _parse_clock(value):
+    """'08:45' -> (8, 45)"""
+    hours, minutes = (int(part) for part in value.strip().split(':'))
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(value)
+    return hours, minutes
+
+class BreakCalendar:
+    """Godziny przerw i dni emisji (niezmienne po utworzeniu)"""
+
+    def __init__(self, breaks, days=(1, 2, 3, 4, 5)):
+        """
+        Args:
+            breaks: Przerwy jako pary ((godz, min), (godz, min)) - początek i koniec
+            days: Dni tygodnia z przerwami (ISO: 1 - poniedziałek, 7 - niedziela)
+        """
+        self.breaks = sorted(breaks)
+        self.days = frozenset(days)
+
+        if not self.breaks:
+            raise ValueError('Brak przerw w BROADCAST_BREAKS')
+        for start, end in self.breaks:
+            if end <= start:
+                raise ValueError(f'Przerwa {start[0]:02d}:{start[1]:02d} kończy się przed początkiem')
+        for (_, previous_end), (start, _) in zip(self.breaks, self.breaks[1:]):
+            if start < previous_end:
+                raise ValueError(f'Przerwy w BROADCAST_BREAKS nakładają się ({start[0]:02d}:{start[1]:02d})')
+        if not self.days or not self.days <= set(range(1, 8)):
+            raise ValueError('BROADCAST_DAYS - dni tygodnia od 1 (poniedziałek) do 7 (niedziela)')
+
+    @classmethod
+    def from_config(cls, config):
+        """Czyta BROADCAST_BREAKS ('GG:MM-GG:MM,...') i BROADCAST_DAYS ('1,2,3,4,5')"""
+        breaks = []
+        for part in config['BROADCAST_BREAKS'].split(','):
+            if not part.strip():
+                continue
+            try:
+                start, end = (_parse_clock(value) for value in part.split('-'))
+            except ValueError:
+                raise ValueError(f'Niepoprawna przerwa w BROADCAST_BREAKS: {part.strip()!r} (oczekiwano GG:MM-GG:MM)') from None
+            breaks.append((start, end))
+
+        try:
+            days = [int(day) for day in config['BROADCAST_DAYS'].split(',') if day.strip()]
+        except ValueError:
+            raise ValueError(f"Niepoprawne BROADCAST_DAYS: {config['BROADCAST_DAYS']!r}") from None
+
+        return cls(breaks, days)
+
+    def upcoming(self, now, horizon_days):
+        """
+        Przerwy, które jeszcze się nie skończyły, w najbliższych horizon_days dniach.
+
+        Returns:
+            list: (start, end) - znaczniki epoch w czasie lokalnym szkoły, rosnąco
+        """
+        today = date.fromtimestamp(now)
+        windows = []
+        for offset in range(horizon_days + 1):
+            day = today + timedelta(days=offset)
+            if day.isoweekday() not in self.days:
+                continue
+            for (start_hour, start_minute), (end_hour, end_minute) in self.breaks:
+                end = int(datetime(day.year, day.month, day.day, end_hour, end_minute).timestamp())
+                if end > now:
+                    start = int(datetime(day.year, day.month, day.day, start_hour, start_minute).timestamp())
+                    windows.append((start, end))
+        return windows
+
+class QueuedTrack:
+    """Utwór w kolejce emisji"""
+
+    __slots__ = ('submission_id', 'track_id', 'track_uri', 'artist', 'artists', 'duration_ms', 'submitted_ts',
+                 'break_start', 'break_end', 'slot')
+
+    def __init__(self, submission_id, track_id, track_uri, artist, duration_ms, submitted_ts,
+                 break_start=None, break_end=None, slot=None):
+        self.submission_id = submission_id
+        self.track_id = track_id
+        self.track_uri = track_uri
+        self.artist = artist
+        self.artists = artist_names(artist)
+        self.duration_ms = duration_ms
+        self.submitted_ts = submitted_ts
+        self.break_start = break_start
+        self.break_end = break_end
+        self.slot = slot
+
+class BroadcastPlan:
+    """Przerwy z przypisanymi utworami (w kolejności emisji) i wolnym czasem"""
+
+    def __init__(self, windows, spacing=3):
+        """
+        Args:
+            windows: Przerwy (start, end) rosnąco - z BreakCalendar.upcoming
+            spacing: Minimalna liczba innych utworów między utworami tego samego wykonawcy
+                (w obrębie jednego dnia - kolejnego dnia słuchacze nie pamiętają poprzednich przerw)
+        """
+        self.windows = list(windows)
+        self.spacing = spacing
+        self._index = {start: index for index, (start, _) in enumerate(self.windows)}
+        self._days = [date.fromtimestamp(start) for start, _ in self.windows]
+        self.slots = [[] for _ in self.windows]
+        self.free_ms = [(end - start) * 1000 for start, end in self.windows]
+
+    def __contains__(self, break_start):
+        return break_start in self._index
+
+    def load(self, track):
+        """Odtwarza utwór zaplanowany wcześniej (bez sprawdzania miejsca - plan się nie zmienia)"""
+        index = self._index[track.break_start]
+        self.slots[index].append(track)
+        self.free_ms[index] -= track.duration_ms
+
+    def place(self, track, not_before):
+        """
+        First fit: najwcześniejsza przerwa od not_before, w której utwór się mieści
+        i zachowuje odstęp od utworów tego samego wykonawcy.
+
+        Returns:
+            int: Indeks przerwy, do której trafił utwór, lub None (brak miejsca w horyzoncie)
+        """
+        for index, (start, end) in enumerate(self.windows):
+            if start < not_before or self.free_ms[index] < track.duration_ms:
+                continue
+
+            position = self._spaced_position(index, track.artists)
+            if position is None:
+                continue
+
+            self.slots[index].insert(position, track)
+            self.free_ms[index] -= track.duration_ms
+            track.break_start = start
+            return index
+
+        return None
+
+    def _spaced_position(self, index, artists):
+        """Najpóźniejsze miejsce w przerwie, w którego sąsiedztwie nie ma tych wykonawców"""
+        slots = self.slots[index]
+        if not self.spacing or not artists:
+            return len(slots)
+
+        for position in range(len(slots), -1, -1):
+            if not any(neighbour.artists & artists for neighbour in self._neighbours(index, position)):
+                return position
+        return None
+
+    def _neighbours(self, index, position):
+        """Do spacing utworów przed i po miejscu position w przerwie index (także z innych przerw tego dnia)"""
+        day = self._days[index]
+
+        before = self.slots[index][:position][::-1]
+        for previous in range(index - 1, -1, -1):
+            if len(before) >= self.spacing or self._days[previous] != day:
+                break
+            before.extend(reversed(self.slots[previous]))
+
+        after = self.slots[index][position:]
+        for following in range(index + 1, len(self.slots)):
+            if len(after) >= self.spacing or self._days[following] != day:
+                break
+            after.extend(self.slots[following])
+
+        return before[:self.spacing] + after[:self.spacing]
+
+    def tracks(self, after=0):
+        """Zaplanowane utwory w kolejności emisji (z przerw kończących się po after)"""
+        return [
+            track
+            for (_, end), slots in zip(self.windows, self.slots) if end > after
+            for track in slots
+        ]
+
+    def entries(self, index):
+        """Wiersze broadcast_queue dla utworów przerwy (z aktualnymi numerami miejsc)"""
+        start, end = self.windows[index]
+        return [_entry(track, start, end, slot) for slot, track in enumerate(self.slots[index])]
+
+def _entry(track, break_start=None, break_end=None, slot=None):
+    return {
+        'submission_id': track.submission_id, 'track_id': track.track_id, 'track_uri': track.track_uri,
+        'artist': track.artist, 'duration_ms': track.duration_ms, 'submitted_ts': track.submitted_ts,
+        'break_start': break_start, 'break_end': break_end, 'slot': slot
+    }
+
+def playlist_order(playlist_uris, scheduled_uris):
+    """
+    Docelowa kolejność playlisty: zaplanowane utwory, potem pozostałe bez zmian.
+
+    Args:
+        playlist_uris: URI utworów w obecnej kolejności na playliście
+        scheduled_uris: URI utworów w kolejności planu (pomijane, jeśli nie ma ich na playliście)
+
+    Returns:
+        list: Permutacja pozycji - element k to obecna pozycja utworu, który ma być k-ty
+    """
+    positions = {}
+    for position, uri in enumerate(playlist_uris):
+        positions.setdefault(uri, []).append(position)
+
+    # Powtórzony URI - kolejne zaplanowane utwory biorą kolejne wystąpienia
+    scheduled = []
+    for uri in scheduled_uris:
+        free = positions.get(uri)
+        if free:
+            scheduled.append(free.pop(0))
+
+    taken = set(scheduled)
+    return scheduled + [position for position in range(len(playlist_uris)) if position not in taken]
+
+def _increasing_run(values):
+    """Indeksy najdłuższego rosnącego podciągu values"""
+    tails = []
+    tail_indices = []
+    previous = [None] * len(values)
+
+    for index, value in enumerate(values):
+        length = bisect.bisect_left(tails, value)
+        if length == len(tails):
+            tails.append(value)
+            tail_indices.append(index)
+        else:
+            tails[length] = value
+            tail_indices[length] = index
+        previous[index] = tail_indices[length - 1] if length else None
+
+    result = set()
+    index = tail_indices[-1] if tail_indices else None
+    while index is not None:
+        result.add(index)
+        index = previous[index]
+    return result
+
+def plan_moves(order):
+    """
+    Przeniesienia zakresów, które ustawiają playlistę w zadanej kolejności.
+
+    Utwory, które już stoją obok siebie we właściwej kolejności, tworzą bloki;
+    bloki z najdłuższego rosnącego podciągu zostają na miejscu, każdy z
+    pozostałych jest przenoszony jednym wywołaniem za swojego poprzednika.
+
+    Args:
+        order: Permutacja pozycji (jak z playlist_order)
+
+    Returns:
+        list: (range_start, range_length, insert_before) - argumenty kolejnych
+        reorder_playlist_items (pozycje względem playlisty po poprzednich przeniesieniach)
+    """
+    target = [0] * len(order)
+    for index, position in enumerate(order):
+        target[position] = index
+
+    # Blok: (pierwsza docelowa pozycja, długość)
+    blocks = []
+    for value in target:
+        if blocks and value == blocks[-1][0] + blocks[-1][1]:
+            blocks[-1][1] += 1
+        else:
+            blocks.append([value, 1])
+    blocks = [tuple(block) for block in blocks]
+
+    staying = _increasing_run([first for first, _ in blocks])
+    by_end = {first + length: (first, length) for first, length in blocks}
+
+    working = list(blocks)
+    moves = []
+    for block in sorted(block for index, block in enumerate(blocks) if index not in staying):
+        source = working.index(block)
+        range_start = sum(length for _, length in working[:source])
+
+        # Za blokiem kończącym się tuż przed nim (ten jest już na właściwym miejscu)
+        anchor = by_end.get(block[0])
+        destination = working.index(anchor) + 1 if anchor else 0
+        insert_before = sum(length for _, length in working[:destination])
+
+        # Już stoi za poprzednikiem (przeniesionym wcześniej razem z otoczeniem)
+        if source == (destination - 1 if anchor else 0):
+            continue
+
+        moves.append((range_start, block[1], insert_before))
+        working.pop(source)
+        working.insert(destination - 1 if destination > source else destination, block)
+
+    return moves
+
+def plan_playlist_update(order, can_replace=True):
+    """
+    Wybiera tańszy sposób zmiany kolejności playlisty.
+
+    Returns:
+        Tuple (kind, moves) - kind: None (kolejność już jest dobra), 'reorder' lub 'replace'
+    """
+    if all(index == position for index, position in enumerate(order)):
+        return None, []
+
+    moves = plan_moves(order)
+    replace_calls = -(-len(order) // PLAYLIST_BATCH)
+    if not can_replace or len(moves) <= replace_calls:
+        return 'reorder', moves
+    return 'replace', []
+
+class BroadcastScheduler:
+    """Wątek planujący emisję w przerwach i ustawiający kolejność playlisty"""
+
+    def __init__(self, app, spotify, calendar, horizon_days=3, spacing=3, max_age=259200, interval=30):
+        """
+        Args:
+            app: Aplikacja Flask (kontekst dla zapisów do bazy)
+            spotify: Współdzielony SpotifyClient
+            calendar: BreakCalendar z godzinami przerw
+            horizon_days: Na ile dni naprzód planować przerwy
+            spacing: Minimalna liczba innych utworów między utworami tego samego wykonawcy
+            max_age: Po ilu sekundach od zgłoszenia niewyemitowany utwór wypada z kolejki
+            interval: Co ile sekund aktualizować plan
+        """
+        self.app = app
+        self.spotify = spotify
+        self.playlist_id = spotify.playlist_id
+        self.calendar = calendar
+        self.horizon_days = horizon_days
+        self.spacing = spacing
+        self.max_age = max_age
+        self.interval = interval
+        self.owner = f'{os.getpid()}-{secrets.token_hex(4)}'
+
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+        self.placed = 0
+        self.aired = 0
+        self.reorders = 0
+        self.replacements = 0
+        self.failures = 0
+
+    def start(self):
+        """Uruchamia wątek planowania"""
+        self._thread = threading.Thread(target=self._run, name='broadcast-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Zatrzymuje wątek (przerywa czekanie na kolejny cykl)"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping:
+            with self.app.app_context():
+                try:
+                    self.tick()
+                except Exception as e:
+                    self.failures += 1
+                    current_app.logger.warning(f"Nie udało się zaktualizować planu emisji: {e}")
+
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def tick(self, now=None):
+        """
+        Jeden cykl planowania.
+
+        Returns:
+            str: 'skipped' (planuje inny proces) albo wynik zmiany playlisty
+            ('unchanged', 'reorder', 'replace', 'stale', 'no_mirror')
+        """
+        now = now or time.time()
+        if not acquire_state_lease(SCHEDULE_LEASE_KEY, self.owner, self.interval * 3, now=now):
+            return 'skipped'
+
+        self.aired += mark_broadcast_aired(now, purge_before=now - self.max_age)
+
+        plan = self.update_plan(now)
+        return self.apply(plan, now)
+
+    def update_plan(self, now):
+        """
+        Odtwarza plan z bazy i dopisuje do niego nowe zgłoszenia.
+
+        Returns:
+            BroadcastPlan: Aktualny plan (zapisany w broadcast_queue)
+        """
+        # Przerwy od początku dnia - utwory wyemitowane dzisiaj też liczą się do odstępu wykonawców
+        today = datetime.combine(date.fromtimestamp(now), datetime.min.time()).timestamp()
+        plan = BroadcastPlan(self.calendar.upcoming(today, self.horizon_days), spacing=self.spacing)
+
+        # Niezaplanowane (brak miejsca albo przerwa zniknęła z konfiguracji) czekają razem z nowymi
+        waiting = []
+        unsaved = set()
+        for row in get_broadcast_queue(aired_since=today):
+            aired = row.pop('status') == 'aired'
+            track = QueuedTrack(**row)
+            if track.break_start in plan:
+                plan.load(track)
+            elif not aired:
+                waiting.append(track)
+                if track.break_start is not None:
+                    unsaved.add(track.submission_id)
+
+        # Bez długości (stare zgłoszenie, lustro jeszcze nie zsynchronizowane) - w następnym cyklu
+        for row in find_unqueued_approved(now - self.max_age):
+            if row['duration_ms']:
+                waiting.append(QueuedTrack(**row))
+                unsaved.add(row['submission_id'])
+        waiting.sort(key=lambda track: (track.submitted_ts, track.submission_id))
+
+        changed = set()
+        entries = []
+        for track in waiting:
+            index = plan.place(track, not_before=now + FREEZE_SECONDS)
+            if index is not None:
+                changed.add(index)
+                self.placed += 1
+            elif track.submission_id in unsaved:
+                # Czeka w kolejce na miejsce w przerwach, które wejdą do horyzontu planu
+                track.break_start = None
+                entries.append(_entry(track))
+
+        for index in sorted(changed):
+            entries.extend(plan.entries(index))
+        if entries:
+            save_broadcast_entries(entries)
+
+        return plan
+
+    def apply(self, plan, now):
+        """Ustawia playlistę w kolejności planu najmniejszą liczbą wywołań Spotify"""
+        # Obecna kolejność jest brana z lustra - bez lustra plan nie zmienia playlisty
+        if not self.app.config['PLAYLIST_MIRROR_ENABLED'] or mirror_state() is None:
+            return 'no_mirror'
+
+        scheduled_uris = [track.track_uri for track in plan.tracks(after=now)]
+
+        for _ in range(2):
+            state = mirror_state()
+            tracks = get_playlist_tracks_page(0, -1)
+            order = playlist_order([track['track_uri'] for track in tracks], scheduled_uris)
+
+            # Lokalne pliki i usunięte utwory nie mają URI - nie da się ich dodać ponownie
+            can_replace = all(track['track_uri'] and not track['track_uri'].startswith('spotify:local:')
+                              for track in tracks)
+            kind, moves = plan_playlist_update(order, can_replace)
+            if kind is None:
+                return 'unchanged'
+
+            # Lustro mogło nie zauważyć zmian (np. dopisanych przez writer) - pozycje byłyby nieaktualne
+            snapshot_id = self.spotify.get_playlist_snapshot()
+            if snapshot_id == state['snapshot_id']:
+                break
+            get_playlist_mirror().sync(force=True)
+        else:
+            return 'stale'
+
+        if kind == 'reorder':
+            for range_start, range_length, insert_before in moves:
+                snapshot_id = self.spotify.reorder_playlist_items(range_start, range_length, insert_before, snapshot_id)
+            self.reorders += len(moves)
+        else:
+            snapshot_id = self.spotify.replace_playlist_items([tracks[position]['track_uri'] for position in order])
+            self.replacements += 1
+
+        # Lustro od razu w nowej kolejności (bez pobierania playlisty)
+        replace_playlist_tracks(self.playlist_id, snapshot_id, [tracks[position] for position in order])
+        current_app.logger.info(
+            f"Ustawiono kolejność playlisty według planu emisji: {len(scheduled_uris)} utworów w planie, "
+            + (f"{len(moves)} przeniesień" if kind == 'reorder' else 'playlista zastąpiona')
+        )
+        return kind
@@ -13,13 +13,103 @@ class Config:
     SPOTIPY_CLIENT_SECRET = os.getenv('SPOTIPY_CLIENT_SECRET')
     SPOTIPY_REDIRECT_URI = os.getenv('SPOTIPY_REDIRECT_URI')
     SPOTIFY_PLAYLIST_ID = os.getenv('SPOTIFY_PLAYLIST_ID')
+    SPOTIFY_CACHE_PATH = os.getenv('SPOTIFY_CACHE_PATH', '.spotify_cache')
+    SPOTIFY_POOL_SIZE = int(os.getenv('SPOTIFY_POOL_SIZE', 10))
+    SPOTIFY_REQUESTS_TIMEOUT = float(os.getenv('SPOTIFY_REQUESTS_TIMEOUT', 5))
+    # Adres API (zmieniany tylko w benchmarkach - lokalny fałszywy serwer Spotify)
+    SPOTIFY_API_PREFIX = os.getenv('SPOTIFY_API_PREFIX', 'https://api.spotify.com/v1/')
+    SPOTIFY_TOKEN_URL = os.getenv('SPOTIFY_TOKEN_URL', 'https://accounts.spotify.com/api/token')
+    
+    # Token OAuth: 'sqlite' (wspólny dla procesów, odświeża jeden z nich) lub 'file' (tylko jeden proces)
+    SPOTIFY_TOKEN_BACKEND = os.getenv('SPOTIFY_TOKEN_BACKEND', 'sqlite')
+    SPOTIFY_TOKEN_LEASE = float(os.getenv('SPOTIFY_TOKEN_LEASE', 15))
+    
+    # Odporność wywołań Spotify (deadline, ponowienia, circuit breaker)
+    SPOTIFY_CALL_DEADLINE = float(os.getenv('SPOTIFY_CALL_DEADLINE', 10))
+    SPOTIFY_MAX_RETRIES = int(os.getenv('SPOTIFY_MAX_RETRIES', 3))
+    SPOTIFY_BREAKER_THRESHOLD = int(os.getenv('SPOTIFY_BREAKER_THRESHOLD', 5))
+    SPOTIFY_BREAKER_RESET = float(os.getenv('SPOTIFY_BREAKER_RESET', 30))
+    SPOTIFY_QUEUE_WHEN_DOWN = os.getenv('SPOTIFY_QUEUE_WHEN_DOWN', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Cache wyszukiwania utworów
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 1000))
+    SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 86400))
+    SEARCH_CACHE_NEGATIVE_TTL = int(os.getenv('SEARCH_CACHE_NEGATIVE_TTL', 600))
+    SEARCH_CACHE_PERSIST = os.getenv('SEARCH_CACHE_PERSIST', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Wyszukiwanie - liczba kandydatów na zapytanie i minimalna ocena dopasowania (0-1)
+    SPOTIFY_SEARCH_CANDIDATES = int(os.getenv('SPOTIFY_SEARCH_CANDIDATES', 10))
+    SPOTIFY_SEARCH_MIN_SCORE = float(os.getenv('SPOTIFY_SEARCH_MIN_SCORE', 0.6))
+    
+    # Filtr wulgaryzmów - plik reguł i co ile sekund sprawdzać jego zmiany (0 - bez przeładowania)
+    FILTER_RULES_PATH = os.getenv('FILTER_RULES_PATH', 'data/filter_rules.txt')
+    FILTER_RULES_RELOAD_INTERVAL = float(os.getenv('FILTER_RULES_RELOAD_INTERVAL', 5))
     
     # Limity zgłoszeń
     MAX_SONGS_PER_PERIOD = int(os.getenv('MAX_SONGS_PER_PERIOD', 1))
     LIMIT_PERIOD_DAYS = int(os.getenv('LIMIT_PERIOD_DAYS', 2))
     
-    # Email
+    # Duplikaty - ile dni po dodaniu ta sama piosenka jest odrzucana (0 - bez limitu)
+    DUPLICATE_WINDOW_DAYS = int(os.getenv('DUPLICATE_WINDOW_DAYS', 7))
+    
+    # Ograniczanie requestów (token bucket): 'liczba/sekundy'
+    THROTTLE_BACKEND = os.getenv('THROTTLE_BACKEND', 'memory')  # 'memory' lub 'sqlite'
+    THROTTLE_MAX_KEYS = int(os.getenv('THROTTLE_MAX_KEYS', 10000))
+    THROTTLE_REQUEST_CODE_IP = os.getenv('THROTTLE_REQUEST_CODE_IP', '20/3600')
+    THROTTLE_REQUEST_CODE_EMAIL = os.getenv('THROTTLE_REQUEST_CODE_EMAIL', '5/3600')
+    THROTTLE_SUBMIT_IP = os.getenv('THROTTLE_SUBMIT_IP', '30/3600')
+    THROTTLE_SUBMIT_EMAIL = os.getenv('THROTTLE_SUBMIT_EMAIL', '10/3600')
+    
+    # Liczba zaufanych proxy przed aplikacją (np. 1 za nginx). Adres klienta dla limitów IP jest
+    # brany z X-Forwarded-For (n-ty wpis od końca) zamiast adresu proxy. 0 - nagłówki są ignorowane
+    # (bez proxy nie wolno im ufać - klient mógłby podać dowolny adres)
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+    
+    # Asynchroniczne przetwarzanie zgłoszeń (kolejka + polling statusu)
+    ASYNC_SUBMISSIONS = os.getenv('ASYNC_SUBMISSIONS', 'false').lower() in ('1', 'true', 'yes')
+    SUBMISSION_WORKERS = int(os.getenv('SUBMISSION_WORKERS', 4))
+    # Zgłoszenia 'pending' porzucone przez kolejkę (restart, awaria procesu) wracają do niej po tylu
+    # sekundach (więcej niż 300 - maks. odstęp ponowień przy niedostępnym Spotify); co ile sekund
+    # ich szukać (0 - wyłączone)
+    SUBMISSION_STALE_SECONDS = int(os.getenv('SUBMISSION_STALE_SECONDS', 600))
+    SUBMISSION_SWEEP_INTERVAL = float(os.getenv('SUBMISSION_SWEEP_INTERVAL', 60))
+    
+    # Zbiorcze dodawanie do playlisty (jedno wywołanie API na wiele utworów)
+    PLAYLIST_BATCH_WRITES = os.getenv('PLAYLIST_BATCH_WRITES', 'false').lower() in ('1', 'true', 'yes')
+    PLAYLIST_BATCH_WINDOW = float(os.getenv('PLAYLIST_BATCH_WINDOW', 2.0))
+    PLAYLIST_BATCH_SIZE = min(int(os.getenv('PLAYLIST_BATCH_SIZE', 50)), 100)
+    PLAYLIST_BATCH_RETRIES = int(os.getenv('PLAYLIST_BATCH_RETRIES', 3))
+    
+    # Lustro playlisty w SQLite (duplikaty, liczba utworów, panel admina bez wywołań API)
+    PLAYLIST_MIRROR_ENABLED = os.getenv('PLAYLIST_MIRROR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PLAYLIST_SYNC_INTERVAL = int(os.getenv('PLAYLIST_SYNC_INTERVAL', 60))
+    
+    # Plan emisji w przerwach (wymaga lustra playlisty): przerwy 'GG:MM-GG:MM' po przecinku, dni
+    # tygodnia (1 - poniedziałek), horyzont planu (dni), min. liczba innych utworów między utworami
+    # tego samego wykonawcy, ile godzin zgłoszenie czeka na emisję, co ile sekund aktualizować plan
+    BROADCAST_SCHEDULE_ENABLED = os.getenv('BROADCAST_SCHEDULE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    BROADCAST_BREAKS = os.getenv(
+        'BROADCAST_BREAKS', '08:45-08:55,09:40-09:50,10:35-10:50,11:35-11:45,12:30-12:40,13:25-13:35'
+    )
+    BROADCAST_DAYS = os.getenv('BROADCAST_DAYS', '1,2,3,4,5')
+    BROADCAST_PLAN_DAYS = int(os.getenv('BROADCAST_PLAN_DAYS', 3))
+    BROADCAST_ARTIST_SPACING = int(os.getenv('BROADCAST_ARTIST_SPACING', 3))
+    BROADCAST_MAX_AGE_HOURS = int(os.getenv('BROADCAST_MAX_AGE_HOURS', 72))
+    BROADCAST_PLAN_INTERVAL = float(os.getenv('BROADCAST_PLAN_INTERVAL', 30))
+    
+    # Statystyki (/api/stats) - czas cache w procesie (sekundy)
+    STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', 5))
+    
+    # Email - dozwolone domeny (kilka po przecinku; pierwsza jest główna)
     SCHOOL_EMAIL_DOMAIN = os.getenv('SCHOOL_EMAIL_DOMAIN', 'zspbytow.pl')
+    SCHOOL_EMAIL_DOMAINS = [domain.strip().lower() for domain in SCHOOL_EMAIL_DOMAIN.split(',') if domain.strip()]
+    EMAIL_HASH_CACHE_SIZE = int(os.getenv('EMAIL_HASH_CACHE_SIZE', 4096))
+    
+    # Kody weryfikacyjne: 'sqlite' lub 'memory' (tylko jeden proces aplikacji)
+    VERIFICATION_BACKEND = os.getenv('VERIFICATION_BACKEND', 'sqlite')
+    VERIFICATION_MAX_CODES_PER_EMAIL = int(os.getenv('VERIFICATION_MAX_CODES_PER_EMAIL', 3))
+    # Co ile zapisanych kodów usuwać użyte i wygasłe (0 - bez okresowego czyszczenia)
+    VERIFICATION_PURGE_EVERY = int(os.getenv('VERIFICATION_PURGE_EVERY', 100))
     
     # Email SMTP configuration
     SMTP_SERVER = os.getenv('SMTP_SERVER')
@@ -28,12 +118,35 @@ class Config:
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
     SMTP_FROM_EMAIL = os.getenv('SMTP_FROM_EMAIL')
     SMTP_FROM_NAME = os.getenv('SMTP_FROM_NAME', 'Radiowęzeł ZSP Bytów')
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() in ('1', 'true', 'yes')
+    SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 10))
+    SMTP_IDLE_TIMEOUT = float(os.getenv('SMTP_IDLE_TIMEOUT', 60))
+    
+    # Wysyłka emaili: 'smtp' (kolejka + wątek w tle), 'console' (dev) lub 'null'
+    EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'smtp' if os.getenv('SMTP_SERVER') else 'console')
+    EMAIL_MAX_ATTEMPTS = int(os.getenv('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_POLL_INTERVAL = float(os.getenv('EMAIL_POLL_INTERVAL', 5))
+    # Niewysłane emaile starsze niż ważność kodu nie są wysyłane; wysłane i nieudane (bez treści)
+    # zostają w tabeli email_outbox przez EMAIL_OUTBOX_RETENTION sekund
+    EMAIL_EXPIRE_SECONDS = int(os.getenv('EMAIL_EXPIRE_SECONDS', 600))
+    EMAIL_OUTBOX_RETENTION = int(os.getenv('EMAIL_OUTBOX_RETENTION', 86400))
     
     # Admini (bez limitu zgłoszeń)
     ADMIN_EMAILS = [email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()]
     
     # Baza danych
     DATABASE_PATH = os.getenv('DATABASE_PATH', 'data/submissions.db')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+    SQLITE_CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', 256))
+    
+    # Serwer ASGI (asgi.py): wątki dla SQLite i połączenia do Spotify na proces
+    ASGI_DB_THREADS = int(os.getenv('ASGI_DB_THREADS', 32))
+    ASGI_SPOTIFY_CONNECTIONS = int(os.getenv('ASGI_SPOTIFY_CONNECTIONS', 100))
+    
+    # Metryki Prometheus (/metrics); z ustawionym tokenem wymagany nagłówek Authorization: Bearer
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
     
     @staticmethod
     def validate():
@@ -49,8 +162,3 @@ class Config:
         
         if missing:
             raise ValueError(f"Brakujące zmienne środowiskowe: {', '.join(missing)}")
-    
-    @staticmethod
-    def is_admin(email):
-        """Sprawdza czy email jest na liście adminów"""
-        return email.lower() in Config.ADMIN_EMAILS
@@ -1,82 +1,320 @@
 """
 Moduł do filtrowania wulgaryzmów i nieodpowiednich treści.
+
+Reguły są w pliku tekstowym (FILTER_RULES_PATH, domyślnie data/filter_rules.txt),
+po jednej w linii:
+
+    kurwa          całe słowo
+    kurw*          słowo zaczynające się od 'kurw' (odmiana)
+    !dick dale     wyjątek - fraza, która nie jest wulgaryzmem
+    re:f+u+k+      wyrażenie regularne (na tekście po normalizacji)
+    # komentarz
+
+Przed sprawdzeniem tekst jest normalizowany: małe litery bez znaków
+diakrytycznych, homoglify cyrylicy, leetspeak ('$h1t'), litery rozdzielone
+kropkami lub spacjami ('k.u.r.w.a'). Wszystkie reguły są kompilowane do jednego
+wyrażenia, w którym każda litera może się powtarzać ('fuuuck') lub być
+zamaskowana gwiazdką ('f*ck').
+
+Wątek w tle sprawdza datę modyfikacji pliku i po zmianie podmienia
+skompilowane reguły w całości. Błędny plik nie zastępuje poprzednich reguł.
 """
 
-# Lista wulgaryzmów (polskie i angielskie)
-VULGAR_WORDS = [
-    # Polskie
-    'kurwa', 'kurwy', 'kurwo', 'kurwą', 'kurwie', 'kurewski',
-    'chuj', 'chuja', 'chuju', 'chujem', 'huj',
-    'dziwka', 'dziwki', 'dziwko', 'dziwką',
-    'pierdol', 'pierdolić', 'pierdoli', 'pierdolę',
-    'jebać', 'jebak', 'jebane', 'jebany', 'jebana',
-    'dupek', 'dupa', 'dupie', 'dupą', 'dupsko',
-    'suka', 'suko', 'suki', 'sukinsyn',
-    'skurwysyn', 'skurwiel', 'skurwysynowski',
-    'pizda', 'pizdy', 'pizdo', 'pizdą',
-    'gówno', 'gowno', 'gówna',
-    'spierdalaj', 'spierdala', 'spierdalać',
-    'zajebisty', 'zajebiste', 'zajebista',
-    'kutas', 'kutasa', 'kutasie',
-    'cipka', 'cipa',
-    'srać', 'sraka',
-    'pierdzieć', 'pierdnąć',
-    
-    # Angielskie
-    'fuck', 'fucking', 'fucker', 'fucked', 'fucks',
-    'shit', 'shitty', 'shithead',
-    'bitch', 'bitches', 'bitching',
-    'ass', 'asshole', 'asses',
-    'damn', 'damned', 'damnit',
-    'cunt', 'cunts',
-    'dick', 'dickhead', 'dicks',
-    'pussy', 'pussies',
-    'bastard', 'bastards',
-    'whore', 'whores',
-    'slut', 'sluts', 'slutty',
-    'cock', 'cocks',
-    'piss', 'pissed', 'pissing',
-    'motherfucker', 'motherfucking',
-    'bullshit',
-    'nigga', 'nigger',
-    'retard', 'retarded',
-]
+import itertools
+import os
+import re
+import threading
+import time
+from flask import current_app
+from app.utils import fold_text
+
+# Znak maskujący literę ('f*ck', 'f#ck')
+MASK = '*'
+# Dłuższe serie masek są skracane - każda litera reguły może pochłonąć kilka gwiazdek,
+# więc liczba prób podziału serii rośnie wielomianowo z jej długością. 8 wystarcza
+# na zamaskowanie słowa do 10 liter (reguła wymaga co najmniej dwóch liter jawnie)
+MAX_MASK_RUN = 8
+
+# Wszystkie cyfry w słowie zawierającym litery ('a55hole', 'skurw13l')
+_LEET_DIGITS = str.maketrans('013457', 'oieast')
+# Symbole zamieniane zawsze ('$hit', 'a$$', 'f#ck')
+_LEET_SYMBOLS = str.maketrans({'$': 's', '@': 'a', '#': MASK})
+# Symbole zamieniane tylko między literami ('sh!t', ale nie 'Help!')
+_INNER_SYMBOLS = {'!': 'i', '|': 'i', '+': 't'}
+_INNER_SYMBOL = re.compile(r'(?<=\w)[!|+](?=\w)')
+_MASK_RUN = re.compile(re.escape(MASK) + f'{{{MAX_MASK_RUN + 1},}}')
+
+
+# Cyrylica udająca łacinę ('kurwа' z cyrylickim 'а') - tylko w słowach mieszanych
+_CONFUSABLES = str.maketrans('аеорсухіѕјкмт', 'aeopcyxisjkmt')
+
+_WORD = re.compile(r'\w+')
+_LATIN = re.compile(r'[a-z]')
+# Co najmniej trzy pojedyncze litery rozdzielone kropką, myślnikiem lub spacją
+_SPACED_LETTERS = re.compile(r'(?<![\w*])[^\W\d_](?:[ .-][^\W\d_](?![\w*])){2,}')
+
+# Cokolwiek do zamiany (znaki spoza ASCII, cyfry, symbole, 'x.y') - zwykłe tytuły
+# tego nie zawierają i pomijają resztę normalizacji
+_NEEDS_NORMALIZATION = re.compile(
+    r'[^\x00-\x7f]|[\d$@#!|+]|\b[^\W\d_][ .-][^\W\d_]\b|' + _MASK_RUN.pattern
+)
+
+# Reguła: litery i pojedyncze spacje (frazy), opcjonalnie '*' na końcu
+_RULE = re.compile(r'^[^\W\d_]+(?: [^\W\d_]+)*\*?$')
+
+def _fold_word(match):
+    word = match.group()
+    if not any(char.isalpha() for char in word):
+        return word  # Same cyfry ('50', 'Blink-182') zostają bez zmian
+    if not word.isascii() and _LATIN.search(word):
+        word = word.translate(_CONFUSABLES)
+    return word.translate(_LEET_DIGITS)
+
+def normalize_for_filter(text):
+    """
+    Sprowadza tekst do postaci, w której szukane są wulgaryzmy.
+
+    Args:
+        text: Tekst do sprawdzenia (wykonawca lub tytuł)
+
+    Returns:
+        str: np. 'Sh!t $tuff k.u.r.w.a' -> 'shit stuff kurwa' (serie masek skrócone do MAX_MASK_RUN)
+    """
+    text = fold_text(text)
+    if not _NEEDS_NORMALIZATION.search(text):
+        return text
+
+    text = _MASK_RUN.sub(MASK * MAX_MASK_RUN, text.translate(_LEET_SYMBOLS))
+    text = _INNER_SYMBOL.sub(lambda match: _INNER_SYMBOLS[match.group()], text)
+    text = _WORD.sub(_fold_word, text)
+    return _SPACED_LETTERS.sub(lambda match: re.sub(r'[ .-]', '', match.group()), text)
+
+def _run_pattern(char, count):
+    """Fragment regexa dla serii powtórzonej litery ('ss' w 'ass' - co najmniej dwa razy)"""
+    if char == ' ':
+        return ' +'
+    quantifier = '+' if count == 1 else f'{{{count},}}'
+    return f'[{re.escape(char)}{re.escape(MASK)}]{quantifier}'
+
+def _trie_pattern(words, prefixes=(), name='rest'):
+    """
+    Buduje fragment regexa z drzewa prefiksowego (trie) słów.
+
+    Wspólne prefiksy są łączone ('kurw(?:a|y|o|...)'), więc silnik regex
+    nie musi próbować każdej alternatywy od początku. Węzłami są serie
+    liter, żeby powtórzenia ('kurwaaa') pasowały do tego samego słowa.
+
+    Args:
+        name: Przedrostek nazw grup końcówek prefiksów (unikalny w całym wyrażeniu)
+    """
+    trie = {}
+    groups = itertools.count(1)
+    for word, is_prefix in itertools.chain(((w, False) for w in words), ((p, True) for p in prefixes)):
+        node = trie
+        for char, group in itertools.groupby(word):
+            node = node.setdefault((char, len(list(group))), {})
+        node['*' if is_prefix else ''] = {}  # Znacznik końca słowa lub prefiksu
+
+    def build(node):
+        branches = [_run_pattern(*run) + build(child)
+                    for run, child in sorted(item for item in node.items() if isinstance(item[0], tuple))]
+        if '*' in node:
+            # Dowolna końcówka (obejmuje też koniec słowa) - bez oddawania znaków, i tak musi sięgać końca słowa
+            # (?=(x*))\1 zamiast x*+ - kwantyfikatory zaborcze są dopiero od Pythona 3.11
+            rest = f'{name}{next(groups)}'
+            branches.append(rf'(?=(?P<{rest}>[\w*]*))(?P={rest})')
+        is_end = '' in node and '*' not in node
+
+        if not branches:
+            return ''
+
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if is_end else group
+
+    return build(trie)
+
+def _fold_all(items):
+    return sorted({fold_text(item) for item in items})
+
+def _file_signature(path):
+    """Data modyfikacji i rozmiar pliku (None jeśli go nie ma)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class FilterRules:
+    """Skompilowany zestaw reguł filtra (niezmienny - przy przeładowaniu powstaje nowy)"""
+
+    def __init__(self, words=(), prefixes=(), allowed=(), allowed_prefixes=(), patterns=(), source=None):
+        """
+        Args:
+            words, prefixes: Słowa zakazane (całe słowa / początki słów)
+            allowed, allowed_prefixes: Wyjątki sprawdzane przed słowami zakazanymi
+            patterns: Wyrażenia regularne dopasowywane do znormalizowanego tekstu
+            source: Skąd pochodzą reguły (do logów)
+        """
+        self.words = _fold_all(words)
+        self.prefixes = _fold_all(prefixes)
+        self.allowed = _fold_all(allowed)
+        self.allowed_prefixes = _fold_all(allowed_prefixes)
+        self.patterns = list(patterns)
+        self.source = source
+        self.signature = None
+        self.loaded_at = time.time()
+
+        if not (self.words or self.prefixes or self.patterns):
+            raise ValueError('Brak reguł filtra')
+
+        self.matcher = self._compile()
+
+    @classmethod
+    def from_lines(cls, lines, source=None):
+        """
+        Parsuje reguły w formacie pliku reguł.
+
+        Raises:
+            ValueError: Nieprawidłowa reguła (z numerem linii)
+        """
+        rules = {'words': [], 'prefixes': [], 'allowed': [], 'allowed_prefixes': [], 'patterns': []}
+
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if line.startswith('re:'):
+                try:
+                    re.compile(line[3:])
+                except re.error as e:
+                    raise ValueError(f'Linia {number}: nieprawidłowe wyrażenie: {e}')
+                rules['patterns'].append(line[3:])
+                continue
+
+            allowed = line.startswith('!')
+            rule = ' '.join(fold_text(line.lstrip('!')).split())
+            if not _RULE.match(rule):
+                raise ValueError(f'Linia {number}: nieprawidłowa reguła: {line}')
+
+            if rule.endswith('*'):
+                rules['allowed_prefixes' if allowed else 'prefixes'].append(rule[:-1])
+            else:
+                rules['allowed' if allowed else 'words'].append(rule)
+
+        return cls(source=source, **rules)
+
+    @classmethod
+    def from_file(cls, path):
+        """Wczytuje reguły z pliku (UTF-8)"""
+        signature = _file_signature(path)
+        with open(path, encoding='utf-8-sig') as f:
+            rules = cls.from_lines(f, source=path)
+        rules.signature = signature
+        return rules
+
+    def _compile(self):
+        """Jedno wyrażenie: wyjątki, słowa zakazane (całe słowa) i wzorce"""
+        alternatives = []
+
+        if self.allowed or self.allowed_prefixes:
+            alternatives.append(f'(?P<allow>{_trie_pattern(self.allowed, self.allowed_prefixes, "allow_rest")})')
+        if self.words or self.prefixes:
+            alternatives.append(f'(?P<deny>{_trie_pattern(self.words, self.prefixes, "deny_rest")})')
+
+        pattern = r'(?<![\w*])(?:' + '|'.join(alternatives) + r')(?![\w*])' if alternatives else ''
+        if self.patterns:
+            raw = '(?P<pattern>' + '|'.join(f'(?:{p})' for p in self.patterns) + ')'
+            pattern = f'{pattern}|{raw}' if pattern else raw
+
+        return re.compile(pattern)
+
+    def matches(self, text):
+        """Sprawdza znormalizowany tekst (normalize_for_filter)"""
+        # Większość tytułów nie pasuje do niczego - jedno wyszukanie bez iteratora
+        if self.matcher.search(text) is None:
+            return False
+
+        for match in self.matcher.finditer(text):
+            kind = match.lastgroup
+            if kind == 'allow':
+                continue
+            # Same gwiazdki ('****', 's***') to nie słowo - potrzebne co najmniej dwie litery
+            if kind == 'deny' and len(match.group()) - match.group().count(MASK) < 2:
+                continue
+            return True
+        return False
+
+    def stats(self):
+        return {
+            'words': len(self.words),
+            'prefixes': len(self.prefixes),
+            'allowed': len(self.allowed) + len(self.allowed_prefixes),
+            'patterns': len(self.patterns),
+            'source': self.source,
+            'loaded_at': self.loaded_at
+        }
+
+# Aktywne reguły - podmiana referencji jest atomowa, trwające sprawdzenia używają starych
+_rules = None
+
+def load_filter_rules(path):
+    """
+    Wczytuje reguły z pliku i ustawia je jako aktywne (wywoływane w create_app).
+
+    Raises:
+        ValueError: Brak pliku lub nieprawidłowe reguły
+    """
+    global _rules
+
+    try:
+        rules = FilterRules.from_file(path)
+    except OSError as e:
+        raise ValueError(f'Nie można wczytać reguł filtra {path}: {e}')
+
+    _rules = rules
+    return rules
+
+def set_filter_rules(rules):
+    """Ustawia aktywne reguły (np. zbudowane w kodzie: FilterRules(words=[...]))"""
+    global _rules
+    _rules = rules
+
+def get_filter_rules():
+    """Aktywne reguły filtra (None przed wczytaniem)"""
+    return _rules
 
 def contains_vulgar_words(text):
     """
     Sprawdza czy tekst zawiera wulgaryzmy.
-    
+
     Args:
         text: Tekst do sprawdzenia
-    
+
     Returns:
         True jeśli znaleziono wulgaryzmy, False w przeciwnym razie
     """
     if not text:
         return False
-    
-    # Zamień na małe litery dla porównania
-    text_lower = text.lower()
-    
-    # Sprawdź każde słowo z listy
-    for word in VULGAR_WORDS:
-        # Sprawdź czy słowo występuje jako całe słowo (nie część innego słowa)
-        # Używamy word boundaries (\b) w regex
-        import re
-        pattern = r'\b' + re.escape(word) + r'\b'
-        if re.search(pattern, text_lower):
-            return True
-    
-    return False
+
+    rules = _rules
+    if rules is None:
+        return False
+
+    # Jedno przejście po tekście zamiast osobnego regexa dla każdego słowa
+    return rules.matches(normalize_for_filter(text))
 
 def is_content_appropriate(artist, title):
     """
     Sprawdza czy treść (wykonawca i tytuł) jest odpowiednia.
-    
+
     Args:
         artist: Nazwa wykonawcy
         title: Tytuł piosenki
-    
+
     Returns:
         Tuple (is_ok: bool, reason: str)
         - is_ok: True jeśli treść jest OK, False jeśli nie
@@ -85,9 +323,119 @@ def is_content_appropriate(artist, title):
     # Sprawdź nazwę wykonawcy
     if contains_vulgar_words(artist):
         return False, "Wulgaryzmy w nazwie wykonawcy"
-    
+
     # Sprawdź tytuł
     if contains_vulgar_words(title):
         return False, "Wulgaryzmy w tytule piosenki"
-    
-    return True, "OK"
\ No newline at end of file
+
+    return True, "OK"
+
+def screen_submissions(pairs):
+    """
+    Sprawdza wiele par (wykonawca, tytuł) naraz.
+
+    Args:
+        pairs: Iterowalna kolekcja krotek (artist, title)
+
+    Returns:
+        Lista krotek (is_ok, reason) w tej samej kolejności co wejście
+    """
+    return [is_content_appropriate(artist, title) for artist, title in pairs]
+
+# Blokada tworzenia wątku przeładowania (jeden na proces)
+_watcher_lock = threading.Lock()
+
+def get_rules_watcher():
+    """Zwraca wątek przeładowujący reguły dla bieżącej aplikacji (uruchamiany przy pierwszym użyciu)"""
+    watcher = current_app.extensions.get('filter_rules_watcher')
+    if watcher is None:
+        with _watcher_lock:
+            watcher = current_app.extensions.get('filter_rules_watcher')
+            if watcher is None:
+                app = current_app._get_current_object()
+                watcher = RulesWatcher(
+                    app,
+                    app.config['FILTER_RULES_PATH'],
+                    interval=app.config['FILTER_RULES_RELOAD_INTERVAL']
+                )
+                watcher.start()
+                app.extensions['filter_rules_watcher'] = watcher
+    return watcher
+
+def ensure_rules_watcher():
+    """Uruchamia przeładowanie reguł w tle, jeśli jest włączone (FILTER_RULES_RELOAD_INTERVAL > 0)"""
+    if current_app.config['FILTER_RULES_RELOAD_INTERVAL'] > 0 and 'filter_rules_watcher' not in current_app.extensions:
+        get_rules_watcher()
+
+class RulesWatcher:
+    """Wątek przeładowujący reguły filtra po zmianie pliku"""
+
+    def __init__(self, app, path, interval=5):
+        """
+        Args:
+            app: Aplikacja Flask (logger)
+            path: Plik reguł
+            interval: Co ile sekund sprawdzać datę modyfikacji pliku
+        """
+        self.app = app
+        self.path = path
+        self.interval = interval
+
+        # Reguły wczytane w create_app - zmiany od tamtej chwili zostaną wykryte
+        active = get_filter_rules()
+        self._signature = active.signature if active is not None and active.source == path else None
+
+        self._stopping = threading.Event()
+        self._thread = None
+
+        self.reloads = 0
+        self.failures = 0
+
+    def start(self):
+        """Uruchamia wątek sprawdzający plik"""
+        self._thread = threading.Thread(target=self._run, name='filter-rules', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Zatrzymuje wątek"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """
+        Przeładowuje reguły, jeśli plik się zmienił.
+
+        Returns:
+            bool: True jeśli wczytano nowe reguły
+        """
+        signature = _file_signature(self.path)
+        if signature is None or signature == self._signature:
+            return False
+
+        try:
+            rules = FilterRules.from_file(self.path)
+        except (OSError, ValueError) as e:
+            self.failures += 1
+            self._signature = signature  # Ten sam błędny plik nie jest parsowany ponownie
+            self.app.logger.error(f"Nieprawidłowe reguły filtra w {self.path}, zostają poprzednie: {e}")
+            return False
+
+        # Plik zmienił się w trakcie czytania (zapis w toku) - spróbuj przy kolejnym sprawdzeniu
+        if _file_signature(self.path) != signature:
+            return False
+
+        set_filter_rules(rules)
+        self._signature = signature
+        self.reloads += 1
+
+        stats = rules.stats()
+        self.app.logger.info(
+            f"Przeładowano reguły filtra: {stats['words']} słów, {stats['prefixes']} prefiksów, "
+            f"{stats['allowed']} wyjątków, {stats['patterns']} wzorców"
+        )
+        return True
@@ -1,30 +1,37 @@
 import sqlite3
-from flask import g
+import threading
+import time
 from datetime import datetime, timedelta
 import os
+from app.config import Config
+from app.utils import song_fingerprint
+from app.metrics import DB_QUERY_SECONDS
 
-DATABASE_PATH = 'data/submissions.db'
+# Ścieżka do bazy - domyślnie z Config, nadpisywana w create_app()
+_database_path = Config.DATABASE_PATH
 
-def get_db():
-    """Pobiera połączenie z bazą danych"""
-    if 'db' not in g:
-        os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
-        g.db = sqlite3.connect(DATABASE_PATH)
-        g.db.row_factory = sqlite3.Row
-    return g.db
+# Ustawienia połączeń (patrz configure_database)
+_settings = {
+    'busy_timeout_ms': Config.SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': Config.SQLITE_MMAP_SIZE,
+    'cached_statements': Config.SQLITE_CACHED_STATEMENTS,
+    'instrument': Config.METRICS_ENABLED
+}
 
-def close_db(e=None):
-    """Zamyka połączenie z bazą danych"""
-    db = g.pop('db', None)
-    if db is not None:
-        db.close()
+# Jedno połączenie na wątek, otwierane i konfigurowane tylko raz
+_local = threading.local()
 
-def init_db():
-    """Inicjalizuje bazę danych"""
-    db = get_db()
-    cursor = db.cursor()
-    
-    cursor.execute('''
+# Licznik zapisanych kodów weryfikacyjnych (amortyzowane sprzątanie tabeli)
+_saved_codes = 0
+
+# Licznik zmian zgłoszeń w tym procesie (unieważnianie cache statystyk)
+_submissions_generation = 0
+
+# Migracje schematu: (wersja, lista kroków SQL lub funkcji przyjmujących kursor).
+# Wersja bazy jest trzymana w PRAGMA user_version.
+MIGRATIONS = [
+    (1, [
+        '''
         CREATE TABLE IF NOT EXISTS submissions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             email TEXT NOT NULL,
@@ -38,9 +45,8 @@ def init_db():
             submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             verified BOOLEAN DEFAULT 0
         )
-    ''')
-    
-    cursor.execute('''
+        ''',
+        '''
         CREATE TABLE IF NOT EXISTS verification_codes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             email TEXT NOT NULL,
@@ -49,62 +55,599 @@ def init_db():
             expires_at TIMESTAMP NOT NULL,
             used BOOLEAN DEFAULT 0
         )
-    ''')
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_email_hash ON submissions(email_hash)',
+        'CREATE INDEX IF NOT EXISTS idx_submitted_at ON submissions(submitted_at)'
+    ]),
+    (2, [
+        '''
+        CREATE TABLE IF NOT EXISTS search_cache (
+            query_key TEXT PRIMARY KEY,
+            track_json TEXT,
+            expires_at REAL NOT NULL
+        )
+        '''
+    ]),
+    (3, [
+        # Znacznik czasu jako epoch (UTC) - spójne porównania w limicie zgłoszeń
+        'ALTER TABLE submissions ADD COLUMN submitted_ts INTEGER',
+        "UPDATE submissions SET submitted_ts = CAST(strftime('%s', submitted_at) AS INTEGER)",
+        # Indeks pokrywający dla RATE_LIMIT_QUERY (zastępuje idx_email_hash)
+        'CREATE INDEX IF NOT EXISTS idx_rate_limit ON submissions(email_hash, status, submitted_ts)',
+        'DROP INDEX IF EXISTS idx_email_hash'
+    ]),
+    (4, [
+        '''
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            bucket_key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        '''
+    ]),
+    (5, [
+        # Dzienne liczniki zgłoszeń per status (dzień w czasie lokalnym szkoły)
+        '''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT OR REPLACE INTO daily_stats (day, status, count)
+        SELECT DATE(submitted_ts, 'unixepoch', 'localtime'), status, COUNT(*)
+        FROM submissions
+        GROUP BY 1, 2
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_submitted_ts ON submissions(submitted_ts)'
+    ]),
+    (6, [
+        # Stronicowanie panelu admina po (submitted_ts, id), także z filtrem statusu
+        'CREATE INDEX IF NOT EXISTS idx_status_submitted_ts ON submissions(status, submitted_ts)',
+        'DROP INDEX IF EXISTS idx_submitted_at'
+    ]),
+    (7, [
+        # Trwała kolejka emaili wysyłanych w tle
+        '''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN ('queued', 'sending', 'sent', 'failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            claimed_at REAL,
+            last_error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_outbox_due ON email_outbox(status, next_attempt_at)'
+    ]),
+    (8, [
+        # Wyszukiwanie kodu weryfikacyjnego bez skanowania całej tabeli
+        'CREATE INDEX IF NOT EXISTS idx_verification_lookup ON verification_codes(email, used, expires_at)',
+        "DELETE FROM verification_codes WHERE used = 1 OR expires_at <= DATETIME('now', 'localtime')"
+    ]),
+    (9, [
+        # Wykrywanie duplikatów: odcisk (wykonawca, tytuł) i ID utworu
+        'ALTER TABLE submissions ADD COLUMN fingerprint TEXT',
+        lambda cursor: _backfill_fingerprints(cursor),
+        'CREATE INDEX IF NOT EXISTS idx_fingerprint ON submissions(fingerprint, submitted_ts)',
+        'CREATE INDEX IF NOT EXISTS idx_spotify_track_id ON submissions(spotify_track_id, submitted_ts)'
+    ]),
+    (10, [
+        # Lokalna kopia playlisty docelowej (synchronizowana w tle po snapshot_id)
+        '''
+        CREATE TABLE IF NOT EXISTS playlist_tracks (
+            position INTEGER PRIMARY KEY,
+            track_id TEXT,
+            track_uri TEXT,
+            name TEXT,
+            artist TEXT,
+            duration_ms INTEGER,
+            added_at TEXT
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_playlist_track_id ON playlist_tracks(track_id)',
+        '''
+        CREATE TABLE IF NOT EXISTS playlist_state (
+            playlist_id TEXT PRIMARY KEY,
+            snapshot_id TEXT,
+            track_count INTEGER NOT NULL DEFAULT 0,
+            synced_at REAL,
+            sync_started_at REAL
+        )
+        '''
+    ]),
+    (11, [
+        # Mały stan współdzielony przez procesy (token Spotify) z dzierżawą odświeżania
+        '''
+        CREATE TABLE IF NOT EXISTS shared_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            lease_owner TEXT,
+            lease_expires_at REAL
+        )
+        '''
+    ]),
+    (12, [
+        # Długość utworu zapisywana przy akceptacji (plan emisji w przerwach)
+        'ALTER TABLE submissions ADD COLUMN duration_ms INTEGER',
+        # Kolejka emisji: zaakceptowane utwory przypisane do przerw (break_start/slot)
+        '''
+        CREATE TABLE IF NOT EXISTS broadcast_queue (
+            submission_id INTEGER PRIMARY KEY,
+            track_id TEXT NOT NULL,
+            track_uri TEXT NOT NULL,
+            artist TEXT,
+            duration_ms INTEGER NOT NULL,
+            submitted_ts INTEGER NOT NULL,
+            break_start INTEGER,
+            break_end INTEGER,
+            slot INTEGER,
+            status TEXT NOT NULL DEFAULT 'queued' CHECK(status IN ('queued', 'aired'))
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_broadcast_plan ON broadcast_queue(status, break_start, slot)'
+    ]),
+    (13, [
+        # Kiedy kolejka zgłoszeń ostatnio przejęła zgłoszenie 'pending' (porzucone wracają do kolejki)
+        'ALTER TABLE submissions ADD COLUMN claimed_at REAL'
+    ]),
+    (14, [
+        # Treść wysłanych emaili (kod weryfikacyjny jawnym tekstem) nie jest dłużej przechowywana
+        "UPDATE email_outbox SET body = '' WHERE status IN ('sent', 'failed')"
+    ])
+]
+
+# Zapytanie limitu zgłoszeń - obsługiwane w całości przez indeks idx_rate_limit
+RATE_LIMIT_QUERY = '''
+    SELECT COUNT(*) FROM submissions
+    WHERE email_hash = ? AND status IN ('approved', 'pending') AND submitted_ts >= ?
+'''
+
+def _backfill_fingerprints(cursor):
+    """Uzupełnia odciski piosenek dla istniejących zgłoszeń (migracja 9)"""
+    cursor.execute('SELECT id, artist, title FROM submissions WHERE fingerprint IS NULL')
+    updates = [(song_fingerprint(row['artist'], row['title']), row['id']) for row in cursor.fetchall()]
     
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_email_hash ON submissions(email_hash)
-    ''')
+    cursor.executemany('UPDATE submissions SET fingerprint = ? WHERE id = ?', updates)
+
+def configure_database(path=None, busy_timeout_ms=None, mmap_size=None, cached_statements=None, instrument=None):
+    """Ustawia ścieżkę i parametry połączeń (wywoływane w create_app)"""
+    global _database_path
+
+    if path is not None:
+        _database_path = path
+    if busy_timeout_ms is not None:
+        _settings['busy_timeout_ms'] = busy_timeout_ms
+    if mmap_size is not None:
+        _settings['mmap_size'] = mmap_size
+    if cached_statements is not None:
+        _settings['cached_statements'] = cached_statements
+    if instrument is not None:
+        _settings['instrument'] = instrument
+
+def _query_operation(sql):
+    """Rodzaj zapytania (SELECT, INSERT, ...) - etykieta metryki o małej liczności"""
+    words = sql.split(None, 1)
+    return words[0].upper() if words else ''
+
+class _TimedCursor(sqlite3.Cursor):
+    """Kursor mierzący czas execute/executemany (metryka radio_db_query_duration_seconds)"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, _query_operation(sql))
+
+    def executemany(self, sql, seq_of_parameters):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, _query_operation(sql))
+
+class _TimedConnection(sqlite3.Connection):
+    """Połączenie, którego kursory (także z conn.execute) mierzą czas zapytań"""
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def open_connection(path=None):
+    """
+    Otwiera nowe, skonfigurowane połączenie z bazą danych.
+
+    WAL pozwala na równoległe odczyty podczas zapisu, synchronous=NORMAL
+    jest bezpieczne w trybie WAL, a busy_timeout sprawia, że konkurencyjni
+    zapisujący czekają zamiast dostawać 'database is locked'.
+    """
+    path = path or _database_path
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    db = sqlite3.connect(
+        path,
+        timeout=_settings['busy_timeout_ms'] / 1000,
+        cached_statements=_settings['cached_statements'],
+        factory=_TimedConnection if _settings['instrument'] else sqlite3.Connection
+    )
+    db.row_factory = sqlite3.Row
+
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute(f"PRAGMA busy_timeout={int(_settings['busy_timeout_ms'])}")
+    db.execute(f"PRAGMA mmap_size={int(_settings['mmap_size'])}")
+    db.execute('PRAGMA temp_store=MEMORY')
+
+    return db
+
+def get_db():
+    """Pobiera połączenie z bazą danych (jedno na wątek, wielokrotnego użytku)"""
+    db = getattr(_local, 'db', None)
+
+    # Nowe połączenie po fork() (np. gunicorn --preload) lub zmianie ścieżki bazy
+    if db is not None and (_local.pid != os.getpid() or _local.path != _database_path):
+        if _local.pid == os.getpid():
+            db.close()
+        db = None
+
+    if db is None:
+        db = open_connection()
+        _local.db = db
+        _local.pid = os.getpid()
+        _local.path = _database_path
+
+    return db
+
+def close_db(e=None):
+    """
+    Kończy pracę z bazą na koniec requestu.
+
+    Połączenie zostaje otwarte dla kolejnych requestów tego wątku -
+    wycofujemy tylko niezatwierdzoną transakcję (np. po wyjątku).
+    """
+    db = getattr(_local, 'db', None)
+    if db is not None and _local.pid == os.getpid() and db.in_transaction:
+        db.rollback()
+
+def init_db():
+    """Inicjalizuje bazę danych i wykonuje brakujące migracje schematu"""
+    db = get_db()
+    current_version = db.execute('PRAGMA user_version').fetchone()[0]
+
+    if current_version >= MIGRATIONS[-1][0]:
+        return
+
+    # BEGIN IMMEDIATE - tylko jeden proces (worker) wykonuje migracje naraz
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        cursor = db.cursor()
+        current_version = cursor.execute('PRAGMA user_version').fetchone()[0]
+
+        for version, steps in MIGRATIONS:
+            if version <= current_version:
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+
+            cursor.execute(f'PRAGMA user_version = {version}')
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def submissions_generation():
+    """Zwraca licznik zmian zgłoszeń wykonanych przez ten proces"""
+    return _submissions_generation
+
+def _local_day(ts):
+    """Dzień (czas lokalny) dla znacznika epoch - klucz tabeli daily_stats"""
+    return time.strftime('%Y-%m-%d', time.localtime(ts))
+
+def _bump_daily_stats(cursor, ts, status, delta):
+    """Zmienia licznik dzienny dla statusu (w ramach bieżącej transakcji)"""
+    global _submissions_generation
     
     cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_submitted_at ON submissions(submitted_at)
-    ''')
+        INSERT INTO daily_stats (day, status, count) VALUES (?, ?, ?)
+        ON CONFLICT(day, status) DO UPDATE SET count = count + excluded.count
+    ''', (_local_day(ts), status, delta))
     
-    db.commit()
+    _submissions_generation += 1
 
 def save_submission(email, email_hash, artist, title, spotify_track_id, 
-                   spotify_track_uri, status, rejection_reason=None):
-    """Zapisuje zgłoszenie do bazy"""
+                   spotify_track_uri, status, rejection_reason=None, fingerprint=None, duration_ms=None):
+    """Zapisuje zgłoszenie do bazy (i aktualizuje dzienne statystyki)"""
     db = get_db()
     cursor = db.cursor()
+    submitted_ts = int(time.time())
     
     cursor.execute('''
         INSERT INTO submissions 
-        (email, email_hash, artist, title, spotify_track_id, spotify_track_uri, status, rejection_reason, verified)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1)
-    ''', (email, email_hash, artist, title, spotify_track_id, spotify_track_uri, status, rejection_reason))
+        (email, email_hash, artist, title, spotify_track_id, spotify_track_uri, status, rejection_reason, verified,
+         submitted_ts, fingerprint, duration_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+    ''', (email, email_hash, artist, title, spotify_track_id, spotify_track_uri, status, rejection_reason,
+          submitted_ts, fingerprint or song_fingerprint(artist, title), duration_ms))
+    submission_id = cursor.lastrowid
+    
+    _bump_daily_stats(cursor, submitted_ts, status, 1)
     
     db.commit()
-    return cursor.lastrowid
+    return submission_id
 
-def count_user_submissions_in_period(email_hash, days=2):
-    """Liczy zgłoszenia użytkownika w ostatnich N dniach"""
+def get_cached_search(query_key, now):
+    """Pobiera nieprzeterminowany wynik wyszukiwania z cache - (track_json, expires_at) lub None"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT track_json, expires_at FROM search_cache
+        WHERE query_key = ? AND expires_at > ?
+    ''', (query_key, now))
+    
+    row = cursor.fetchone()
+    return (row['track_json'], row['expires_at']) if row else None
+
+def save_cached_search(query_key, track_json, expires_at, purge_before=None):
+    """Zapisuje wynik wyszukiwania do cache (opcjonalnie usuwa przeterminowane wpisy)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        INSERT OR REPLACE INTO search_cache (query_key, track_json, expires_at)
+        VALUES (?, ?, ?)
+    ''', (query_key, track_json, expires_at))
+    
+    if purge_before is not None:
+        cursor.execute('''
+            DELETE FROM search_cache WHERE expires_at <= ?
+        ''', (purge_before,))
+    
+    db.commit()
+
+def consume_rate_bucket(bucket_key, capacity, rate, cost, now):
+    """
+    Pobiera tokeny z kubełka w tabeli rate_buckets (atomowo, BEGIN IMMEDIATE).
+    
+    Returns:
+        0 jeśli tokeny pobrano, w przeciwnym razie liczba sekund do odczekania
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('''
+            SELECT tokens, updated_at FROM rate_buckets WHERE bucket_key = ?
+        ''', (bucket_key,))
+        row = cursor.fetchone()
+        
+        tokens = capacity
+        if row:
+            tokens = min(capacity, row['tokens'] + max(0.0, now - row['updated_at']) * rate)
+        
+        if tokens >= cost:
+            tokens -= cost
+            retry_after = 0
+        else:
+            retry_after = (cost - tokens) / rate
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO rate_buckets (bucket_key, tokens, updated_at)
+            VALUES (?, ?, ?)
+        ''', (bucket_key, tokens, now))
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    return retry_after
+
+def purge_rate_buckets(prefix, idle_before):
+    """Usuwa kubełki bezczynne od idle_before (i tak są już pełne)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        DELETE FROM rate_buckets
+        WHERE bucket_key >= ? AND bucket_key < ? AND updated_at < ?
+    ''', (prefix, prefix + '\uffff', idle_before))
+    
+    db.commit()
+
+def get_submission(submission_id):
+    """Pobiera pojedyncze zgłoszenie po ID"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT * FROM submissions WHERE id = ?
+    ''', (submission_id,))
+    
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+def update_submission(submission_id, status, rejection_reason=None, artist=None, title=None,
+                      spotify_track_id=None, spotify_track_uri=None, duration_ms=None):
+    """Aktualizuje status zgłoszenia (np. po przetworzeniu zgłoszenia 'pending')"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    # BEGIN IMMEDIATE - odczyt starego statusu i zapis w jednej transakcji
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('''
+            SELECT status, submitted_ts FROM submissions WHERE id = ?
+        ''', (submission_id,))
+        previous = cursor.fetchone()
+        
+        cursor.execute('''
+            UPDATE submissions
+            SET status = ?,
+                rejection_reason = ?,
+                artist = COALESCE(?, artist),
+                title = COALESCE(?, title),
+                spotify_track_id = COALESCE(?, spotify_track_id),
+                spotify_track_uri = COALESCE(?, spotify_track_uri),
+                duration_ms = COALESCE(?, duration_ms)
+            WHERE id = ?
+        ''', (status, rejection_reason, artist, title, spotify_track_id, spotify_track_uri, duration_ms,
+              submission_id))
+        
+        if previous and previous['status'] != status:
+            _bump_daily_stats(cursor, previous['submitted_ts'], previous['status'], -1)
+            _bump_daily_stats(cursor, previous['submitted_ts'], status, 1)
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def claim_stale_pending(stale_before, now=None, limit=100):
+    """
+    Rezerwuje zgłoszenia 'pending' porzucone przez kolejkę (np. po restarcie procesu).
+    
+    Zgłoszenie jest porzucone, jeśli zostało zapisane i ostatnio przejęte
+    (claimed_at) przed stale_before. Zarezerwowane dostają claimed_at = now,
+    więc inne procesy ich nie wezmą.
+    
+    Returns:
+        Lista ID zarezerwowanych zgłoszeń (od najstarszego)
+    """
     db = get_db()
     cursor = db.cursor()
+    now = time.time() if now is None else now
     
-    period_start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    # BEGIN IMMEDIATE - kilka procesów nie zarezerwuje tego samego zgłoszenia
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.execute('''
+            SELECT id FROM submissions
+            WHERE status = 'pending' AND submitted_ts < ? AND (claimed_at IS NULL OR claimed_at < ?)
+            ORDER BY submitted_ts
+            LIMIT ?
+        ''', (stale_before, stale_before, limit))
+        ids = [row['id'] for row in cursor.fetchall()]
+        
+        cursor.executemany('''
+            UPDATE submissions SET claimed_at = ? WHERE id = ?
+        ''', [(now, submission_id) for submission_id in ids])
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    return ids
+
+def claim_submission(submission_id, now=None):
+    """Odnawia rezerwację zgłoszenia 'pending' (kolejka nadal się nim zajmuje)"""
+    db = get_db()
+    cursor = db.cursor()
     
     cursor.execute('''
-        SELECT COUNT(*) FROM submissions
-        WHERE email_hash = ? AND submitted_at >= ? AND status = 'approved'
-    ''', (email_hash, period_start))
+        UPDATE submissions SET claimed_at = ? WHERE id = ? AND status = 'pending'
+    ''', (time.time() if now is None else now, submission_id))
+    
+    db.commit()
+
+def count_user_submissions_in_period(email_hash, days=2):
+    """Liczy zgłoszenia użytkownika w ostatnich N dniach (zaakceptowane i w trakcie przetwarzania)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    period_start = int(time.time()) - days * 86400
+    
+    cursor.execute(RATE_LIMIT_QUERY, (email_hash, period_start))
     
     return cursor.fetchone()[0]
 
-def get_submissions_today():
-    """Pobiera wszystkie zgłoszenia z dzisiaj"""
+def _today_start_ts():
+    """Znacznik epoch lokalnej północy dzisiejszego dnia"""
+    now = time.localtime()
+    return int(time.mktime((now.tm_year, now.tm_mon, now.tm_mday, 0, 0, 0, 0, 0, -1)))
+
+def has_recent_submission(since_ts, fingerprint=None, spotify_track_id=None):
+    """Sprawdza czy piosenka (odcisk lub ID utworu) została zaakceptowana lub czeka na dodanie od since_ts"""
     db = get_db()
     cursor = db.cursor()
     
-    today = datetime.now().strftime('%Y-%m-%d')
+    column, value = ('fingerprint', fingerprint) if fingerprint else ('spotify_track_id', spotify_track_id)
+    cursor.execute(f'''
+        SELECT 1 FROM submissions
+        WHERE {column} = ? AND submitted_ts >= ? AND status IN ('approved', 'pending')
+        LIMIT 1
+    ''', (value, since_ts))
+    
+    return cursor.fetchone() is not None
+
+def find_known_track(fingerprint):
+    """Pobiera najnowsze zgłoszenie z tym odciskiem, dla którego znamy utwór na Spotify"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT artist, title, spotify_track_id, spotify_track_uri, duration_ms, status, rejection_reason
+        FROM submissions
+        WHERE fingerprint = ? AND spotify_track_id IS NOT NULL
+        ORDER BY submitted_ts DESC
+        LIMIT 1
+    ''', (fingerprint,))
+    
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+def get_submissions_today():
+    """Pobiera wszystkie zgłoszenia z dzisiaj (zapytanie zakresowe po idx_submitted_ts)"""
+    db = get_db()
+    cursor = db.cursor()
     
     cursor.execute('''
         SELECT * FROM submissions
-        WHERE DATE(submitted_at) = ?
-        ORDER BY submitted_at DESC
-    ''', (today,))
+        WHERE submitted_ts >= ?
+        ORDER BY submitted_ts DESC
+    ''', (_today_start_ts(),))
     
     return [dict(row) for row in cursor.fetchall()]
 
+def get_daily_stats(day=None):
+    """
+    Pobiera liczniki zgłoszeń dla dnia (domyślnie dzisiaj).
+    
+    Returns:
+        dict: status -> liczba zgłoszeń
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT status, count FROM daily_stats WHERE day = ?
+    ''', (day or _local_day(time.time()),))
+    
+    return {row['status']: row['count'] for row in cursor.fetchall()}
+
 def get_all_submissions(limit=100):
     """Pobiera wszystkie zgłoszenia (dla panelu admin)"""
     db = get_db()
@@ -112,50 +655,618 @@ def get_all_submissions(limit=100):
     
     cursor.execute('''
         SELECT * FROM submissions
-        ORDER BY submitted_at DESC
+        ORDER BY submitted_ts DESC, id DESC
         LIMIT ?
     ''', (limit,))
     
     return [dict(row) for row in cursor.fetchall()]
 
-def save_verification_code(email, code, expires_minutes=10):
-    """Zapisuje kod weryfikacyjny"""
+def _submission_filters(date_from_ts=None, date_to_ts=None, artist=None, status=None):
+    """Buduje warunki WHERE dla filtrów panelu admina"""
+    conditions = []
+    params = []
+    
+    if status:
+        conditions.append('status = ?')
+        params.append(status)
+    if date_from_ts is not None:
+        conditions.append('submitted_ts >= ?')
+        params.append(date_from_ts)
+    if date_to_ts is not None:
+        conditions.append('submitted_ts < ?')
+        params.append(date_to_ts)
+    if artist:
+        escaped = artist.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        conditions.append("artist LIKE ? ESCAPE '\\'")
+        params.append(f'%{escaped}%')
+    
+    return conditions, params
+
+def get_submissions_page(status=None, date_from_ts=None, date_to_ts=None, artist=None,
+                         after=None, limit=50):
+    """
+    Pobiera stronę zgłoszeń (keyset pagination po (submitted_ts, id), od najnowszych).
+    
+    Args:
+        after: Krotka (submitted_ts, id) ostatniego wiersza poprzedniej strony
+        limit: Rozmiar strony
+    
+    Returns:
+        Tuple (lista zgłoszeń, klucz następnej strony lub None)
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    conditions, params = _submission_filters(date_from_ts, date_to_ts, artist, status)
+    if after is not None:
+        conditions.append('(submitted_ts, id) < (?, ?)')
+        params.extend(after)
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    cursor.execute(f'''
+        SELECT id, artist, title, spotify_track_id, status, rejection_reason, submitted_at, submitted_ts
+        FROM submissions
+        {where}
+        ORDER BY submitted_ts DESC, id DESC
+        LIMIT ?
+    ''', (*params, limit + 1))
+    
+    rows = [dict(row) for row in cursor.fetchall()]
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    return rows, (rows[-1]['submitted_ts'], rows[-1]['id'])
+
+# Kolumny eksportu historii zgłoszeń (bez adresów email)
+EXPORT_COLUMNS = ('id', 'submitted_at', 'submitted_ts', 'artist', 'title', 'status',
+                  'rejection_reason', 'spotify_track_id', 'spotify_track_uri')
+
+def iter_submissions(status=None, date_from_ts=None, date_to_ts=None, batch_size=500):
+    """
+    Generator zgłoszeń do eksportu (od najstarszych), pobieranych paczkami fetchmany.
+    
+    Używa osobnego połączenia, więc długi eksport nie blokuje połączenia
+    wątku. Cały eksport widzi jeden spójny stan bazy (transakcja odczytu
+    w trybie WAL nie blokuje zapisów). Połączenie jest zamykane także wtedy,
+    gdy generator zostanie porzucony (np. klient przerwał pobieranie).
+    
+    Yields:
+        Listy krotek z wartościami EXPORT_COLUMNS (maks. batch_size wierszy)
+    """
+    conditions, params = _submission_filters(date_from_ts, date_to_ts, status=status)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    db = open_connection()
+    try:
+        db.row_factory = None
+        cursor = db.execute(f'''
+            SELECT {', '.join(EXPORT_COLUMNS)}
+            FROM submissions
+            {where}
+            ORDER BY submitted_ts, id
+        ''', params)
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        db.close()
+
+def count_submissions_by_status(date_from_ts=None, date_to_ts=None, artist=None):
+    """
+    Liczy zgłoszenia per status dla filtrów panelu admina.
+    
+    Bez filtra wykonawcy korzysta z tabeli daily_stats (bez skanowania zgłoszeń).
+    
+    Returns:
+        dict: status -> liczba zgłoszeń
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    if not artist:
+        conditions = []
+        params = []
+        if date_from_ts is not None:
+            conditions.append('day >= ?')
+            params.append(_local_day(date_from_ts))
+        if date_to_ts is not None:
+            conditions.append('day < ?')
+            params.append(_local_day(date_to_ts))
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        cursor.execute(f'''
+            SELECT status, SUM(count) AS count FROM daily_stats
+            {where}
+            GROUP BY status
+        ''', params)
+    else:
+        conditions, params = _submission_filters(date_from_ts, date_to_ts, artist)
+        cursor.execute(f'''
+            SELECT status, COUNT(*) AS count FROM submissions
+            WHERE {' AND '.join(conditions)}
+            GROUP BY status
+        ''', params)
+    
+    return {row['status']: row['count'] for row in cursor.fetchall()}
+
+def save_verification_code(email, code, expires_minutes=10, max_per_email=3, purge_every=100):
+    """
+    Zapisuje kod weryfikacyjny.
+    
+    Zostawia tylko max_per_email najnowszych kodów dla adresu, a co
+    purge_every zapisów usuwa z tabeli kody użyte i wygasłe.
+    """
+    global _saved_codes
+    
     db = get_db()
     cursor = db.cursor()
     
-    expires_at = (datetime.now() + timedelta(minutes=expires_minutes)).strftime('%Y-%m-%d %H:%M:%S')
+    now = datetime.now()
+    expires_at = (now + timedelta(minutes=expires_minutes)).strftime('%Y-%m-%d %H:%M:%S')
     
     cursor.execute('''
         INSERT INTO verification_codes (email, code, expires_at)
         VALUES (?, ?, ?)
     ''', (email, code, expires_at))
     
+    cursor.execute('''
+        DELETE FROM verification_codes
+        WHERE email = ? AND id NOT IN (
+            SELECT id FROM verification_codes WHERE email = ? ORDER BY id DESC LIMIT ?
+        )
+    ''', (email, email, max_per_email))
+    
+    _saved_codes += 1
+    if purge_every and _saved_codes % purge_every == 0:
+        purge_verification_codes(cursor, now)
+    
     db.commit()
 
+def purge_verification_codes(cursor, now=None):
+    """Usuwa kody użyte i wygasłe (w ramach bieżącej transakcji)"""
+    now = (now or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+    
+    cursor.execute('''
+        DELETE FROM verification_codes WHERE used = 1 OR expires_at <= ?
+    ''', (now,))
+
 def verify_code(email, code):
-    """Weryfikuje kod"""
+    """Weryfikuje kod (i oznacza go jako użyty jednym, atomowym zapytaniem)"""
     db = get_db()
     cursor = db.cursor()
     
     now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     cursor.execute('''
-        SELECT * FROM verification_codes
-        WHERE email = ? AND code = ? AND expires_at > ? AND used = 0
-        ORDER BY created_at DESC
-        LIMIT 1
-    ''', (email, code, now))
+        UPDATE verification_codes
+        SET used = 1
+        WHERE id = (
+            SELECT id FROM verification_codes
+            WHERE email = ? AND used = 0 AND expires_at > ? AND code = ?
+            ORDER BY id DESC
+            LIMIT 1
+        )
+    ''', (email, now, code))
+    
+    db.commit()
+    return cursor.rowcount == 1
+
+def enqueue_email(recipient, subject, body):
+    """Dodaje email do kolejki wysyłki (tabela email_outbox)"""
+    db = get_db()
+    cursor = db.cursor()
     
-    result = cursor.fetchone()
+    cursor.execute('''
+        INSERT INTO email_outbox (recipient, subject, body, next_attempt_at)
+        VALUES (?, ?, ?, ?)
+    ''', (recipient, subject, body, time.time()))
+    
+    db.commit()
+    return cursor.lastrowid
+
+def claim_due_emails(limit=20, stale_after=300):
+    """
+    Rezerwuje emaile gotowe do wysyłki (status 'queued' -> 'sending').
+    
+    Emaile zarezerwowane dawniej niż stale_after sekund temu (np. po awarii
+    procesu) wracają do kolejki.
     
-    if result:
-        # Oznacz kod jako użyty
+    Returns:
+        Lista zarezerwowanych emaili (dict)
+    """
+    db = get_db()
+    cursor = db.cursor()
+    now = time.time()
+    
+    # BEGIN IMMEDIATE - kilka procesów nie zarezerwuje tego samego emaila
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
         cursor.execute('''
-            UPDATE verification_codes
-            SET used = 1
-            WHERE id = ?
-        ''', (result['id'],))
+            UPDATE email_outbox
+            SET status = 'queued'
+            WHERE status = 'sending' AND claimed_at < ?
+        ''', (now - stale_after,))
+        
+        cursor.execute('''
+            SELECT * FROM email_outbox
+            WHERE status = 'queued' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at
+            LIMIT ?
+        ''', (now, limit))
+        rows = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.executemany('''
+            UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = ?
+        ''', [(now, row['id']) for row in rows])
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    return rows
+
+def mark_email_sent(email_id):
+    """Oznacza email jako wysłany (treść z kodem jest usuwana)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        UPDATE email_outbox
+        SET status = 'sent', attempts = attempts + 1, last_error = NULL, body = ''
+        WHERE id = ?
+    ''', (email_id,))
+    
+    db.commit()
+
+def mark_email_failed(email_id, error, retry_at=None):
+    """Zapisuje nieudaną próbę wysyłki (retry_at=None - bez kolejnych prób, treść jest usuwana)"""
+    db = get_db()
+    cursor = db.cursor()
+    status = 'queued' if retry_at is not None else 'failed'
+    
+    cursor.execute('''
+        UPDATE email_outbox
+        SET status = ?, attempts = attempts + 1, last_error = ?, next_attempt_at = COALESCE(?, next_attempt_at),
+            body = CASE WHEN ? = 'failed' THEN '' ELSE body END
+        WHERE id = ?
+    ''', (status, error, retry_at, status, email_id))
+    
+    db.commit()
+
+def purge_email_outbox(expire_after, keep_for):
+    """
+    Porządkuje kolejkę emaili.
+    
+    Emaile czekające dłużej niż expire_after sekund (kod już wygasł) są
+    oznaczane jako 'failed' bez wysyłki, a wysłane i nieudane starsze niż
+    keep_for sekund - usuwane.
+    
+    Returns:
+        (liczba wygasłych, liczba usuniętych)
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    # created_at - CURRENT_TIMESTAMP (UTC), jak DATETIME('now')
+    cursor.execute('''
+        UPDATE email_outbox
+        SET status = 'failed', body = '', last_error = 'Kod wygasł przed wysłaniem'
+        WHERE status = 'queued' AND created_at < DATETIME('now', ?)
+    ''', (f'-{int(expire_after)} seconds',))
+    expired = cursor.rowcount
+    
+    cursor.execute('''
+        DELETE FROM email_outbox
+        WHERE status IN ('sent', 'failed') AND created_at < DATETIME('now', ?)
+    ''', (f'-{int(keep_for)} seconds',))
+    deleted = cursor.rowcount
+    
+    db.commit()
+    return expired, deleted
+
+def claim_playlist_sync(playlist_id, interval, now=None):
+    """
+    Rezerwuje synchronizację lustra playlisty (jeden proces na interval sekund).
+    
+    Returns:
+        bool: True jeśli ten proces powinien teraz zsynchronizować playlistę
+    """
+    db = get_db()
+    cursor = db.cursor()
+    now = now or time.time()
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO playlist_state (playlist_id) VALUES (?)
+    ''', (playlist_id,))
+    cursor.execute('''
+        UPDATE playlist_state SET sync_started_at = ?
+        WHERE playlist_id = ? AND (sync_started_at IS NULL OR sync_started_at <= ?)
+    ''', (now, playlist_id, now - interval))
+    
+    db.commit()
+    return cursor.rowcount == 1
+
+def get_playlist_state(playlist_id):
+    """Stan lustra playlisty (snapshot_id, liczba utworów, czas synchronizacji) lub None"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT playlist_id, snapshot_id, track_count, synced_at FROM playlist_state
+        WHERE playlist_id = ?
+    ''', (playlist_id,))
+    
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+def mark_playlist_synced(playlist_id, snapshot_id, now=None):
+    """Zapisuje sprawdzenie playlisty bez zmian (snapshot_id się nie zmienił)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        UPDATE playlist_state SET snapshot_id = ?, synced_at = ? WHERE playlist_id = ?
+    ''', (snapshot_id, now or time.time(), playlist_id))
+    
+    db.commit()
+
+def replace_playlist_tracks(playlist_id, snapshot_id, tracks, now=None):
+    """
+    Zastępuje zawartość lustra playlisty (jedna transakcja).
+    
+    Args:
+        tracks: Lista dict (track_id, track_uri, name, artist, duration_ms, added_at)
+            w kolejności na playliście
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        # Jedna playlista docelowa - dane poprzedniej (po zmianie konfiguracji) też są usuwane
+        cursor.execute('DELETE FROM playlist_tracks')
+        cursor.execute('DELETE FROM playlist_state WHERE playlist_id != ?', (playlist_id,))
+        cursor.executemany('''
+            INSERT INTO playlist_tracks (position, track_id, track_uri, name, artist, duration_ms, added_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (position, t['track_id'], t['track_uri'], t['name'], t['artist'], t['duration_ms'], t['added_at'])
+            for position, t in enumerate(tracks)
+        ])
+        cursor.execute('''
+            UPDATE playlist_state SET snapshot_id = ?, track_count = ?, synced_at = ?
+            WHERE playlist_id = ?
+        ''', (snapshot_id, len(tracks), now or time.time(), playlist_id))
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def append_playlist_tracks(playlist_id, tracks):
+    """
+    Dopisuje do lustra utwory dodane przez aplikację.
+    
+    snapshot_id zostaje bez zmian - następna synchronizacja i tak pobierze
+    playlistę (mogła się zmienić także poza aplikacją).
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        start = cursor.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM playlist_tracks').fetchone()[0]
+        cursor.executemany('''
+            INSERT INTO playlist_tracks (position, track_id, track_uri, name, artist, duration_ms, added_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (start + offset, t['track_id'], t['track_uri'], t['name'], t['artist'], t['duration_ms'], t['added_at'])
+            for offset, t in enumerate(tracks)
+        ])
+        cursor.execute('''
+            UPDATE playlist_state SET track_count = track_count + ? WHERE playlist_id = ?
+        ''', (len(tracks), playlist_id))
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+def find_playlist_track_ids(track_ids):
+    """Zwraca podzbiór podanych ID utworów, które są w lustrze playlisty"""
+    track_ids = list(track_ids)
+    if not track_ids:
+        return set()
+    
+    db = get_db()
+    cursor = db.cursor()
+    
+    placeholders = ','.join('?' * len(track_ids))
+    cursor.execute(f'''
+        SELECT DISTINCT track_id FROM playlist_tracks WHERE track_id IN ({placeholders})
+    ''', track_ids)
+    
+    return {row['track_id'] for row in cursor.fetchall()}
+
+def get_playlist_tracks_page(offset=0, limit=100):
+    """Pobiera stronę utworów z lustra playlisty (w kolejności na playliście; limit -1 - wszystkie)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT position, track_id, track_uri, name, artist, duration_ms, added_at
+        FROM playlist_tracks
+        ORDER BY position
+        LIMIT ? OFFSET ?
+    ''', (limit, offset))
+    
+    return [dict(row) for row in cursor.fetchall()]
+
+def get_shared_state(key):
+    """Wartość stanu współdzielonego (value, version, updated_at) lub None"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT value, version, updated_at FROM shared_state WHERE key = ? AND value IS NOT NULL
+    ''', (key,))
+    
+    row = cursor.fetchone()
+    return dict(row) if row else None
+
+def set_shared_state(key, value, now=None):
+    """Zapisuje wartość stanu współdzielonego (jedna instrukcja - atomowo względem innych procesów)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        INSERT INTO shared_state (key, value, version, updated_at) VALUES (?, ?, 1, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            value = excluded.value, version = version + 1, updated_at = excluded.updated_at
+    ''', (key, value, now or time.time()))
+    
+    db.commit()
+
+def acquire_state_lease(key, owner, ttl, now=None):
+    """
+    Dzierżawa na aktualizację stanu (np. odświeżenie tokenu) - jeden proces naraz.
+    
+    Dzierżawa wygasa po ttl sekundach, więc proces, który padł w trakcie,
+    nie blokuje innych na zawsze.
+    
+    Returns:
+        bool: True jeśli ten właściciel ma teraz dzierżawę
+    """
+    db = get_db()
+    cursor = db.cursor()
+    now = now or time.time()
+    
+    cursor.execute('''
+        INSERT OR IGNORE INTO shared_state (key) VALUES (?)
+    ''', (key,))
+    cursor.execute('''
+        UPDATE shared_state SET lease_owner = ?, lease_expires_at = ?
+        WHERE key = ? AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires_at <= ?)
+    ''', (owner, now + ttl, key, owner, now))
+    
+    db.commit()
+    return cursor.rowcount == 1
+
+def release_state_lease(key, owner):
+    """Zwalnia dzierżawę (tylko jeśli nadal należy do tego właściciela)"""
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        UPDATE shared_state SET lease_owner = NULL, lease_expires_at = NULL
+        WHERE key = ? AND lease_owner = ?
+    ''', (key, owner))
+    
+    db.commit()
+
+def get_broadcast_queue(aired_since=None):
+    """
+    Utwory czekające na emisję (zaplanowane w kolejności przerw i miejsc, potem niezaplanowane).
+    
+    Args:
+        aired_since: Dołącz też utwory wyemitowane w przerwach od tego czasu (kolumna status)
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT submission_id, track_id, track_uri, artist, duration_ms, submitted_ts, break_start, break_end, slot,
+               status
+        FROM broadcast_queue
+        WHERE status = 'queued' OR (status = 'aired' AND break_start >= ?)
+        ORDER BY break_start IS NULL, break_start, slot, submitted_ts
+    ''', (aired_since if aired_since is not None else float('inf'),))
+    
+    return [dict(row) for row in cursor.fetchall()]
+
+def find_unqueued_approved(since_ts):
+    """
+    Zaakceptowane od since_ts zgłoszenia, których nie ma jeszcze w kolejce emisji.
+    
+    Długość utworu jest brana ze zgłoszenia, a dla starszych zgłoszeń
+    (bez duration_ms) z lustra playlisty - None, jeśli nie jest jeszcze znana.
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('''
+        SELECT s.id AS submission_id, s.spotify_track_id AS track_id, s.spotify_track_uri AS track_uri,
+               s.artist, s.submitted_ts,
+               COALESCE(s.duration_ms, (
+                   SELECT p.duration_ms FROM playlist_tracks p
+                   WHERE p.track_id = s.spotify_track_id AND p.duration_ms IS NOT NULL
+                   LIMIT 1
+               )) AS duration_ms
+        FROM submissions s
+        WHERE s.status = 'approved' AND s.submitted_ts >= ? AND s.spotify_track_uri IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM broadcast_queue b WHERE b.submission_id = s.id)
+        ORDER BY s.submitted_ts, s.id
+    ''', (since_ts,))
+    
+    return [dict(row) for row in cursor.fetchall()]
+
+def save_broadcast_entries(entries):
+    """
+    Zapisuje utwory kolejki emisji z ich miejscem w planie (jedna transakcja).
+    
+    Args:
+        entries: Lista dict (submission_id, track_id, track_uri, artist, duration_ms,
+            submitted_ts, break_start, break_end, slot) - nowe utwory i wszystkie
+            utwory przerw, w których zmieniła się kolejność
+    """
+    db = get_db()
+    cursor = db.cursor()
+    
+    cursor.execute('BEGIN IMMEDIATE')
+    try:
+        cursor.executemany('''
+            INSERT INTO broadcast_queue
+            (submission_id, track_id, track_uri, artist, duration_ms, submitted_ts, break_start, break_end, slot)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(submission_id) DO UPDATE SET
+                break_start = excluded.break_start, break_end = excluded.break_end, slot = excluded.slot
+        ''', [
+            (e['submission_id'], e['track_id'], e['track_uri'], e['artist'], e['duration_ms'], e['submitted_ts'],
+             e['break_start'], e['break_end'], e['slot'])
+            for e in entries
+        ])
+        
         db.commit()
-        return True
+    except Exception:
+        db.rollback()
+        raise
+
+def mark_broadcast_aired(now=None, purge_before=None):
+    """
+    Oznacza utwory z zakończonych przerw jako wyemitowane (opcjonalnie usuwa stare wpisy kolejki).
+    
+    Returns:
+        int: Liczba utworów oznaczonych jako wyemitowane
+    """
+    db = get_db()
+    cursor = db.cursor()
     
-    return False
+    cursor.execute('''
+        UPDATE broadcast_queue SET status = 'aired'
+        WHERE status = 'queued' AND break_end <= ?
+    ''', (now or time.time(),))
+    aired = cursor.rowcount
+    
+    # Zgłoszenia starsze niż purge_before i tak nie wrócą do kolejki (find_unqueued_approved)
+    if purge_before is not None:
+        cursor.execute('''
+            DELETE FROM broadcast_queue WHERE submitted_ts < ?
+        ''', (purge_before,))
+    
+    db.commit()
+    return aired
@@ -0,0 +1,72 @@
+"""
+Wykrywanie powtórzonych zgłoszeń.
+
+Przed wyszukiwaniem na Spotify sprawdzamy odcisk piosenki (znormalizowany
+wykonawca i tytuł): niedawno dodane piosenki są odrzucane, a znane utwory
+akceptowane lub odrzucane lokalnie, bez zapytania do API. Po wyszukaniu
+utwór jest jeszcze sprawdzany w lustrze playlisty (app/playlist_mirror.py).
+"""
+
+import time
+from app.database import has_recent_submission, find_known_track
+from app.playlist_mirror import tracks_on_playlist
+
+DUPLICATE_REASON = 'Utwór był niedawno dodany do playlisty'
+EXPLICIT_REASON = 'Utwór zawiera treści explicit'
+
+def _window_start(window_days):
+    return int(time.time()) - window_days * 86400
+
+def check_known_song(fingerprint, window_days):
+    """
+    Sprawdza piosenkę na podstawie wcześniejszych zgłoszeń.
+
+    Args:
+        fingerprint: Odcisk piosenki (utils.song_fingerprint)
+        window_days: Okno (dni), w którym powtórzenie jest odrzucane (0 - wyłączone)
+
+    Returns:
+        Tuple (rejection_reason, track)
+        - rejection_reason: Powód odrzucenia lub None
+        - track: Znany utwór w formacie Spotify (lub None - trzeba wyszukać)
+    """
+    if window_days and has_recent_submission(_window_start(window_days), fingerprint=fingerprint):
+        return DUPLICATE_REASON, None
+
+    known = find_known_track(fingerprint)
+    if known is None:
+        return None, None
+
+    if known['status'] == 'rejected' and known['rejection_reason'] == EXPLICIT_REASON:
+        return EXPLICIT_REASON, None
+
+    if known['status'] == 'approved':
+        return None, local_track(known)
+
+    return None, None
+
+def is_recently_added(track_id, window_days):
+    """
+    Sprawdza czy utwór (ID Spotify) był dodany lub czeka na dodanie w ostatnich
+    window_days dniach albo czy nadal jest na playliście (także dodany poza aplikacją).
+    """
+    if not window_days:
+        return False
+
+    if has_recent_submission(_window_start(window_days), spotify_track_id=track_id):
+        return True
+
+    return bool(tracks_on_playlist([track_id]))
+
+def local_track(submission):
+    """Buduje obiekt utworu (w formacie zwracanym przez Spotify) z zapisanego zgłoszenia"""
+    return {
+        'id': submission['spotify_track_id'],
+        'uri': submission['spotify_track_uri'],
+        'name': submission['title'],
+        'artists': [{'name': submission['artist']}],
+        'album': {'name': '', 'images': []},
+        'external_urls': {'spotify': f"https://open.spotify.com/track/{submission['spotify_track_id']}"},
+        'duration_ms': submission['duration_ms'],
+        'explicit': False
+    }
@@ -1,25 +1,231 @@
 import random
+import smtplib
 import string
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
+from flask import current_app
+from app.database import enqueue_email, claim_due_emails, mark_email_sent, mark_email_failed, purge_email_outbox
+
+# Blokada tworzenia wątku wysyłającego (jeden na proces)
+_sender_lock = threading.Lock()
+
+# Co ile sekund porządkować tabelę email_outbox
+PURGE_INTERVAL = 60
 
 def generate_verification_code():
     """Generuje 6-cyfrowy kod weryfikacyjny"""
     return ''.join(random.choices(string.digits, k=6))
 
+def build_verification_email(code):
+    """Zwraca (temat, treść) emaila z kodem weryfikacyjnym"""
+    subject = 'Kod weryfikacyjny - Radiowęzeł ZSP Bytów'
+    body = (
+        f"Twój kod weryfikacyjny: {code}\n\n"
+        "Kod jest ważny przez 10 minut.\n\n"
+        "Jeśli to nie Ty prosiłeś o kod, zignoruj tę wiadomość."
+    )
+    return subject, body
+
 def send_verification_email(email, code):
     """
     Wysyła email z kodem weryfikacyjnym.
-    
-    W wersji deweloperskiej - wyświetla w konsoli.
-    W produkcji - użyj SMTP lub API (np. SendGrid, Mailgun).
+
+    Backend 'smtp' - email trafia do kolejki (tabela email_outbox), a wysyła
+    go wątek w tle, więc request nie czeka na serwer SMTP.
+    Backend 'console' (wersja deweloperska) - wyświetla w konsoli.
+    Backend 'null' - nic nie robi (testy, benchmarki).
     """
+    backend = current_app.config['EMAIL_BACKEND']
+    subject, body = build_verification_email(code)
+
+    if backend == 'smtp':
+        enqueue_email(email, subject, body)
+        get_email_sender().wake()
+        return True
+
+    if backend == 'null':
+        return True
+
     print("\n" + "="*60)
     print("📧 WYSŁANO EMAIL WERYFIKACYJNY")
     print("="*60)
     print(f"Do: {email}")
-    print(f"Temat: Kod weryfikacyjny - Radiowęzeł ZSP Bytów")
+    print(f"Temat: {subject}")
     print(f"\nTwój kod weryfikacyjny: {code}")
     print(f"\nKod jest ważny przez 10 minut.")
     print("="*60 + "\n")
-    
-    # TODO: W produkcji zamień na prawdziwe wysyłanie emaili
+
     return True
+
+def ensure_email_sender():
+    """Uruchamia wątek wysyłający przy backendzie 'smtp' (zaległe emaile z poprzedniego procesu)"""
+    if current_app.config['EMAIL_BACKEND'] == 'smtp' and 'email_sender' not in current_app.extensions:
+        get_email_sender()
+
+def get_email_sender():
+    """Zwraca wątek wysyłający emaile dla bieżącej aplikacji (uruchamiany przy pierwszym użyciu)"""
+    sender = current_app.extensions.get('email_sender')
+    if sender is None:
+        with _sender_lock:
+            sender = current_app.extensions.get('email_sender')
+            if sender is None:
+                app = current_app._get_current_object()
+                sender = EmailSender(app)
+                sender.start()
+                app.extensions['email_sender'] = sender
+    return sender
+
+class EmailSender:
+    """
+    Wątek wysyłający emaile z tabeli email_outbox.
+
+    Połączenie SMTP jest utrzymywane między wiadomościami i zamykane
+    dopiero po okresie bezczynności. Nieudane wysyłki są ponawiane
+    z wykładniczym opóźnieniem.
+    """
+
+    def __init__(self, app):
+        config = app.config
+
+        self.app = app
+        self.host = config['SMTP_SERVER']
+        self.port = config['SMTP_PORT']
+        self.username = config['SMTP_USERNAME']
+        self.password = config['SMTP_PASSWORD']
+        self.use_tls = config['SMTP_USE_TLS']
+        self.timeout = config['SMTP_TIMEOUT']
+        self.sender = formataddr((config['SMTP_FROM_NAME'], config['SMTP_FROM_EMAIL'] or config['SMTP_USERNAME']))
+        self.max_attempts = config['EMAIL_MAX_ATTEMPTS']
+        self.poll_interval = config['EMAIL_POLL_INTERVAL']
+        self.idle_timeout = config['SMTP_IDLE_TIMEOUT']
+        self.expire_after = config['EMAIL_EXPIRE_SECONDS']
+        self.keep_for = config['EMAIL_OUTBOX_RETENTION']
+
+        self._smtp = None
+        self._last_used = 0.0
+        self._purged_at = 0.0
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+        self.sent = 0
+        self.failed = 0
+
+    def start(self):
+        """Uruchamia wątek wysyłający"""
+        self._thread = threading.Thread(target=self._run, name='email-sender', daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """Budzi wątek po dodaniu emaila do kolejki"""
+        self._wake.set()
+
+    def stop(self, timeout=10):
+        """Wysyła zaległe emaile i zatrzymuje wątek"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        # Pierwszy przebieg od razu - emaile zostawione przez poprzedni proces
+        while True:
+            with self.app.app_context():
+                try:
+                    self._purge()
+                    self._drain()
+                except Exception as e:
+                    current_app.logger.error(f"Błąd wysyłki emaili: {e}")
+
+            if self._stopping:
+                self._disconnect()
+                return
+
+            # Zamknij nieużywane połączenie SMTP
+            if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                self._disconnect()
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _purge(self):
+        """Wygasza niewysłane emaile z nieważnym kodem i usuwa stare wpisy (co PURGE_INTERVAL s)"""
+        now = time.monotonic()
+        if now - self._purged_at < PURGE_INTERVAL:
+            return
+        self._purged_at = now
+
+        expired, deleted = purge_email_outbox(self.expire_after, self.keep_for)
+        if expired:
+            current_app.logger.warning(f"{expired} emaili z kodem nie zostało wysłanych przed jego wygaśnięciem")
+        if deleted:
+            current_app.logger.info(f"Usunięto {deleted} starych wpisów z kolejki emaili")
+
+    def _drain(self):
+        """Wysyła wszystkie emaile, których termin wysyłki minął"""
+        while True:
+            batch = claim_due_emails()
+            if not batch:
+                return
+
+            for message in batch:
+                self._deliver(message)
+
+    def _deliver(self, message):
+        """Wysyła jeden email (z jednym ponownym połączeniem przy zerwanym łączu)"""
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = message['recipient']
+        email['Subject'] = message['subject']
+        email.set_content(message['body'])
+
+        try:
+            try:
+                self._connection().send_message(email)
+            except smtplib.SMTPServerDisconnected:
+                self._disconnect()
+                self._connection().send_message(email)
+
+            self._last_used = time.monotonic()
+            mark_email_sent(message['id'])
+            self.sent += 1
+
+        except (smtplib.SMTPException, OSError) as e:
+            self._disconnect()
+            attempts = message['attempts'] + 1
+
+            if attempts >= self.max_attempts:
+                current_app.logger.error(f"Nie udało się wysłać emaila {message['id']}: {e}")
+                mark_email_failed(message['id'], str(e))
+                self.failed += 1
+            else:
+                # Backoff wykładniczy z losowym rozrzutem: ~2, 4, 8... sekund (maks. 5 minut)
+                delay = min(300, 2 ** attempts) * random.uniform(0.8, 1.2)
+                mark_email_failed(message['id'], str(e), retry_at=time.time() + delay)
+
+    def _connection(self):
+        """Zwraca otwarte połączenie SMTP (tworzy je w razie potrzeby)"""
+        if self._smtp is None:
+            if self.port == 465:
+                smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+            else:
+                smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                if self.use_tls:
+                    smtp.starttls()
+
+            if self.username:
+                smtp.login(self.username, self.password)
+
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self):
+        """Zamyka połączenie SMTP (ignoruje błędy zamykania)"""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
@@ -0,0 +1,110 @@
+"""
+Eksport historii zgłoszeń (CSV lub NDJSON) - endpoint panelu admina i komenda CLI.
+
+Wiersze są czytane z bazy paczkami (fetchmany) i od razu zamieniane na
+fragmenty pliku, opcjonalnie kompresowane gzipem w locie. W pamięci jest
+naraz tylko jedna paczka, niezależnie od rozmiaru tabeli.
+
+    flask --app wsgi export-submissions --format csv --from 2025-09-01 --gzip -o zgloszenia.csv.gz
+"""
+
+import csv
+import io
+import json
+import sys
+import zlib
+import click
+from flask.cli import with_appcontext
+from app.database import EXPORT_COLUMNS, iter_submissions
+from app.utils import parse_day
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson'
+}
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM - Excel rozpoznaje wtedy UTF-8 (polskie znaki)
+    buffer.write('﻿')
+    writer.writerow(EXPORT_COLUMNS)
+
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _ndjson_chunks(batches):
+    for rows in batches:
+        lines = (json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) for row in rows)
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+def gzip_chunks(chunks, level=6):
+    """Kompresuje strumień bajtów do formatu gzip bez buforowania całości"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_submissions(fmt='csv', status=None, date_from_ts=None, date_to_ts=None,
+                       compress=False, batch_size=500):
+    """
+    Generator fragmentów pliku eksportu.
+
+    Args:
+        fmt: 'csv' lub 'ndjson'
+        status: Filtr statusu (None - wszystkie)
+        date_from_ts, date_to_ts: Zakres dat (epoch, koniec wyłącznie)
+        compress: Kompresja gzip
+        batch_size: Liczba wierszy pobieranych z bazy naraz
+
+    Yields:
+        bytes
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Nieznany format: {fmt}')
+
+    batches = iter_submissions(status, date_from_ts, date_to_ts, batch_size)
+    chunks = _csv_chunks(batches) if fmt == 'csv' else _ndjson_chunks(batches)
+
+    return gzip_chunks(chunks) if compress else chunks
+
+@click.command('export-submissions')
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('--from', 'date_from', help='Pierwszy dzień (RRRR-MM-DD)')
+@click.option('--to', 'date_to', help='Ostatni dzień (RRRR-MM-DD, włącznie)')
+@click.option('--status', type=click.Choice(['approved', 'rejected', 'pending']))
+@click.option('--gzip', 'compress', is_flag=True, help='Kompresja gzip')
+@click.option('-o', '--output', type=click.Path(dir_okay=False, writable=True), help='Plik wynikowy (domyślnie stdout)')
+@with_appcontext
+def export_command(fmt, date_from, date_to, status, compress, output):
+    """Eksportuje historię zgłoszeń do CSV lub NDJSON."""
+    try:
+        date_from_ts = parse_day(date_from)
+        date_to_ts = parse_day(date_to, next_day=True)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    chunks = export_submissions(
+        fmt,
+        status=status,
+        date_from_ts=date_from_ts,
+        date_to_ts=date_to_ts,
+        compress=compress
+    )
+
+    stream = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
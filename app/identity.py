@@ -0,0 +1,62 @@
+"""
+Tożsamość zgłaszającego: domena szkolna, uprawnienia admina, hash emaila.
+
+Wszystko, co zależy tylko od konfiguracji, jest przygotowywane raz w create_app
+(Identity.from_config) i trzymane w app.extensions['identity'] - requesty nie
+przeszukują list, nie kompilują regexów i nie liczą ponownie hashy tych samych
+adresów.
+"""
+
+import functools
+import re
+from flask import current_app
+from app.utils import hash_email
+
+# Część adresu przed '@' (domena jest sprawdzana osobno, w zbiorze dozwolonych)
+_LOCAL_PART = re.compile(r'[a-z0-9._%+-]+')
+
+def get_identity():
+    """Zwraca reguły tożsamości bieżącej aplikacji"""
+    return current_app.extensions['identity']
+
+class Identity:
+    """Sprawdzenia tożsamości (niezmienne po utworzeniu, bezpieczne wątkowo)"""
+
+    def __init__(self, domains, admins=(), hash_cache_size=4096):
+        """
+        Args:
+            domains: Dozwolone domeny emaili (pierwsza jest podawana w komunikatach jako główna)
+            admins: Adresy adminów (bez limitu zgłoszeń)
+            hash_cache_size: Liczba zapamiętanych hashy emaili
+        """
+        self.domains = tuple(domain.strip().lower() for domain in domains if domain.strip())
+        if not self.domains:
+            raise ValueError('Brak dozwolonej domeny emaili (SCHOOL_EMAIL_DOMAIN)')
+
+        self._domain_set = frozenset(self.domains)
+        self.admins = frozenset(email.strip().lower() for email in admins if email.strip())
+        self.domain_message = f"Tylko emaile {' lub '.join('@' + domain for domain in self.domains)} są akceptowane"
+
+        # lru_cache jest bezpieczny wątkowo i ograniczony rozmiarem
+        self._hash = functools.lru_cache(maxsize=hash_cache_size)(hash_email)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['SCHOOL_EMAIL_DOMAINS'],
+            admins=config['ADMIN_EMAILS'],
+            hash_cache_size=config['EMAIL_HASH_CACHE_SIZE']
+        )
+
+    def is_school_email(self, email):
+        """Sprawdza czy email jest z jednej z dozwolonych domen szkolnych"""
+        local, _, domain = email.lower().rpartition('@')
+        return domain in self._domain_set and _LOCAL_PART.fullmatch(local) is not None
+
+    def is_admin(self, email):
+        """Sprawdza czy email jest na liście adminów"""
+        return email.lower() in self.admins
+
+    def hash_email(self, email):
+        """Hash emaila (SHA256) - zapamiętany dla ostatnio widzianych adresów"""
+        return self._hash(email.lower())
@@ -0,0 +1,116 @@
+"""
+Zamykanie aplikacji i sprawdzanie gotowości.
+
+Wątki w tle (kolejka zgłoszeń, writer playlisty, wysyłka emaili,
+synchronizacja lustra playlisty, przeładowanie reguł filtra, plan emisji) są
+zatrzymywane w ustalonej kolejności: kolejka zgłoszeń może jeszcze
+przekazać utwory do writera, a ten musi je zapisać przed końcem procesu.
+"""
+
+import atexit
+import threading
+import time
+from flask import current_app
+from app.database import get_db, MIGRATIONS
+from app.spotify_client import get_spotify_client
+
+_shutdown_lock = threading.Lock()
+
+def register_shutdown(app):
+    """Rejestruje zamknięcie aplikacji przy końcu procesu (wywoływane w create_app)"""
+    atexit.register(shutdown_app, app)
+
+def shutdown_app(app, timeout=30):
+    """
+    Przetwarza zaległe zadania i zatrzymuje wątki w tle.
+
+    timeout dotyczy całego zamknięcia - każdy etap dostaje czas, który
+    został z tego limitu (proces musi skończyć przed SIGKILL od gunicorna).
+
+    Bezpieczne do wielokrotnego wywołania (hook gunicorna worker_exit + atexit).
+    """
+    with _shutdown_lock:
+        if app.extensions.get('shutting_down'):
+            return
+        app.extensions['shutting_down'] = True
+
+    deadline = time.monotonic() + timeout
+
+    def remaining():
+        return max(0, deadline - time.monotonic())
+
+    with app.app_context():
+        # Plan emisji, synchronizacja lustra i przeładowanie reguł nie przekazują pracy dalej - zatrzymywane od razu
+        scheduler = app.extensions.get('broadcast_scheduler')
+        if scheduler is not None:
+            scheduler.stop(remaining())
+
+        mirror = app.extensions.get('playlist_mirror')
+        if mirror is not None:
+            mirror.stop(remaining())
+
+        watcher = app.extensions.get('filter_rules_watcher')
+        if watcher is not None:
+            watcher.stop(remaining())
+
+        # Kolejność ma znaczenie - każdy etap może dodać pracę następnemu
+        submission_queue = app.extensions.get('submission_queue')
+        if submission_queue is not None:
+            submission_queue.shutdown(remaining())
+
+        writer = app.extensions.get('playlist_writer')
+        if writer is not None:
+            writer.close(remaining())
+
+        sender = app.extensions.get('email_sender')
+        if sender is not None:
+            sender.stop(remaining())
+
+        if remaining() > 0:
+            app.logger.info("Zatrzymano wątki w tle")
+        else:
+            app.logger.warning(f"Zamykanie przekroczyło {timeout} s - część zadań w tle mogła nie zostać dokończona")
+
+def check_readiness():
+    """
+    Sprawdza, czy proces może przyjmować ruch.
+
+    Returns:
+        Tuple (ready, checks)
+        - ready: True jeśli baza i token Spotify są w porządku
+        - checks: Szczegóły poszczególnych sprawdzeń
+    """
+    checks = {}
+    ready = True
+
+    if current_app.extensions.get('shutting_down'):
+        checks['shutdown'] = 'in_progress'
+        ready = False
+
+    try:
+        db = get_db()
+        db.execute('SELECT 1').fetchone()
+        version = db.execute('PRAGMA user_version').fetchone()[0]
+        if version < MIGRATIONS[-1][0]:
+            checks['database'] = f'schema {version}/{MIGRATIONS[-1][0]}'
+            ready = False
+        else:
+            checks['database'] = 'ok'
+    except Exception as e:
+        current_app.logger.error(f"Readiness: błąd bazy danych: {e}")
+        checks['database'] = 'error'
+        ready = False
+
+    try:
+        spotify = get_spotify_client()
+        checks['spotify_token'] = spotify.token_state()
+        # Otwarty breaker nie wyklucza procesu - zgłoszenia czekają w kolejce
+        checks['spotify_breaker'] = spotify.calls.breaker.state
+        if checks['spotify_token'] == 'missing':
+            ready = False
+    except Exception as e:
+        current_app.logger.error(f"Readiness: błąd klienta Spotify: {e}")
+        checks['spotify_token'] = 'error'
+        ready = False
+
+    return ready, checks
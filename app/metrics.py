@@ -0,0 +1,178 @@
+"""
+Metryki aplikacji w formacie tekstowym Prometheus (endpoint /metrics).
+
+Prosta implementacja liczników i histogramów bez zewnętrznych zależności -
+zapis to jedna blokada i kilka operacji na liście. Metryki są liczone
+osobno w każdym procesie (przy kilku workerach każdy ma własne wartości,
+a Prometheus rozróżnia je etykietą instance).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Przedziały (sekundy) dla requestów, etapów zgłoszenia i wywołań Spotify
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Zapytania SQLite są zwykle o rzędy wielkości szybsze
+DB_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1)
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Licznik rosnący monotonicznie"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = sorted(self._values.items())
+
+        for labels, value in values:
+            yield f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+
+class Histogram:
+    """Histogram czasów (kumulatywne przedziały, suma i liczba obserwacji)"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+        # labels -> [liczniki przedziałów (+ przedział +Inf), suma]
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            data = self._values.get(labels)
+            if data is None:
+                data = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            data[0][index] += 1
+            data[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Mierzy czas wykonania bloku with"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def lines(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                yield f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}'
+
+            label_text = _format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_text} {_format_value(total)}'
+            yield f'{self.name}_count{label_text} {cumulative}'
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'radio_http_request_duration_seconds',
+    'Czas obsługi requestu HTTP',
+    ('endpoint', 'method', 'status')
+)
+
+SUBMIT_STAGE_SECONDS = Histogram(
+    'radio_submit_stage_duration_seconds',
+    'Czas etapów przetwarzania zgłoszenia',
+    ('stage',)
+)
+
+DB_QUERY_SECONDS = Histogram(
+    'radio_db_query_duration_seconds',
+    'Czas wykonania zapytań SQLite (execute, bez pobierania wierszy)',
+    ('operation',),
+    buckets=DB_BUCKETS
+)
+
+SPOTIFY_CALLS = Counter(
+    'radio_spotify_calls_total',
+    'Wywołania Spotify API według operacji i wyniku',
+    ('operation', 'outcome')
+)
+
+SPOTIFY_CALL_SECONDS = Histogram(
+    'radio_spotify_call_duration_seconds',
+    'Czas pojedynczej próby wywołania Spotify API',
+    ('operation',)
+)
+
+SPOTIFY_SEARCHES = Counter(
+    'radio_spotify_searches_total',
+    'Wyszukiwania utworów według zapytania, które dało wynik (strict, relaxed, not_found)',
+    ('result',)
+)
+
+def timed(stage):
+    """Mierzy czas etapu zgłoszenia: `with timed('spotify_search'): ...`"""
+    return SUBMIT_STAGE_SECONDS.time(stage)
+
+def render_metrics(extra=()):
+    """
+    Zwraca wszystkie metryki w formacie tekstowym Prometheus.
+
+    Args:
+        extra: Dodatkowe metryki odczytywane w chwili scrape'a - krotki
+            (nazwa, typ, opis, [(słownik etykiet, wartość), ...])
+    """
+    output = []
+
+    for metric in _registry:
+        output.append(f'# HELP {metric.name} {metric.documentation}')
+        output.append(f'# TYPE {metric.name} {metric.type}')
+        output.extend(metric.lines())
+
+    for name, metric_type, documentation, samples in extra:
+        output.append(f'# HELP {name} {documentation}')
+        output.append(f'# TYPE {name} {metric_type}')
+        for labels, value in samples:
+            output.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+
+    return '\n'.join(output) + '\n'
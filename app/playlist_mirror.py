@@ -0,0 +1,139 @@
+"""
+Lokalna kopia (lustro) playlisty docelowej w SQLite.
+
+Wątek w tle co PLAYLIST_SYNC_INTERVAL sekund pobiera snapshot_id playlisty
+(jedno lekkie wywołanie). Tylko gdy się zmienił - bo dodano utwory albo
+admin coś usunął w Spotify - pobierana jest cała playlista (strony po 100,
+tylko potrzebne pola) i zastępuje zawartość tabeli playlist_tracks.
+
+Sprawdzanie duplikatów, liczba utworów i widoki admina czytają lustro,
+bez wywołań API w wątkach requestów. Przy kilku workerach synchronizuje
+tylko jeden z nich naraz (rezerwacja w tabeli playlist_state).
+"""
+
+import threading
+from flask import current_app
+from app.database import (
+    claim_playlist_sync, find_playlist_track_ids, get_playlist_state, mark_playlist_synced,
+    replace_playlist_tracks
+)
+from app.spotify_client import get_spotify_client
+
+# Blokada tworzenia wątku synchronizacji (jeden na proces)
+_mirror_lock = threading.Lock()
+
+def get_playlist_mirror():
+    """Zwraca synchronizację lustra playlisty dla bieżącej aplikacji (uruchamianą przy pierwszym użyciu)"""
+    mirror = current_app.extensions.get('playlist_mirror')
+    if mirror is None:
+        with _mirror_lock:
+            mirror = current_app.extensions.get('playlist_mirror')
+            if mirror is None:
+                app = current_app._get_current_object()
+                mirror = PlaylistMirror(app, get_spotify_client(), interval=app.config['PLAYLIST_SYNC_INTERVAL'])
+                mirror.start()
+                app.extensions['playlist_mirror'] = mirror
+    return mirror
+
+def ensure_playlist_mirror():
+    """Uruchamia synchronizację w tle, jeśli lustro jest włączone (wywoływane przy odczytach)"""
+    if current_app.config['PLAYLIST_MIRROR_ENABLED'] and 'playlist_mirror' not in current_app.extensions:
+        get_playlist_mirror()
+
+def tracks_on_playlist(track_ids):
+    """Zwraca te z podanych ID utworów, które są na playliście (według lustra)"""
+    if not current_app.config['PLAYLIST_MIRROR_ENABLED']:
+        return set()
+    return find_playlist_track_ids(track_ids)
+
+def mirror_state():
+    """Stan lustra (snapshot_id, track_count, synced_at) lub None - wyłączone albo jeszcze niezsynchronizowane"""
+    if not current_app.config['PLAYLIST_MIRROR_ENABLED']:
+        return None
+    state = get_playlist_state(current_app.config['SPOTIFY_PLAYLIST_ID'])
+    return state if state and state['synced_at'] else None
+
+class PlaylistMirror:
+    """Wątek synchronizujący lustro playlisty po snapshot_id"""
+
+    def __init__(self, app, spotify, interval=60):
+        """
+        Args:
+            app: Aplikacja Flask (kontekst dla zapisów do bazy)
+            spotify: Współdzielony SpotifyClient
+            interval: Co ile sekund sprawdzać snapshot_id playlisty
+        """
+        self.app = app
+        self.spotify = spotify
+        self.playlist_id = spotify.playlist_id
+        self.interval = interval
+
+        self._wake = threading.Event()
+        self._force = False
+        self._stopping = False
+        self._thread = None
+
+        self.checks = 0
+        self.syncs = 0
+        self.failures = 0
+
+    def start(self):
+        """Uruchamia wątek synchronizacji"""
+        self._thread = threading.Thread(target=self._run, name='playlist-mirror', daemon=True)
+        self._thread.start()
+
+    def request_sync(self):
+        """Wymusza pobranie playlisty przy najbliższej okazji (np. na żądanie admina)"""
+        self._force = True
+        self._wake.set()
+
+    def stop(self, timeout=10):
+        """Zatrzymuje wątek (przerywa czekanie na kolejną synchronizację)"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping:
+            force, self._force = self._force, False
+
+            with self.app.app_context():
+                try:
+                    self.sync(force=force)
+                except Exception as e:
+                    self.failures += 1
+                    current_app.logger.warning(f"Nie udało się zsynchronizować playlisty: {e}")
+
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def sync(self, force=False):
+        """
+        Synchronizuje lustro, jeśli playlista się zmieniła.
+
+        Args:
+            force: Pobierz playlistę niezależnie od snapshot_id i rezerwacji innych procesów
+
+        Returns:
+            str: 'skipped' (synchronizuje inny proces), 'unchanged' lub 'synced'
+        """
+        if not claim_playlist_sync(self.playlist_id, self.interval) and not force:
+            return 'skipped'
+
+        state = get_playlist_state(self.playlist_id)
+        snapshot_id = self.spotify.get_playlist_snapshot()
+        self.checks += 1
+
+        if not force and state and state['synced_at'] and state['snapshot_id'] == snapshot_id:
+            mark_playlist_synced(self.playlist_id, snapshot_id)
+            return 'unchanged'
+
+        # Playlista mogła się zmienić w trakcie pobierania - wtedy kolejne
+        # sprawdzenie zobaczy nowszy snapshot_id i pobierze ją ponownie
+        tracks = self.spotify.get_playlist_tracks()
+        replace_playlist_tracks(self.playlist_id, snapshot_id, tracks)
+        self.syncs += 1
+
+        current_app.logger.info(f"Zsynchronizowano lustro playlisty: {len(tracks)} utworów")
+        return 'synced'
@@ -0,0 +1,273 @@
+"""
+Zbiorcze dodawanie utworów do playlisty.
+
+Zaakceptowane utwory są zbierane przez krótkie okno czasowe (lub do
+osiągnięcia limitu rozmiaru) i dodawane jednym wywołaniem
+playlist_add_items. Utwory, które już są na playliście (lustro
+playlisty), są pomijane. Po zapisie wątek aktualizuje status każdego
+zgłoszenia w bazie.
+
+Dodanie do playlisty nie jest idempotentne: po timeoucie lub błędzie 5xx
+Spotify mogło już dodać utwory. Przed ponowieniem writer sprawdza snapshot_id
+i zawartość playlisty i dodaje tylko brakujące utwory. Gdy Spotify jest
+niedostępne (otwarty breaker, nie da się sprawdzić wyniku), zgłoszenia
+zostają 'pending' - wznowi je kolejka zgłoszeń (app/submission_queue.py).
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from flask import current_app
+from spotipy.exceptions import SpotifyException
+from app.database import update_submission, append_playlist_tracks
+from app.playlist_mirror import tracks_on_playlist
+from app.spotify_client import get_spotify_client
+from app.spotify_resilience import SpotifyUnavailableError
+
+# Blokada tworzenia writera (jeden na proces)
+_writer_lock = threading.Lock()
+
+def get_playlist_writer():
+    """Zwraca writer playlisty dla bieżącej aplikacji (uruchamiany przy pierwszym użyciu)"""
+    writer = current_app.extensions.get('playlist_writer')
+    if writer is None:
+        with _writer_lock:
+            writer = current_app.extensions.get('playlist_writer')
+            if writer is None:
+                app = current_app._get_current_object()
+                writer = PlaylistWriter(
+                    app,
+                    get_spotify_client(),
+                    window=app.config['PLAYLIST_BATCH_WINDOW'],
+                    max_batch=app.config['PLAYLIST_BATCH_SIZE'],
+                    max_retries=app.config['PLAYLIST_BATCH_RETRIES']
+                )
+                writer.start()
+                app.extensions['playlist_writer'] = writer
+    return writer
+
+class _PendingTrack:
+    """Utwór czekający na zapis do playlisty"""
+
+    __slots__ = ('submission_id', 'track_uri', 'track_id', 'future')
+
+    def __init__(self, submission_id, track_uri, track_id):
+        self.submission_id = submission_id
+        self.track_uri = track_uri
+        self.track_id = track_id
+        self.future = Future()
+
+class PlaylistWriter:
+    """Bufor łączący dodawanie utworów do playlisty w paczki"""
+
+    def __init__(self, app, spotify, window=2.0, max_batch=50, max_retries=3):
+        """
+        Args:
+            app: Aplikacja Flask (kontekst dla zapisów do bazy)
+            spotify: Współdzielony SpotifyClient
+            window: Maksymalny czas zbierania paczki (sekundy)
+            max_batch: Rozmiar paczki wymuszający zapis (maks. 100)
+            max_retries: Liczba ponowień nieudanego zapisu
+        """
+        self.app = app
+        self.spotify = spotify
+        self.window = window
+        self.max_batch = min(max_batch, 100)
+        self.max_retries = max_retries
+
+        self._pending = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        """Uruchamia wątek zapisujący"""
+        self._thread = threading.Thread(target=self._run, name='playlist-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, submission_id, track_uri, track_id):
+        """
+        Dodaje utwór do bufora.
+
+        Returns:
+            Future z wynikiem True (utwór jest na playliście), False (błąd zapisu)
+            lub None (Spotify niedostępne - zgłoszenie zostaje 'pending')
+        """
+        item = _PendingTrack(submission_id, track_uri, track_id)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('PlaylistWriter jest zamknięty')
+
+            self._pending.append(item)
+            self._condition.notify()
+
+        return item.future
+
+    def close(self, timeout=30):
+        """Zapisuje pozostałe utwory i zatrzymuje wątek"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _next_batch(self):
+        """Czeka na pierwszy utwór, a potem zbiera paczkę przez okno czasowe"""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+
+            deadline = time.monotonic() + self.window
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            if batch:
+                with self.app.app_context():
+                    try:
+                        self._flush(batch)
+                    except Exception as e:
+                        current_app.logger.error(f"Błąd zapisu paczki do playlisty: {e}")
+                        self._resolve(batch, False)
+
+            with self._condition:
+                if self._closed and not self._pending:
+                    return
+
+    def _flush(self, batch):
+        """Dodaje paczkę do playlisty z pominięciem utworów, które już na niej są"""
+        playlist_ids = tracks_on_playlist(item.track_id for item in batch)
+
+        uris = []
+        seen = set()
+        for item in batch:
+            if item.track_id in playlist_ids or item.track_uri in seen:
+                continue
+            seen.add(item.track_uri)
+            uris.append(item.track_uri)
+
+        written = self._write_with_retry(uris) if uris else True
+        if written is None:
+            self._leave_pending(batch)
+            return
+        if not written:
+            self._resolve(batch, False)
+            return
+
+        self._record_added(uris)
+        self._resolve(batch, True)
+
+    def _write_with_retry(self, uris):
+        """
+        Zapis paczki z ponowieniami (backoff wykładniczy).
+
+        429 ponawia już SpotifyCallWrapper (żądanie nie zostało wykonane). Po
+        innym błędzie wynik jest nieznany - ponawiane są tylko utwory, których
+        nie ma na playliście (_missing_after_failure).
+
+        Returns:
+            True - utwory są na playliście, False - Spotify odrzuciło zapis (4xx),
+            None - Spotify niedostępne, wynik nieznany
+        """
+        for attempt in range(self.max_retries + 1):
+            snapshot_id = None
+            try:
+                snapshot_id = self.spotify.get_playlist_snapshot()
+                self.spotify.add_tracks_to_playlist(uris)
+                return True
+            except SpotifyException as e:
+                current_app.logger.error(f"Spotify odrzuciło zapis {len(uris)} utworów do playlisty: {e}")
+                return False
+            except SpotifyUnavailableError as e:
+                current_app.logger.warning(
+                    f"Nieudany zapis {len(uris)} utworów do playlisty (próba {attempt + 1}): {e}"
+                )
+
+            # Otwarty breaker - bez usypiania wątku, zgłoszenia wznowi kolejka
+            if attempt == self.max_retries or self.spotify.calls.breaker.state == 'open':
+                return None
+            time.sleep(2 ** attempt)
+
+            if snapshot_id is not None:
+                try:
+                    uris = self._missing_after_failure(uris, snapshot_id)
+                except (SpotifyException, SpotifyUnavailableError) as e:
+                    current_app.logger.warning(f"Nie udało się sprawdzić playlisty po nieudanym zapisie: {e}")
+                    return None
+                if not uris:
+                    return True
+
+        return None
+
+    def _missing_after_failure(self, uris, snapshot_id):
+        """
+        Utwory z paczki, których nie ma na playliście po zapisie o nieznanym wyniku.
+
+        Niezmieniony snapshot_id oznacza, że zapis się nie wykonał - bez
+        pobierania zawartości playlisty.
+        """
+        if self.spotify.get_playlist_snapshot() == snapshot_id:
+            return uris
+
+        on_playlist = {track['track_uri'] for track in self.spotify.get_playlist_tracks()}
+        missing = [uri for uri in uris if uri not in on_playlist]
+        if len(missing) < len(uris):
+            current_app.logger.warning(
+                f"Zapis do playlisty wykonał się mimo błędu ({len(uris) - len(missing)} utworów) - bez ponawiania"
+            )
+        return missing
+
+    def _record_added(self, uris):
+        """Dopisuje zapisane utwory do lustra playlisty (szczegóły uzupełni synchronizacja)"""
+        if not uris or not self.app.config['PLAYLIST_MIRROR_ENABLED']:
+            return
+
+        try:
+            append_playlist_tracks(self.spotify.playlist_id, [
+                {'track_id': uri.rsplit(':', 1)[-1], 'track_uri': uri, 'name': None,
+                 'artist': None, 'duration_ms': None, 'added_at': None}
+                for uri in uris
+            ])
+        except Exception as e:
+            current_app.logger.warning(f"Nie udało się zapisać utworów w lustrze playlisty: {e}")
+
+    def _leave_pending(self, batch):
+        """Spotify niedostępne - zgłoszenia zostają 'pending' (kolejka zgłoszeń wznowi je później)"""
+        current_app.logger.warning(f"Spotify niedostępne, {len(batch)} zgłoszeń czeka jako 'pending'")
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(None)
+
+    def _resolve(self, batch, success):
+        """Aktualizuje statusy zgłoszeń i powiadamia oczekujących"""
+        for item in batch:
+            if item.future.done():
+                continue
+
+            try:
+                if success:
+                    update_submission(item.submission_id, 'approved')
+                else:
+                    update_submission(
+                        item.submission_id,
+                        'rejected',
+                        rejection_reason='Błąd podczas dodawania do playlisty'
+                    )
+            except Exception as e:
+                current_app.logger.error(f"Błąd aktualizacji zgłoszenia {item.submission_id}: {e}")
+            finally:
+                item.future.set_result(success)
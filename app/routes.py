@@ -1,20 +1,91 @@
-from flask import Blueprint, render_template, request, jsonify, current_app
+import hmac
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Blueprint, Response, render_template, request, jsonify, current_app, abort, stream_with_context
 from app.database import (
     save_submission,
     count_user_submissions_in_period,
-    get_submissions_today,
-    get_all_submissions,
-    save_verification_code,
-    verify_code
+    get_submission,
+    get_submissions_page,
+    count_submissions_by_status,
+    get_playlist_tracks_page,
+    get_broadcast_queue
 )
-from app.spotify_client import SpotifyClient
-from app.content_filter import is_content_appropriate
-from app.utils import hash_email, validate_school_email, sanitize_input
-from app.email_sender import generate_verification_code, send_verification_email
-from app.config import Config
+from app.spotify_client import get_spotify_client
+from app.spotify_resilience import SpotifyUnavailableError
+from app.token_cache import SharedTokenCache
+from app.submission_queue import ensure_submission_queue, get_submission_queue
+from app.playlist_writer import get_playlist_writer
+from app.playlist_mirror import ensure_playlist_mirror, get_playlist_mirror, mirror_state
+from app.verification_store import get_code_store
+from app.stats import get_today_stats, stats_etag
+from app.metrics import CONTENT_TYPE, render_metrics, timed
+from app.lifecycle import check_readiness
+from app.export import FORMATS, export_submissions
+from app.content_filter import ensure_rules_watcher, is_content_appropriate
+from app.broadcast_schedule import ensure_broadcast_scheduler
+from app.utils import sanitize_input, song_fingerprint, parse_day
+from app.identity import get_identity
+from app.dedup import check_known_song, is_recently_added, DUPLICATE_REASON, EXPLICIT_REASON
+from app.email_sender import ensure_email_sender, generate_verification_code, send_verification_email
 
 bp = Blueprint('main', __name__)
 
+@bp.before_app_request
+def start_background_jobs():
+    """Wątki w tle (kolejka zgłoszeń, lustro playlisty, reguły filtra, plan emisji, emaile) ruszają z pierwszym requestem workera (po fork())"""
+    ensure_submission_queue()
+    ensure_playlist_mirror()
+    ensure_rules_watcher()
+    ensure_broadcast_scheduler()
+    ensure_email_sender()
+
+def _throttled(limit_name, key):
+    """Zwraca odpowiedź 429 jeśli limit requestów został przekroczony, inaczej None"""
+    retry_after = current_app.extensions['throttle'].check(limit_name, key)
+    if not retry_after:
+        return None
+
+    response = jsonify({
+        'success': False,
+        'message': f'Zbyt wiele prób. Spróbuj ponownie za {retry_after} s.'
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def _spotify_unavailable(error, email, email_hash, fingerprint, artist, title):
+    """
+    Spotify niedostępne podczas zgłoszenia: 503 albo (SPOTIFY_QUEUE_WHEN_DOWN)
+    zgłoszenie 'pending', które dokończy kolejka w tle
+    """
+    current_app.logger.warning(f"Spotify niedostępne podczas zgłoszenia: {error}")
+
+    if not current_app.config.get('SPOTIFY_QUEUE_WHEN_DOWN'):
+        return jsonify({
+            'success': False,
+            'message': 'Spotify jest chwilowo niedostępne. Spróbuj ponownie za kilka minut.'
+        }), 503
+
+    # Zgłoszenie czeka w kolejce, aż Spotify znów zacznie odpowiadać
+    submission_id = save_submission(
+        email=email,
+        email_hash=email_hash,
+        fingerprint=fingerprint,
+        artist=artist,
+        title=title,
+        spotify_track_id=None,
+        spotify_track_uri=None,
+        status='pending'
+    )
+    get_submission_queue().enqueue(submission_id)
+
+    return jsonify({
+        'success': True,
+        'pending': True,
+        'job_id': submission_id,
+        'message': '⏳ Spotify chwilowo nie odpowiada - zgłoszenie zostanie przetworzone automatycznie'
+    }), 202
+
 @bp.route('/')
 def index():
     """Strona główna z formularzem zgłoszenia"""
@@ -23,33 +94,192 @@ def index():
 @bp.route('/admin')
 def admin():
     """Panel administracyjny - lista zgłoszeń"""
-    submissions = get_all_submissions(limit=200)
-    today_submissions = get_submissions_today()
+    stats = get_today_stats(ttl=current_app.config['STATS_CACHE_TTL'])
 
+    # Tabela zgłoszeń jest ładowana stronami z /api/admin/submissions
     return render_template(
         'admin.html',
-        submissions=submissions,
-        today_count=len(today_submissions)
+        today_count=stats['today_total'],
+        playlist=mirror_state()
     )
 
+@bp.route('/api/admin/submissions')
+def admin_submissions():
+    """Lista zgłoszeń dla panelu admina (filtry + keyset pagination)"""
+    try:
+        status = request.args.get('status') or None
+        artist = sanitize_input(request.args.get('artist', '')) or None
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+
+        if status not in (None, 'approved', 'rejected', 'pending'):
+            raise ValueError(f'Nieznany status: {status}')
+
+        date_from_ts = parse_day(request.args.get('from'))
+        date_to_ts = parse_day(request.args.get('to'), next_day=True)
+
+        after = None
+        if request.args.get('cursor'):
+            ts, _, submission_id = request.args['cursor'].partition('_')
+            after = (int(ts), int(submission_id))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Nieprawidłowe parametry: {e}'
+        }), 400
+
+    try:
+        items, next_key = get_submissions_page(
+            status=status,
+            date_from_ts=date_from_ts,
+            date_to_ts=date_to_ts,
+            artist=artist,
+            after=after,
+            limit=limit
+        )
+
+        response = {
+            'success': True,
+            'items': items,
+            'next_cursor': f'{next_key[0]}_{next_key[1]}' if next_key else None
+        }
+
+        # Liczniki tylko dla pierwszej strony - kolejne ich nie zmieniają
+        if after is None:
+            counts = count_submissions_by_status(date_from_ts, date_to_ts, artist)
+            response['counts'] = {
+                'total': sum(counts.values()),
+                'approved': counts.get('approved', 0),
+                'rejected': counts.get('rejected', 0),
+                'pending': counts.get('pending', 0)
+            }
+
+        return jsonify(response)
+
+    except Exception as e:
+        current_app.logger.error(f"Błąd w /api/admin/submissions: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Błąd pobierania zgłoszeń'
+        }), 500
+
+@bp.route('/api/admin/export')
+def admin_export():
+    """
+    Eksport historii zgłoszeń (CSV lub NDJSON) strumieniowo.
+
+    Parametry: format (csv/ndjson), status, from, to (RRRR-MM-DD).
+    Przy Accept-Encoding: gzip odpowiedź jest kompresowana w locie.
+    """
+    try:
+        fmt = request.args.get('format', 'csv')
+        status = request.args.get('status') or None
+
+        if fmt not in FORMATS:
+            raise ValueError(f'Nieznany format: {fmt}')
+        if status not in (None, 'approved', 'rejected', 'pending'):
+            raise ValueError(f'Nieznany status: {status}')
+
+        date_from_ts = parse_day(request.args.get('from'))
+        date_to_ts = parse_day(request.args.get('to'), next_day=True)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': f'Nieprawidłowe parametry: {e}'
+        }), 400
+
+    compress = 'gzip' in request.accept_encodings
+    chunks = export_submissions(fmt, status, date_from_ts, date_to_ts, compress=compress)
+
+    response = Response(stream_with_context(chunks), content_type=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="zgloszenia.{fmt}"'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@bp.route('/api/admin/playlist')
+def admin_playlist():
+    """Zawartość playlisty z lustra (bez wywołań Spotify API)"""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+
+    state = mirror_state()
+    if state is None:
+        return jsonify({
+            'success': False,
+            'message': 'Lustro playlisty jest wyłączone lub jeszcze niezsynchronizowane'
+        }), 503
+
+    return jsonify({
+        'success': True,
+        'snapshot_id': state['snapshot_id'],
+        'synced_at': state['synced_at'],
+        'total': state['track_count'],
+        'items': get_playlist_tracks_page(offset, limit)
+    })
+
+@bp.route('/api/admin/playlist/sync', methods=['POST'])
+def admin_playlist_sync():
+    """Wymusza synchronizację lustra (np. po zmianach playlisty w Spotify)"""
+    if not current_app.config['PLAYLIST_MIRROR_ENABLED']:
+        abort(404)
+
+    get_playlist_mirror().request_sync()
+    return jsonify({'success': True}), 202
+
+@bp.route('/api/admin/schedule')
+def admin_schedule():
+    """Plan emisji: utwory przypisane do przerw i czekające na miejsce"""
+    if not current_app.config['BROADCAST_SCHEDULE_ENABLED']:
+        abort(404)
+
+    breaks = {}
+    waiting = []
+    for entry in get_broadcast_queue():
+        if entry['break_start'] is None:
+            waiting.append(entry)
+            continue
+
+        window = breaks.setdefault(entry['break_start'], {
+            'start': entry['break_start'], 'end': entry['break_end'], 'duration_ms': 0, 'items': []
+        })
+        window['duration_ms'] += entry['duration_ms']
+        window['items'].append(entry)
+
+    return jsonify({
+        'success': True,
+        'breaks': list(breaks.values()),
+        'waiting': waiting
+    })
+
 @bp.route('/api/request-code', methods=['POST'])
 def request_verification_code():
     """Wysyła kod weryfikacyjny na email"""
     try:
+        # Limity sprawdzamy przed jakąkolwiek pracą na bazie i wysyłką emaila
+        throttled = _throttled('request_code_ip', request.remote_addr)
+        if throttled:
+            return throttled
+
         data = request.get_json()
         email = data.get('email', '').strip().lower()
         
-        if not validate_school_email(email):
+        throttled = _throttled('request_code_email', email)
+        if throttled:
+            return throttled
+        
+        identity = get_identity()
+        if not identity.is_school_email(email):
             return jsonify({
                 'success': False,
-                'message': f'Tylko emaile @{current_app.config["SCHOOL_EMAIL_DOMAIN"]} są akceptowane'
+                'message': identity.domain_message
             }), 400
         
         # Generuj kod
         code = generate_verification_code()
         
         # Zapisz w bazie
-        save_verification_code(email, code, expires_minutes=10)
+        get_code_store().save(email, code, expires_minutes=10)
         
         # Wyślij email
         send_verification_email(email, code)
@@ -70,6 +300,10 @@ def request_verification_code():
 def submit_song():
     """Endpoint do zgłaszania piosenek (z weryfikacją kodu)"""
     try:
+        throttled = _throttled('submit_ip', request.remote_addr)
+        if throttled:
+            return throttled
+
         data = request.get_json()
 
         if not data:
@@ -83,6 +317,10 @@ def submit_song():
         artist = sanitize_input(data.get('artist', ''))
         title = sanitize_input(data.get('title', ''))
 
+        throttled = _throttled('submit_email', email)
+        if throttled:
+            return throttled
+
         # Walidacja
         if not email or not artist or not title or not verification_code:
             return jsonify({
@@ -91,28 +329,34 @@ def submit_song():
             }), 400
 
         # Sprawdź email
-        if not validate_school_email(email):
+        identity = get_identity()
+        if not identity.is_school_email(email):
             return jsonify({
                 'success': False,
-                'message': f'Tylko emaile @{current_app.config["SCHOOL_EMAIL_DOMAIN"]} są akceptowane'
+                'message': identity.domain_message
             }), 400
 
         # Weryfikuj kod
-        if not verify_code(email, verification_code):
+        with timed('code_verify'):
+            code_ok = get_code_store().verify(email, verification_code)
+
+        if not code_ok:
             return jsonify({
                 'success': False,
                 'message': 'Nieprawidłowy lub wygasły kod weryfikacyjny'
             }), 400
 
-        email_hash = hash_email(email)
+        email_hash = identity.hash_email(email)
 
         # Sprawdź limit - admini bez limitu
-        if Config.is_admin(email):
-            print(f"👑 Admin {email} - pominięto limit zgłoszeń")
+        if identity.is_admin(email):
+            # Bez adresu w logach - skrót hasha wystarczy do powiązania wpisów
+            current_app.logger.info(f"👑 Admin {email_hash[:12]} - pominięto limit zgłoszeń")
         else:
             limit_days = current_app.config.get('LIMIT_PERIOD_DAYS', 2)
             max_songs = current_app.config.get('MAX_SONGS_PER_PERIOD', 1)
-            period_count = count_user_submissions_in_period(email_hash, days=limit_days)
+            with timed('rate_limit'):
+                period_count = count_user_submissions_in_period(email_hash, days=limit_days)
 
             if period_count >= max_songs:
                 return jsonify({
@@ -121,7 +365,8 @@ def submit_song():
                 }), 429
 
         # Sprawdź wulgaryzmy
-        is_ok, reason = is_content_appropriate(artist, title)
+        with timed('content_filter'):
+            is_ok, reason = is_content_appropriate(artist, title)
         if not is_ok:
             save_submission(
                 email=email,
@@ -139,14 +384,64 @@ def submit_song():
                 'message': f'Zgłoszenie odrzucone: {reason}'
             }), 400
 
-        # Wyszukaj na Spotify
-        spotify = SpotifyClient()
-        track = spotify.search_track(artist, title)
+        # Duplikaty i znane utwory - sprawdzane lokalnie, przed zapytaniem do Spotify
+        fingerprint = song_fingerprint(artist, title)
+        window_days = current_app.config['DUPLICATE_WINDOW_DAYS']
+        with timed('duplicate_check'):
+            known_reason, known_track = check_known_song(fingerprint, window_days)
+
+        if known_reason:
+            save_submission(
+                email=email,
+                email_hash=email_hash,
+                fingerprint=fingerprint,
+                artist=artist,
+                title=title,
+                spotify_track_id=None,
+                spotify_track_uri=None,
+                status='rejected',
+                rejection_reason=known_reason
+            )
+
+            return jsonify({
+                'success': False,
+                'message': f'Zgłoszenie odrzucone: {known_reason}'
+            }), 400
+
+        # Tryb asynchroniczny - etapy Spotify wykona pula wątków w tle
+        if current_app.config.get('ASYNC_SUBMISSIONS'):
+            submission_id = save_submission(
+                email=email,
+                email_hash=email_hash,
+                fingerprint=fingerprint,
+                artist=artist,
+                title=title,
+                spotify_track_id=None,
+                spotify_track_uri=None,
+                status='pending'
+            )
+            get_submission_queue().enqueue(submission_id)
+
+            return jsonify({
+                'success': True,
+                'pending': True,
+                'job_id': submission_id,
+                'message': '⏳ Zgłoszenie przyjęte, szukamy piosenki na Spotify...'
+            }), 202
+
+        # Wyszukaj na Spotify (chyba że utwór jest już znany z wcześniejszych zgłoszeń)
+        spotify = get_spotify_client()
+        try:
+            with timed('spotify_search'):
+                track = known_track or spotify.search_track(artist, title)
+        except SpotifyUnavailableError as e:
+            return _spotify_unavailable(e, email, email_hash, fingerprint, artist, title)
 
         if not track:
             save_submission(
                 email=email,
                 email_hash=email_hash,
+                fingerprint=fingerprint,
                 artist=artist,
                 title=title,
                 spotify_track_id=None,
@@ -160,17 +455,40 @@ def submit_song():
                 'message': 'Nie znaleziono utworu na Spotify. Sprawdź poprawność nazwy wykonawcy i tytułu.'
             }), 404
 
+        # Ten sam utwór mógł być zgłoszony pod inną nazwą
+        if is_recently_added(track['id'], window_days):
+            save_submission(
+                email=email,
+                email_hash=email_hash,
+                fingerprint=fingerprint,
+                artist=artist,
+                title=title,
+                spotify_track_id=track['id'],
+                spotify_track_uri=track['uri'],
+                status='rejected',
+                rejection_reason=DUPLICATE_REASON
+            )
+
+            return jsonify({
+                'success': False,
+                'message': f'Zgłoszenie odrzucone: {DUPLICATE_REASON}'
+            }), 400
+
         # Sprawdź explicit
-        if spotify.is_track_explicit(track):
+        with timed('explicit_check'):
+            is_explicit = spotify.is_track_explicit(track)
+
+        if is_explicit:
             save_submission(
                 email=email,
                 email_hash=email_hash,
+                fingerprint=fingerprint,
                 artist=artist,
                 title=title,
                 spotify_track_id=track['id'],
                 spotify_track_uri=track['uri'],
                 status='rejected',
-                rejection_reason='Utwór zawiera treści explicit'
+                rejection_reason=EXPLICIT_REASON
             )
 
             return jsonify({
@@ -178,8 +496,60 @@ def submit_song():
                 'message': 'Utwór zawiera treści explicit i nie może być dodany'
             }), 400
 
-        # Dodaj do playlisty
-        success = spotify.add_to_playlist(track['uri'])
+        track_info = spotify.get_track_info(track)
+
+        if current_app.config.get('PLAYLIST_BATCH_WRITES'):
+            # Zbiorczy zapis - zgłoszenie czeka jako 'pending', writer ustawi status
+            with timed('db_save'):
+                submission_id = save_submission(
+                    email=email,
+                    email_hash=email_hash,
+                    fingerprint=fingerprint,
+                    artist=track_info['artist'],
+                    title=track_info['name'],
+                    spotify_track_id=track_info['id'],
+                    spotify_track_uri=track_info['uri'],
+                    status='pending',
+                    duration_ms=track_info['duration_ms']
+                )
+            future = get_playlist_writer().submit(submission_id, track_info['uri'], track_info['id'])
+
+            try:
+                with timed('playlist_add'):
+                    success = future.result(timeout=current_app.config['PLAYLIST_BATCH_WINDOW'] + 10)
+            except FutureTimeoutError:
+                success = None
+
+            # Zapis trwa albo Spotify jest niedostępne - zgłoszenie dokończy kolejka w tle
+            if success is None:
+                return jsonify({
+                    'success': True,
+                    'pending': True,
+                    'job_id': submission_id,
+                    'message': '⏳ Zgłoszenie przyjęte, trwa dodawanie do playlisty...'
+                }), 202
+        else:
+            # Dodaj do playlisty
+            try:
+                with timed('playlist_add'):
+                    success = spotify.add_to_playlist(track['uri'])
+            except SpotifyUnavailableError as e:
+                return _spotify_unavailable(e, email, email_hash, fingerprint, artist, title)
+
+            if success:
+                with timed('db_save'):
+                    save_submission(
+                        email=email,
+                        email_hash=email_hash,
+                        fingerprint=fingerprint,
+                        artist=track_info['artist'],
+                        title=track_info['name'],
+                        spotify_track_id=track_info['id'],
+                        spotify_track_uri=track_info['uri'],
+                        status='approved',
+                        rejection_reason=None,
+                        duration_ms=track_info['duration_ms']
+                    )
 
         if not success:
             return jsonify({
@@ -187,19 +557,6 @@ def submit_song():
                 'message': 'Błąd podczas dodawania do playlisty. Spróbuj ponownie później.'
             }), 500
 
-        # Zapisz
-        track_info = spotify.get_track_info(track)
-        save_submission(
-            email=email,
-            email_hash=email_hash,
-            artist=track_info['artist'],
-            title=track_info['name'],
-            spotify_track_id=track_info['id'],
-            spotify_track_uri=track_info['uri'],
-            status='approved',
-            rejection_reason=None
-        )
-
         return jsonify({
             'success': True,
             'message': '✅ Piosenka została pomyślnie dodana do playlisty! 🎵',
@@ -219,22 +576,186 @@ def submit_song():
             'message': 'Wystąpił nieoczekiwany błąd. Spróbuj ponownie później.'
         }), 500
 
+@bp.route('/api/submission/<int:submission_id>')
+def submission_status(submission_id):
+    """Endpoint zwracający status zgłoszenia (polling w trybie asynchronicznym)"""
+    submission = get_submission(submission_id)
+
+    if not submission:
+        return jsonify({
+            'success': False,
+            'message': 'Nie znaleziono zgłoszenia'
+        }), 404
+
+    status = submission['status']
+    response = {
+        'success': True,
+        'job_id': submission_id,
+        'status': status
+    }
+
+    if status == 'pending':
+        response['message'] = '⏳ Zgłoszenie jest przetwarzane...'
+    elif status == 'approved':
+        response['message'] = '✅ Piosenka została pomyślnie dodana do playlisty! 🎵'
+        response['track'] = {
+            'artist': submission['artist'],
+            'title': submission['title'],
+            'url': f"https://open.spotify.com/track/{submission['spotify_track_id']}"
+        }
+    else:
+        response['message'] = f"Zgłoszenie odrzucone: {submission['rejection_reason']}"
+
+    return jsonify(response)
+
+@bp.route('/api/queue-stats')
+def queue_stats():
+    """Endpoint monitoringu kolejki zgłoszeń (głębokość i czasy etapów)"""
+    if not current_app.config.get('ASYNC_SUBMISSIONS'):
+        return jsonify({
+            'success': True,
+            'enabled': False
+        })
+
+    return jsonify({
+        'success': True,
+        'enabled': True,
+        **get_submission_queue().stats()
+    })
+
+def _runtime_metrics():
+    """Metryki odczytywane w chwili scrape'a (cache, kolejki, breaker)"""
+    extensions = current_app.extensions
+    metrics = []
+
+    spotify = extensions.get('spotify_client')
+    if spotify is not None:
+        cache = spotify.search_cache.stats()
+        metrics.append((
+            'radio_search_cache_lookups_total', 'counter',
+            'Odczyty cache wyszukiwań Spotify (hit - pamięć, db_hit - SQLite, miss - zapytanie do API)',
+            [({'result': 'hit'}, cache['hits'] - cache['db_hits']),
+             ({'result': 'db_hit'}, cache['db_hits']),
+             ({'result': 'miss'}, cache['misses'])]
+        ))
+        metrics.append((
+            'radio_search_cache_entries', 'gauge',
+            'Liczba wpisów w cache wyszukiwań (pamięć procesu)',
+            [({}, cache['size'])]
+        ))
+        states = ('closed', 'half_open', 'open')
+        metrics.append((
+            'radio_spotify_breaker_state', 'gauge',
+            'Stan circuit breakera Spotify (1 - bieżący stan)',
+            [({'state': state}, int(spotify.calls.breaker.state == state)) for state in states]
+        ))
+        token_cache = spotify.auth_manager.cache_handler
+        if isinstance(token_cache, SharedTokenCache):
+            metrics.append((
+                'radio_spotify_token_refreshes_total', 'counter',
+                'Wygasłe tokeny Spotify (refresh - odświeżone przez ten proces, wait - odświeżone przez inny)',
+                [({'result': 'refresh'}, token_cache.refreshes), ({'result': 'wait'}, token_cache.waits)]
+            ))
+
+    submission_queue = extensions.get('submission_queue')
+    if submission_queue is not None:
+        metrics.append((
+            'radio_submission_queue_depth', 'gauge',
+            'Zgłoszenia czekające w kolejce asynchronicznej',
+            [({}, submission_queue.depth())]
+        ))
+        metrics.append((
+            'radio_submissions_requeued_total', 'counter',
+            "Porzucone zgłoszenia 'pending' (np. po restarcie) wznowione przez kolejkę",
+            [({}, submission_queue.requeued)]
+        ))
+
+    mirror = extensions.get('playlist_mirror')
+    if mirror is not None:
+        metrics.append((
+            'radio_playlist_mirror_syncs_total', 'counter',
+            'Synchronizacje lustra playlisty (check - sprawdzenie snapshot_id, sync - pobranie playlisty)',
+            [({'result': 'check'}, mirror.checks),
+             ({'result': 'sync'}, mirror.syncs),
+             ({'result': 'failure'}, mirror.failures)]
+        ))
+
+    scheduler = extensions.get('broadcast_scheduler')
+    if scheduler is not None:
+        metrics.append((
+            'radio_broadcast_scheduled_total', 'counter',
+            'Utwory z kolejki emisji (placed - przypisane do przerwy, aired - wyemitowane)',
+            [({'result': 'placed'}, scheduler.placed), ({'result': 'aired'}, scheduler.aired)]
+        ))
+        metrics.append((
+            'radio_broadcast_playlist_updates_total', 'counter',
+            'Zmiany kolejności playlisty według planu (reorder - przeniesienia, replace - zastąpienia)',
+            [({'kind': 'reorder'}, scheduler.reorders),
+             ({'kind': 'replace'}, scheduler.replacements),
+             ({'kind': 'failure'}, scheduler.failures)]
+        ))
+
+    watcher = extensions.get('filter_rules_watcher')
+    if watcher is not None:
+        metrics.append((
+            'radio_filter_rules_reloads_total', 'counter',
+            'Przeładowania reguł filtra wulgaryzmów po zmianie pliku',
+            [({'result': 'reload'}, watcher.reloads), ({'result': 'failure'}, watcher.failures)]
+        ))
+
+    sender = extensions.get('email_sender')
+    if sender is not None:
+        metrics.append((
+            'radio_emails_total', 'counter',
+            'Emaile obsłużone przez wątek wysyłający',
+            [({'result': 'sent'}, sender.sent), ({'result': 'failed'}, sender.failed)]
+        ))
+
+    return metrics
+
+@bp.route('/healthz')
+def healthz():
+    """Liveness - proces odpowiada na requesty"""
+    return jsonify({'status': 'ok'})
+
+@bp.route('/readyz')
+def readyz():
+    """Readiness - baza danych i token Spotify są gotowe"""
+    ready, checks = check_readiness()
+
+    return jsonify({
+        'status': 'ready' if ready else 'unavailable',
+        'checks': checks
+    }), 200 if ready else 503
+
+@bp.route('/metrics')
+def metrics():
+    """Metryki w formacie Prometheus"""
+    if not current_app.config['METRICS_ENABLED']:
+        abort(404)
+
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()):
+        abort(401)
+
+    return Response(render_metrics(_runtime_metrics()), content_type=CONTENT_TYPE)
+
 @bp.route('/api/stats')
 def get_stats():
     """Endpoint zwracający statystyki"""
     try:
-        today_submissions = get_submissions_today()
+        stats = get_today_stats(ttl=current_app.config['STATS_CACHE_TTL'])
 
-        approved = len([s for s in today_submissions if s['status'] == 'approved'])
-        rejected = len([s for s in today_submissions if s['status'] == 'rejected'])
-
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'today_total': len(today_submissions),
-            'today_approved': approved,
-            'today_rejected': rejected
+            **stats
         })
 
+        # ETag + no-cache - przeglądarka zawsze pyta, ale zwykle dostaje 304
+        response.set_etag(stats_etag(stats))
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response.make_conditional(request)
+
     except Exception as e:
         current_app.logger.error(f"Błąd w /api/stats: {e}")
         return jsonify({
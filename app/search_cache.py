@@ -0,0 +1,150 @@
+"""
+Cache wyników wyszukiwania utworów na Spotify.
+
+Dwie warstwy:
+- pamięć procesu (LRU z limitem rozmiaru i TTL),
+- opcjonalnie tabela search_cache w bazie SQLite (przeżywa restart aplikacji).
+
+Brak wyniku ("nie znaleziono") też jest cache'owany, ale z krótszym TTL.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.database import get_cached_search, save_cached_search
+
+# Znacznik braku wpisu w cache (None oznacza zapamiętany brak wyniku)
+MISSING = object()
+
+def make_cache_key(artist, title):
+    """Normalizuje zapytanie (wielkość liter, białe znaki) do klucza cache"""
+    artist = ' '.join((artist or '').casefold().split())
+    title = ' '.join((title or '').casefold().split())
+    return f"{artist}\x1f{title}"
+
+class SearchCache:
+    """Cache LRU + TTL dla wyników SpotifyClient.search_track"""
+
+    def __init__(self, max_size=1000, ttl=86400, negative_ttl=600, persist=False):
+        """
+        Args:
+            max_size: Maksymalna liczba wpisów w pamięci
+            ttl: Czas życia znalezionego utworu (sekundy)
+            negative_ttl: Czas życia wyniku "nie znaleziono" (sekundy)
+            persist: Czy używać trwałej warstwy w tabeli search_cache
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.persist = persist
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_writes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+
+    def get(self, artist, title):
+        """
+        Pobiera wynik z cache.
+
+        Returns:
+            dict utworu, None (zapamiętany brak wyniku) lub MISSING
+        """
+        key = make_cache_key(artist, title)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, track = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return track
+                del self._entries[key]
+
+        entry = self._db_get(key, now)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            self.hits += 1
+            self.db_hits += 1
+            self._remember(key, *entry)
+            return entry[1]
+
+    def set(self, artist, title, track):
+        """Zapisuje wynik wyszukiwania (track=None oznacza brak wyniku)"""
+        key = make_cache_key(artist, title)
+        ttl = self.ttl if track is not None else self.negative_ttl
+        expires_at = time.time() + ttl
+
+        with self._lock:
+            self._remember(key, expires_at, track)
+
+        self._db_set(key, expires_at, track)
+
+    def clear(self):
+        """Czyści warstwę w pamięci"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Zwraca liczniki trafień i chybień"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'db_hits': self.db_hits,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+    def _remember(self, key, expires_at, track):
+        """Dodaje wpis do warstwy w pamięci (wywoływane pod blokadą)"""
+        self._entries[key] = (expires_at, track)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key, now):
+        """Odczyt z warstwy SQLite - zwraca (expires_at, track) lub None"""
+        if not self.persist:
+            return None
+
+        try:
+            row = get_cached_search(key, now)
+        except sqlite3.Error:
+            return None
+
+        if row is None:
+            return None
+
+        track_json, expires_at = row
+        return expires_at, json.loads(track_json) if track_json else None
+
+    def _db_set(self, key, expires_at, track):
+        """Zapis do warstwy SQLite (błędy nie przerywają wyszukiwania)"""
+        if not self.persist:
+            return
+
+        track_json = json.dumps(track) if track is not None else None
+
+        # Co jakiś czas usuń przeterminowane wpisy, żeby tabela nie rosła
+        with self._lock:
+            self._db_writes += 1
+            purge = self._db_writes % 100 == 0
+
+        try:
+            save_cached_search(key, track_json, expires_at, purge_before=time.time() if purge else None)
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,155 @@
+"""
+Asynchroniczny klient Spotify dla serwera ASGI (app/asgi.py).
+
+Połączenia HTTP są rozłożone na kilka małych pul httpx.AsyncClient -
+przydzielanie requestów do połączeń w httpcore 1.0 rośnie kwadratowo
+z rozmiarem puli (pula 100 połączeń była kilkukrotnie wolniejsza niż
+10 pul po 10). Token OAuth,
+cache wyszukiwań oraz breaker i limit 429 są współdzielone z klientem
+synchronicznym, więc obie ścieżki widzą ten sam stan Spotify.
+"""
+
+import asyncio
+import functools
+import itertools
+import time
+import httpx
+import requests
+from spotipy.exceptions import SpotifyException
+from app.metrics import SPOTIFY_SEARCHES
+from app.search_cache import MISSING
+from app.spotify_resilience import SpotifyUnavailableError
+from app.track_search import pick_best, search_queries
+
+# Maksymalna liczba połączeń w jednej puli httpx
+POOL_SIZE = 10
+
+class AsyncSpotifyClient:
+    """Wyszukiwanie i dodawanie do playlisty bez blokowania pętli zdarzeń"""
+
+    def __init__(self, spotify, config, executor, logger):
+        """
+        Args:
+            spotify: Synchroniczny SpotifyClient (token, cache, breaker)
+            config: Konfiguracja aplikacji
+            executor: Pula wątków dla operacji blokujących (odświeżenie tokenu, SQLite)
+            logger: Logger aplikacji
+        """
+        self.spotify = spotify
+        self.executor = executor
+        self.logger = logger
+        self.playlist_id = spotify.playlist_id
+        self.search_cache = spotify.search_cache
+        self.calls = spotify.calls
+
+        connections = config['ASGI_SPOTIFY_CONNECTIONS']
+        pool_size = min(POOL_SIZE, connections)
+        self.pools = [
+            httpx.AsyncClient(
+                base_url=config['SPOTIFY_API_PREFIX'],
+                timeout=config['SPOTIFY_REQUESTS_TIMEOUT'],
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+            for _ in range(-(-connections // pool_size))
+        ]
+        self._next_pool = itertools.cycle(self.pools)
+        # Limit całkowity - nadmiarowe requesty czekają tutaj, a nie w kolejce puli
+        self._slots = asyncio.Semaphore(connections)
+
+        self._token = None
+        self._token_lock = asyncio.Lock()
+
+    async def aclose(self):
+        for pool in self.pools:
+            await pool.aclose()
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def _authorization(self):
+        """Nagłówek Authorization (token odświeżany w wątku, jeden naraz)"""
+        token = self._token
+        if token is None or token['expires_at'] - 60 < time.time():
+            async with self._token_lock:
+                token = self._token
+                if token is None or token['expires_at'] - 60 < time.time():
+                    auth_manager = self.spotify.auth_manager
+                    await self._run(auth_manager.get_access_token, as_dict=False)
+                    token = self._token = auth_manager.cache_handler.get_cached_token()
+
+        return f"Bearer {token['access_token']}"
+
+    async def _request(self, method, path, **kwargs):
+        """
+        Jedno żądanie HTTP.
+
+        Błędy są tłumaczone na wyjątki rozpoznawane przez SpotifyCallWrapper:
+        timeouty i błędy połączenia - requests.exceptions, odpowiedzi spoza 2xx - SpotifyException.
+        """
+        headers = {'Authorization': await self._authorization()}
+
+        try:
+            async with self._slots:
+                response = await next(self._next_pool).request(method, path, headers=headers, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+        if response.status_code >= 400:
+            raise SpotifyException(
+                response.status_code,
+                -1,
+                f'{response.request.url}: {response.text[:200]}',
+                headers=response.headers
+            )
+
+        return response.json() if response.content else None
+
+    async def search(self, query):
+        params = {'q': query, 'type': 'track', 'limit': self.spotify.search_candidates}
+        return await self._request('GET', 'search', params=params)
+
+    async def playlist_add_items(self, track_uris):
+        return await self._request('POST', f'playlists/{self.playlist_id}/tracks', json={'uris': track_uris})
+
+    async def search_track(self, artist, title):
+        """
+        Wyszukuje utwór (jak SpotifyClient.search_track).
+
+        Raises:
+            SpotifyUnavailableError: Spotify chwilowo niedostępne
+        """
+        cached = await self._run(self.search_cache.get, artist, title)
+        if cached is not MISSING:
+            return cached
+
+        try:
+            track, result = None, 'not_found'
+            for name, query in search_queries(artist, title):
+                results = await self.calls.call_async(self.search, query)
+                track = pick_best(results['tracks']['items'], artist, title, self.spotify.search_min_score)
+                if track is not None:
+                    result = name
+                    break
+        except SpotifyUnavailableError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Błąd wyszukiwania utworu: {e}")
+            return None
+
+        SPOTIFY_SEARCHES.inc(result)
+        await self._run(self.search_cache.set, artist, title, track)
+        return track
+
+    async def add_to_playlist(self, track_uri):
+        """Dodaje utwór do playlisty (jak SpotifyClient.add_to_playlist - SpotifyUnavailableError przekazywany dalej)"""
+        try:
+            await self.calls.call_async(self.playlist_add_items, [track_uri], idempotent=False)
+            return True
+        except SpotifyUnavailableError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Błąd dodawania do playlisty: {e}")
+            return False
@@ -1,22 +1,108 @@
+import threading
+import requests
 import spotipy
+from requests.adapters import HTTPAdapter
 from spotipy.oauth2 import SpotifyOAuth
 from flask import current_app
-import os
+from app.metrics import SPOTIFY_SEARCHES
+from app.search_cache import SearchCache, MISSING
+from app.spotify_resilience import SpotifyCallWrapper, SpotifyUnavailableError
+from app.token_cache import SharedTokenCache, create_token_cache
+from app.track_search import pick_best, search_queries
+
+# Blokada tworzenia współdzielonego klienta (jeden na proces)
+_client_lock = threading.Lock()
+
+class _LockedSpotifyOAuth(SpotifyOAuth):
+    """
+    SpotifyOAuth z blokadą - token odświeża tylko jeden wątek naraz.
+
+    Ze współdzielonym cache (SharedTokenCache) także tylko jeden proces -
+    pozostałe czekają na token zapisany w bazie.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._token_lock = threading.Lock()
+
+    def get_access_token(self, *args, **kwargs):
+        with self._token_lock:
+            return super().get_access_token(*args, **kwargs)
+
+    def refresh_access_token(self, refresh_token):
+        if isinstance(self.cache_handler, SharedTokenCache):
+            return self.cache_handler.refresh(super().refresh_access_token, refresh_token)
+        return super().refresh_access_token(refresh_token)
+
+def _build_session(pool_size):
+    """
+    Tworzy sesję HTTP z pulą połączeń keep-alive.
+
+    Bez automatycznych ponowień urllib3 - ponowienia, 429 i breaker obsługuje
+    SpotifyCallWrapper, żeby wątek nie spał wewnątrz biblioteki HTTP.
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_spotify_client():
+    """
+    Zwraca współdzielonego klienta Spotify (jeden na proces).
+
+    Klient jest tworzony przy pierwszym użyciu i trzymany w app.extensions,
+    więc kolejne requesty używają tej samej puli połączeń i tokenu.
+    """
+    client = current_app.extensions.get('spotify_client')
+    if client is None:
+        with _client_lock:
+            client = current_app.extensions.get('spotify_client')
+            if client is None:
+                client = SpotifyClient()
+                current_app.extensions['spotify_client'] = client
+    return client
 
 class SpotifyClient:
-    """Klient do komunikacji z Spotify API"""
+    """Klient do komunikacji z Spotify API (bezpieczny wątkowo)"""
     
     def __init__(self):
         """Inicjalizuje klienta Spotify z credentials z config"""
         try:
-            self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-                client_id=current_app.config['SPOTIPY_CLIENT_ID'],
-                client_secret=current_app.config['SPOTIPY_CLIENT_SECRET'],
-                redirect_uri=current_app.config['SPOTIPY_REDIRECT_URI'],
+            config = current_app.config
+            self.session = _build_session(config['SPOTIFY_POOL_SIZE'])
+            self.auth_manager = _LockedSpotifyOAuth(
+                client_id=config['SPOTIPY_CLIENT_ID'],
+                client_secret=config['SPOTIPY_CLIENT_SECRET'],
+                redirect_uri=config['SPOTIPY_REDIRECT_URI'],
                 scope='playlist-modify-public playlist-modify-private',
-                cache_path='.spotify_cache'
-            ))
-            self.playlist_id = current_app.config['SPOTIFY_PLAYLIST_ID']
+                cache_handler=create_token_cache(config),
+                requests_session=self.session,
+                open_browser=False
+            )
+            self.auth_manager.OAUTH_TOKEN_URL = config['SPOTIFY_TOKEN_URL']
+            self.sp = spotipy.Spotify(
+                auth_manager=self.auth_manager,
+                requests_session=self.session,
+                requests_timeout=config['SPOTIFY_REQUESTS_TIMEOUT']
+            )
+            self.sp.prefix = config['SPOTIFY_API_PREFIX']
+            self.playlist_id = config['SPOTIFY_PLAYLIST_ID']
+            self.search_candidates = min(config['SPOTIFY_SEARCH_CANDIDATES'], 50)
+            self.search_min_score = config['SPOTIFY_SEARCH_MIN_SCORE']
+            self.search_cache = SearchCache(
+                max_size=config['SEARCH_CACHE_SIZE'],
+                ttl=config['SEARCH_CACHE_TTL'],
+                negative_ttl=config['SEARCH_CACHE_NEGATIVE_TTL'],
+                persist=config['SEARCH_CACHE_PERSIST']
+            )
+            self.calls = SpotifyCallWrapper(
+                deadline=config['SPOTIFY_CALL_DEADLINE'],
+                max_retries=config['SPOTIFY_MAX_RETRIES'],
+                failure_threshold=config['SPOTIFY_BREAKER_THRESHOLD'],
+                reset_timeout=config['SPOTIFY_BREAKER_RESET']
+            )
         except Exception as e:
             current_app.logger.error(f"Błąd inicjalizacji Spotify: {e}")
             raise
@@ -24,18 +110,36 @@ class SpotifyClient:
     def search_track(self, artist, title):
         """
         Wyszukuje utwór na Spotify po nazwie wykonawcy i tytule.
+        Wyniki (również brak wyniku) są cache'owane.
+        
+        Pobiera kilku kandydatów i wybiera najlepiej pasującego (track_search).
+        Jeśli ścisłe zapytanie nic nie da, próbuje luźnego zapytania tekstowego.
         
         Returns:
             dict: Informacje o utworze lub None jeśli nie znaleziono
+            
+        Raises:
+            SpotifyUnavailableError: Spotify chwilowo niedostępne (to nie to samo co "nie znaleziono")
         """
+        cached = self.search_cache.get(artist, title)
+        if cached is not MISSING:
+            return cached
+
         try:
-            query = f"artist:{artist} track:{title}"
-            results = self.sp.search(q=query, type='track', limit=1)
-            
-            if results['tracks']['items']:
-                return results['tracks']['items'][0]
-            return None
+            track, result = None, 'not_found'
+            for name, query in search_queries(artist, title):
+                results = self.calls.call(self.sp.search, q=query, type='track', limit=self.search_candidates)
+                track = pick_best(results['tracks']['items'], artist, title, self.search_min_score)
+                if track is not None:
+                    result = name
+                    break
+
+            SPOTIFY_SEARCHES.inc(result)
+            self.search_cache.set(artist, title, track)
+            return track
             
+        except SpotifyUnavailableError:
+            raise
         except Exception as e:
             current_app.logger.error(f"Błąd wyszukiwania utworu: {e}")
             return None
@@ -60,17 +164,128 @@ class SpotifyClient:
             track_uri (str): Spotify URI utworu (spotify:track:...)
             
         Returns:
-            bool: True jeśli sukces, False w przeciwnym razie
+            bool: True jeśli sukces, False jeśli Spotify odrzuciło zapis (błąd klienta)
+            
+        Raises:
+            SpotifyUnavailableError: Spotify niedostępne (otwarty breaker, limit czasu) - wywołujący
+            zostawia zgłoszenie 'pending' albo zwraca 503
         """
         try:
-            self.sp.playlist_add_items(self.playlist_id, [track_uri])
+            # Nieidempotentne - ponawiane tylko po 429 (żądanie nie zostało wykonane)
+            self.calls.call(self.sp.playlist_add_items, self.playlist_id, [track_uri], idempotent=False)
             current_app.logger.info(f"Dodano utwór {track_uri} do playlisty {self.playlist_id}")
             return True
             
+        except SpotifyUnavailableError:
+            raise
         except Exception as e:
             current_app.logger.error(f"Błąd dodawania do playlisty: {e}")
             return False
     
+    def add_tracks_to_playlist(self, track_uris):
+        """
+        Dodaje wiele utworów do playlisty jednym wywołaniem (maks. 100).
+        
+        Args:
+            track_uris (list): Lista Spotify URI utworów
+            
+        Raises:
+            SpotifyUnavailableError, SpotifyException: Błąd API (ponowienia po błędach
+            serwera zostawiamy wywołującemu - dodanie nie jest idempotentne)
+        """
+        if len(track_uris) > 100:
+            raise ValueError('Spotify przyjmuje maksymalnie 100 utworów na wywołanie')
+
+        self.calls.call(self.sp.playlist_add_items, self.playlist_id, track_uris, idempotent=False)
+        current_app.logger.info(f"Dodano {len(track_uris)} utworów do playlisty {self.playlist_id}")
+    
+    def reorder_playlist_items(self, range_start, range_length, insert_before, snapshot_id=None):
+        """
+        Przenosi zakres utworów playlisty w inne miejsce (jedno wywołanie).
+        
+        Args:
+            range_start (int): Pozycja pierwszego przenoszonego utworu
+            range_length (int): Liczba przenoszonych utworów
+            insert_before (int): Pozycja (przed przeniesieniem), przed którą trafią utwory
+            snapshot_id (str): Wersja playlisty, względem której liczone są pozycje
+            
+        Returns:
+            str: snapshot_id playlisty po zmianie
+        """
+        # Nieidempotentne - powtórzone przeniesienie przesunęłoby inne utwory
+        result = self.calls.call(
+            self.sp.playlist_reorder_items, self.playlist_id, range_start, insert_before,
+            range_length=range_length, snapshot_id=snapshot_id, idempotent=False
+        )
+        return result['snapshot_id']
+    
+    def replace_playlist_items(self, track_uris):
+        """
+        Zastępuje zawartość playlisty (pierwsze 100 utworów jednym wywołaniem,
+        pozostałe dodawane paczkami po 100).
+        
+        Returns:
+            str: snapshot_id playlisty po zmianie
+        """
+        result = self.calls.call(self.sp.playlist_replace_items, self.playlist_id, track_uris[:100])
+        for start in range(100, len(track_uris), 100):
+            result = self.calls.call(
+                self.sp.playlist_add_items, self.playlist_id, track_uris[start:start + 100], idempotent=False
+            )
+        current_app.logger.info(f"Zastąpiono zawartość playlisty {self.playlist_id} ({len(track_uris)} utworów)")
+        return result['snapshot_id']
+    
+    def get_playlist_snapshot(self):
+        """
+        Pobiera snapshot_id playlisty (jedno lekkie wywołanie - bez utworów).
+        
+        Returns:
+            str: snapshot_id (zmienia się przy każdej modyfikacji playlisty)
+        """
+        playlist = self.calls.call(self.sp.playlist, self.playlist_id, fields='snapshot_id')
+        return playlist['snapshot_id']
+    
+    def get_playlist_tracks(self):
+        """
+        Pobiera wszystkie utwory z playlisty (stronicowanie po 100, tylko potrzebne pola).
+        
+        Returns:
+            list: dict (track_id, track_uri, name, artist, duration_ms, added_at) w kolejności na playliście
+        """
+        fields = 'items(added_at,track(id,uri,name,duration_ms,artists(name))),next'
+        tracks = []
+        page = self.calls.call(self.sp.playlist_items, self.playlist_id, fields=fields, limit=100)
+
+        while page:
+            for item in page['items']:
+                # Lokalne pliki i usunięte utwory nie mają obiektu track albo ID
+                track = item.get('track') or {}
+                tracks.append({
+                    'track_id': track.get('id'),
+                    'track_uri': track.get('uri'),
+                    'name': track.get('name'),
+                    'artist': ', '.join(a['name'] for a in track.get('artists') or []),
+                    'duration_ms': track.get('duration_ms'),
+                    'added_at': item.get('added_at')
+                })
+            page = self.calls.call(self.sp.next, page) if page.get('next') else None
+
+        return tracks
+    
+    def token_state(self):
+        """
+        Stan tokenu OAuth bez odpytywania Spotify.
+
+        Returns:
+            str: 'valid', 'refreshable' (wygasł, ale jest refresh token) lub 'missing'
+        """
+        token_info = self.auth_manager.cache_handler.get_cached_token()
+        if not token_info:
+            return 'missing'
+        if not self.auth_manager.is_token_expired(token_info):
+            return 'valid'
+        return 'refreshable' if token_info.get('refresh_token') else 'missing'
+    
     def get_track_info(self, track):
         """
         Pobiera sformatowane informacje o utworze.
@@ -0,0 +1,270 @@
+"""
+Odporna warstwa wywołań Spotify API.
+
+- limit czasu (deadline) na całe wywołanie razem z ponowieniami,
+- ponowienia z losowym opóźnieniem (tylko dla operacji idempotentnych),
+- respektowanie 429 Retry-After dla wszystkich wątków procesu (backpressure),
+- circuit breaker - po serii błędów wywołania od razu się kończą, zamiast
+  blokować workery na niedziałającym API.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import requests
+from spotipy.exceptions import SpotifyException
+from app.metrics import SPOTIFY_CALLS, SPOTIFY_CALL_SECONDS
+
+# Błędy sieci (timeout, zerwane połączenie) - liczone jako awaria API
+NETWORK_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+
+class SpotifyUnavailableError(Exception):
+    """Spotify jest chwilowo niedostępne (otwarty breaker, limit czasu lub wyczerpane ponowienia)"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker: closed -> (seria błędów) -> open -> (po reset_timeout) -> half-open.
+
+    W stanie half-open przepuszczane jest jedno wywołanie próbne; jego sukces
+    zamyka breaker, a błąd otwiera go ponownie.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self):
+        """Czy można wykonać wywołanie"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probe_in_flight:
+                return False
+
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def release(self):
+        """Zwalnia wywołanie próbne bez zmiany stanu (wywołanie przerwane, zanim było wiadomo, czy API działa)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+class SpotifyCallWrapper:
+    """Wykonuje wywołania spotipy z deadline, ponowieniami, obsługą 429 i breakerem"""
+
+    def __init__(self, deadline=10, max_retries=3, backoff_base=0.3, backoff_cap=5,
+                 failure_threshold=5, reset_timeout=30):
+        """
+        Args:
+            deadline: Maksymalny łączny czas wywołania z ponowieniami (sekundy)
+            max_retries: Maksymalna liczba ponowień
+            backoff_base: Bazowe opóźnienie ponowienia (sekundy)
+            backoff_cap: Maksymalne opóźnienie ponowienia (sekundy)
+            failure_threshold: Liczba kolejnych błędów otwierająca breaker
+            reset_timeout: Czas (sekundy) po którym breaker wpuszcza wywołanie próbne
+        """
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        # Wspólny dla procesu termin "nie wcześniej niż" z nagłówka Retry-After
+        self._not_before = 0.0
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args, idempotent=True, deadline=None, **kwargs):
+        """
+        Wywołuje fn(*args, **kwargs).
+
+        Args:
+            idempotent: Czy wywołanie można bezpiecznie powtórzyć po błędzie
+                sieci/serwera (429 jest zawsze ponawiane - żądanie nie zostało wykonane)
+            deadline: Nadpisuje domyślny limit czasu (sekundy)
+
+        Raises:
+            SpotifyUnavailableError: Breaker otwarty, przekroczony deadline lub wyczerpane ponowienia
+            SpotifyException: Błąd klienta (4xx inny niż 429) - przekazywany bez zmian
+        """
+        end = time.monotonic() + (deadline or self.deadline)
+        operation = getattr(fn, '__name__', 'call')
+        attempt = 0
+
+        while True:
+            wait = self._before_attempt(end, operation)
+
+            started = time.perf_counter()
+            try:
+                if wait:
+                    time.sleep(wait)
+                    started = time.perf_counter()
+                result = fn(*args, **kwargs)
+            except NETWORK_ERRORS + (SpotifyException,) as e:
+                attempt += 1
+                time.sleep(self._after_failure(e, operation, started, attempt, end, idempotent))
+            except BaseException as e:
+                self._after_unexpected(e, operation, started)
+                raise
+            else:
+                self._after_success(operation, started)
+                return result
+
+    async def call_async(self, fn, *args, idempotent=True, deadline=None, **kwargs):
+        """
+        Wersja call() dla korutyn (serwer ASGI) - ten sam breaker, limit 429 i ponowienia.
+
+        Błędy sieci korutyna musi zgłaszać jako wyjątki z NETWORK_ERRORS,
+        a odpowiedzi HTTP inne niż 2xx jako SpotifyException.
+        """
+        end = time.monotonic() + (deadline or self.deadline)
+        operation = getattr(fn, '__name__', 'call')
+        attempt = 0
+
+        while True:
+            wait = self._before_attempt(end, operation)
+
+            started = time.perf_counter()
+            try:
+                if wait:
+                    await asyncio.sleep(wait)
+                    started = time.perf_counter()
+                result = await fn(*args, **kwargs)
+            except NETWORK_ERRORS + (SpotifyException,) as e:
+                attempt += 1
+                await asyncio.sleep(self._after_failure(e, operation, started, attempt, end, idempotent))
+            except BaseException as e:
+                self._after_unexpected(e, operation, started)
+                raise
+            else:
+                self._after_success(operation, started)
+                return result
+
+    def _before_attempt(self, end, operation):
+        """
+        Sprawdza breaker i limit 429 przed próbą.
+
+        Returns:
+            float: Ile sekund trzeba odczekać (okres Retry-After)
+        """
+        if not self.breaker.allow():
+            SPOTIFY_CALLS.inc(operation, 'breaker_open')
+            raise SpotifyUnavailableError('Spotify chwilowo niedostępne (circuit breaker otwarty)')
+
+        with self._lock:
+            wait = self._not_before - time.monotonic()
+
+        if wait <= 0:
+            return 0
+        if time.monotonic() + wait >= end:
+            # Wywołanie nie idzie do API - ewentualna próba half-open wraca do puli
+            self.breaker.release()
+            SPOTIFY_CALLS.inc(operation, 'deadline_exceeded')
+            raise SpotifyUnavailableError('Przekroczony limit zapytań Spotify (429)')
+        return wait
+
+    def _after_success(self, operation, started):
+        SPOTIFY_CALL_SECONDS.observe(time.perf_counter() - started, operation)
+        SPOTIFY_CALLS.inc(operation, 'ok')
+        self.breaker.record_success()
+
+    def _after_unexpected(self, error, operation, started):
+        """
+        Błąd spoza klasyfikacji (np. ucięta odpowiedź, niepoprawny JSON) albo anulowanie.
+
+        Każda próba musi zakończyć się wpisem w breakerze - inaczej nieudana próba
+        half-open zostawiłaby breaker otwarty na zawsze.
+        """
+        if not isinstance(error, Exception):
+            # Anulowanie (rozłączony klient ASGI, KeyboardInterrupt) - nic nie wiadomo o stanie API
+            self.breaker.release()
+            return
+
+        SPOTIFY_CALL_SECONDS.observe(time.perf_counter() - started, operation)
+        SPOTIFY_CALLS.inc(operation, 'error')
+        self.breaker.record_failure()
+
+    def _after_failure(self, error, operation, started, attempt, end, idempotent):
+        """
+        Klasyfikuje błąd próby.
+
+        Returns:
+            float: Opóźnienie przed kolejną próbą
+
+        Raises:
+            SpotifyException: Błąd klienta - bez ponawiania
+            SpotifyUnavailableError: Nie można ponowić (nieidempotentne, limit prób lub czasu)
+        """
+        SPOTIFY_CALL_SECONDS.observe(time.perf_counter() - started, operation)
+
+        if isinstance(error, SpotifyException):
+            if error.http_status == 429:
+                # Limit zapytań - to nie awaria API, breaker zostaje zamknięty
+                SPOTIFY_CALLS.inc(operation, 'rate_limited')
+                self.breaker.record_success()
+                self._block_for(self._retry_after(error))
+                retryable = True
+            elif error.http_status is not None and error.http_status >= 500:
+                SPOTIFY_CALLS.inc(operation, 'server_error')
+                self.breaker.record_failure()
+                retryable = idempotent
+            else:
+                SPOTIFY_CALLS.inc(operation, 'client_error')
+                self.breaker.record_success()
+                raise error
+        else:
+            SPOTIFY_CALLS.inc(operation, 'network_error')
+            self.breaker.record_failure()
+            retryable = idempotent
+
+        if not retryable or attempt > self.max_retries:
+            raise SpotifyUnavailableError(f'Spotify nie odpowiada poprawnie: {error}') from error
+
+        # Full jitter - rozrzucone ponowienia nie uderzają w API jednocześnie
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if time.monotonic() + delay >= end:
+            SPOTIFY_CALLS.inc(operation, 'deadline_exceeded')
+            raise SpotifyUnavailableError('Przekroczono limit czasu wywołania Spotify') from error
+        return delay
+
+    def _retry_after(self, error):
+        """Czas oczekiwania (sekundy) z nagłówka Retry-After odpowiedzi 429"""
+        headers = getattr(error, 'headers', None) or {}
+        try:
+            return max(0.0, float(headers.get('Retry-After', 1)))
+        except (TypeError, ValueError):
+            return 1.0
+
+    def _block_for(self, seconds):
+        """Wstrzymuje wywołania wszystkich wątków na podany czas"""
+        with self._lock:
+            self._not_before = max(self._not_before, time.monotonic() + seconds)
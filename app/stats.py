@@ -0,0 +1,54 @@
+"""
+Statystyki zgłoszeń dla /api/stats.
+
+Liczniki są utrzymywane przyrostowo w tabeli daily_stats (save_submission /
+update_submission), a wynik jest dodatkowo cache'owany w procesie przez
+kilka sekund. ETag pozwala przeglądarkom tanio sprawdzić, czy coś się zmieniło.
+"""
+
+import threading
+import time
+from app.database import get_daily_stats, submissions_generation
+from app.playlist_mirror import mirror_state
+
+_cache_lock = threading.Lock()
+_cache = {'expires_at': 0.0, 'generation': None, 'stats': None}
+
+def get_today_stats(ttl=5):
+    """
+    Zwraca dzisiejsze statystyki zgłoszeń.
+
+    Wynik jest ważny przez `ttl` sekund lub do zmiany zgłoszeń w tym procesie.
+
+    Returns:
+        dict: today_total, today_approved, today_rejected, today_pending,
+        playlist_tracks (liczba utworów z lustra playlisty, None przed pierwszą synchronizacją)
+    """
+    now = time.monotonic()
+    generation = submissions_generation()
+
+    with _cache_lock:
+        if _cache['stats'] is not None and _cache['expires_at'] > now and _cache['generation'] == generation:
+            return _cache['stats']
+
+    counts = get_daily_stats()
+    stats = {
+        'today_total': sum(counts.values()),
+        'today_approved': counts.get('approved', 0),
+        'today_rejected': counts.get('rejected', 0),
+        'today_pending': counts.get('pending', 0),
+        'playlist_tracks': _playlist_track_count()
+    }
+
+    with _cache_lock:
+        _cache.update(expires_at=now + ttl, generation=generation, stats=stats)
+
+    return stats
+
+def _playlist_track_count():
+    state = mirror_state()
+    return state['track_count'] if state else None
+
+def stats_etag(stats):
+    """ETag zależny tylko od wartości liczników"""
+    return '-'.join(str(stats[key]) for key in sorted(stats))
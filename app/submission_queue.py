@@ -0,0 +1,358 @@
+"""
+Asynchroniczne przetwarzanie zgłoszeń.
+
+/api/submit zapisuje zgłoszenie jako 'pending' i wrzuca jego ID do kolejki.
+Pula wątków w tle wykonuje etapy wymagające Spotify (wyszukiwanie, explicit,
+dodanie do playlisty) i aktualizuje status zgłoszenia w bazie.
+
+Kolejka w pamięci nie przeżywa restartu procesu, więc wątek w tle co
+SUBMISSION_SWEEP_INTERVAL sekund rezerwuje w bazie zgłoszenia 'pending',
+których nikt nie przejął od SUBMISSION_STALE_SECONDS, i wrzuca je do kolejki.
+Zgłoszenia czekające na ponowienie (niedostępne Spotify) odnawiają rezerwację,
+więc nie są przejmowane przez inne procesy.
+"""
+
+import queue
+import threading
+import time
+from flask import current_app
+from app.database import get_submission, update_submission, claim_stale_pending, claim_submission
+from app.spotify_client import get_spotify_client
+from app.playlist_writer import get_playlist_writer
+from app.playlist_mirror import tracks_on_playlist
+from app.spotify_resilience import SpotifyUnavailableError
+from app.metrics import SUBMIT_STAGE_SECONDS
+from app.dedup import check_known_song, is_recently_added, DUPLICATE_REASON, EXPLICIT_REASON
+
+# Ponowienia zgłoszeń, gdy Spotify jest niedostępne (opóźnienie rośnie wykładniczo)
+MAX_UNAVAILABLE_RETRIES = 10
+UNAVAILABLE_RETRY_DELAY = 15
+MAX_RETRY_DELAY = 300
+UNAVAILABLE_REASON = 'Spotify było niedostępne - spróbuj ponownie później'
+
+# Etapy przetwarzania, dla których mierzymy czas
+STAGES = ('queue_wait', 'spotify_search', 'explicit_check', 'playlist_add', 'db_save')
+
+# Blokada tworzenia kolejki (jedna na proces)
+_queue_lock = threading.Lock()
+
+def get_submission_queue():
+    """Zwraca kolejkę zgłoszeń dla bieżącej aplikacji (uruchamianą przy pierwszym użyciu)"""
+    submission_queue = current_app.extensions.get('submission_queue')
+    if submission_queue is None:
+        with _queue_lock:
+            submission_queue = current_app.extensions.get('submission_queue')
+            if submission_queue is None:
+                app = current_app._get_current_object()
+                submission_queue = SubmissionQueue(
+                    app,
+                    workers=app.config['SUBMISSION_WORKERS'],
+                    stale_after=app.config['SUBMISSION_STALE_SECONDS'],
+                    sweep_interval=app.config['SUBMISSION_SWEEP_INTERVAL']
+                )
+                submission_queue.start()
+                app.extensions['submission_queue'] = submission_queue
+    return submission_queue
+
+def ensure_submission_queue():
+    """
+    Uruchamia kolejkę z pierwszym requestem workera, jeśli zgłoszenia mogą czekać
+    jako 'pending' (tryb asynchroniczny, zapis zbiorczy, kolejkowanie przy
+    niedostępnym Spotify) - porzucone zgłoszenia wracają do kolejki bez
+    czekania na nowe.
+    """
+    config = current_app.config
+    if 'submission_queue' in current_app.extensions:
+        return
+    if config['ASYNC_SUBMISSIONS'] or config['PLAYLIST_BATCH_WRITES'] or config['SPOTIFY_QUEUE_WHEN_DOWN']:
+        get_submission_queue()
+
+class SubmissionQueue:
+    """Kolejka zgłoszeń 'pending' z pulą wątków roboczych"""
+
+    def __init__(self, app, workers=4, stale_after=600, sweep_interval=60):
+        """
+        Args:
+            app: Aplikacja Flask (kontekst dla wątków)
+            workers: Liczba wątków roboczych
+            stale_after: Po ilu sekundach bez rezerwacji zgłoszenie 'pending' uznajemy za porzucone
+            sweep_interval: Co ile sekund szukać porzuconych zgłoszeń (0 - wyłączone)
+        """
+        self.app = app
+        self.workers = workers
+        self.stale_after = stale_after
+        self.sweep_interval = sweep_interval
+
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._threads = []
+        self._sweeper = None
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stage_stats = {stage: {'count': 0, 'total': 0.0, 'max': 0.0} for stage in STAGES}
+        self._unavailable_retries = {}
+        self.processed = 0
+        self.failed = 0
+        self.deferred = 0
+        self.requeued = 0
+
+    def start(self):
+        """Uruchamia wątki robocze i wyszukiwanie porzuconych zgłoszeń"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f'submission-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        if self.sweep_interval > 0:
+            self._sweeper = threading.Thread(target=self._sweep_loop, name='submission-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def enqueue(self, submission_id):
+        """Dodaje zgłoszenie do kolejki (pomija zgłoszenie, które już w niej czeka)"""
+        with self._stats_lock:
+            if submission_id in self._queued:
+                return
+            self._queued.add(submission_id)
+        self._queue.put((submission_id, time.perf_counter()))
+
+    def requeue_stale(self):
+        """
+        Wrzuca do kolejki porzucone zgłoszenia 'pending' (rezerwacja w bazie -
+        przy kilku procesach każde zgłoszenie trafia tylko do jednego).
+
+        Returns:
+            int: Liczba zgłoszeń dodanych do kolejki
+        """
+        ids = claim_stale_pending(time.time() - self.stale_after)
+        for submission_id in ids:
+            self.enqueue(submission_id)
+
+        if ids:
+            current_app.logger.warning(f"Wznowiono {len(ids)} porzuconych zgłoszeń 'pending'")
+            with self._stats_lock:
+                self.requeued += len(ids)
+        return len(ids)
+
+    def depth(self):
+        """Liczba zgłoszeń czekających w kolejce"""
+        return self._queue.qsize()
+
+    def shutdown(self, timeout=30):
+        """Przetwarza zgłoszenia pozostałe w kolejce i zatrzymuje wątki"""
+        self._stopping.set()
+
+        threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+
+        deadline = time.monotonic() + timeout
+        if self._sweeper is not None:
+            threads.append(self._sweeper)
+        for thread in threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def stats(self):
+        """Zwraca głębokość kolejki i czasy etapów (w milisekundach)"""
+        with self._stats_lock:
+            stages = {
+                stage: {
+                    'count': data['count'],
+                    'avg_ms': round(data['total'] / data['count'] * 1000, 2) if data['count'] else 0.0,
+                    'max_ms': round(data['max'] * 1000, 2)
+                }
+                for stage, data in self._stage_stats.items()
+            }
+            return {
+                'queue_depth': self.depth(),
+                'workers': len(self._threads),
+                'processed': self.processed,
+                'failed': self.failed,
+                'deferred': self.deferred,
+                'requeued': self.requeued,
+                'stages': stages
+            }
+
+    def _record(self, stage, started):
+        """Zapisuje czas trwania etapu"""
+        elapsed = time.perf_counter() - started
+        SUBMIT_STAGE_SECONDS.observe(elapsed, stage)
+        with self._stats_lock:
+            data = self._stage_stats[stage]
+            data['count'] += 1
+            data['total'] += elapsed
+            data['max'] = max(data['max'], elapsed)
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+
+                submission_id, enqueued_at = item
+                self._record('queue_wait', enqueued_at)
+                with self._stats_lock:
+                    self._queued.discard(submission_id)
+
+                with self.app.app_context():
+                    try:
+                        self._process(submission_id)
+                    except SpotifyUnavailableError as e:
+                        self._defer(submission_id, e)
+                    except Exception as e:
+                        current_app.logger.error(f"Błąd przetwarzania zgłoszenia {submission_id}: {e}")
+                        update_submission(submission_id, 'rejected', rejection_reason='Błąd przetwarzania zgłoszenia')
+                        with self._stats_lock:
+                            self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    def _sweep_loop(self):
+        # Pierwsze sprawdzenie od razu - zgłoszenia porzucone przed restartem
+        while True:
+            with self.app.app_context():
+                try:
+                    self.requeue_stale()
+                except Exception as e:
+                    current_app.logger.error(f"Błąd wyszukiwania porzuconych zgłoszeń: {e}")
+
+            if self._stopping.wait(self.sweep_interval):
+                return
+
+    def _defer(self, submission_id, error):
+        """
+        Spotify niedostępne - zgłoszenie zostaje 'pending' i wraca do kolejki
+        po opóźnieniu. Po MAX_UNAVAILABLE_RETRIES próbach zostaje odrzucone.
+        """
+        with self._stats_lock:
+            attempt = self._unavailable_retries.get(submission_id, 0) + 1
+            if attempt > MAX_UNAVAILABLE_RETRIES:
+                self._unavailable_retries.pop(submission_id, None)
+                self.failed += 1
+            else:
+                self._unavailable_retries[submission_id] = attempt
+                self.deferred += 1
+
+        if attempt > MAX_UNAVAILABLE_RETRIES:
+            current_app.logger.error(f"Zgłoszenie {submission_id} odrzucone - Spotify niedostępne: {error}")
+            update_submission(submission_id, 'rejected', rejection_reason=UNAVAILABLE_REASON)
+            return
+
+        delay = min(MAX_RETRY_DELAY, UNAVAILABLE_RETRY_DELAY * 2 ** (attempt - 1))
+        current_app.logger.warning(f"Spotify niedostępne, zgłoszenie {submission_id} wraca do kolejki za {delay}s: {error}")
+
+        # Timer jest tylko w pamięci - po restarcie zgłoszenie podejmie wyszukiwanie porzuconych
+        claim_submission(submission_id)
+
+        timer = threading.Timer(delay, self.enqueue, [submission_id])
+        timer.daemon = True
+        timer.start()
+
+    def _process(self, submission_id):
+        """Wykonuje etapy Spotify dla jednego zgłoszenia"""
+        submission = get_submission(submission_id)
+        if not submission or submission['status'] != 'pending':
+            return
+
+        if submission['spotify_track_uri']:
+            # Utwór już wyszukany, przerwany zapis zbiorczy (restart) - writer pominie
+            # utwór, jeśli zapis zdążył się wykonać
+            get_playlist_writer().submit(
+                submission_id, submission['spotify_track_uri'], submission['spotify_track_id']
+            )
+            with self._stats_lock:
+                self.processed += 1
+            return
+
+        spotify = get_spotify_client()
+
+        window_days = self.app.config['DUPLICATE_WINDOW_DAYS']
+        _, known_track = check_known_song(submission['fingerprint'], 0)
+
+        started = time.perf_counter()
+        track = known_track or spotify.search_track(submission['artist'], submission['title'])
+        self._record('spotify_search', started)
+
+        if not track:
+            self._finish(submission_id, 'rejected', rejection_reason='Nie znaleziono utworu na Spotify')
+            return
+
+        if is_recently_added(track['id'], window_days):
+            self._finish(
+                submission_id,
+                'rejected',
+                rejection_reason=DUPLICATE_REASON,
+                spotify_track_id=track['id'],
+                spotify_track_uri=track['uri']
+            )
+            return
+
+        started = time.perf_counter()
+        is_explicit = spotify.is_track_explicit(track)
+        self._record('explicit_check', started)
+
+        if is_explicit:
+            self._finish(
+                submission_id,
+                'rejected',
+                rejection_reason=EXPLICIT_REASON,
+                spotify_track_id=track['id'],
+                spotify_track_uri=track['uri']
+            )
+            return
+
+        track_info = spotify.get_track_info(track)
+
+        if self.app.config.get('PLAYLIST_BATCH_WRITES'):
+            # Zapis zbiorczy - status 'approved'/'rejected' ustawi PlaylistWriter
+            started = time.perf_counter()
+            update_submission(
+                submission_id,
+                'pending',
+                artist=track_info['artist'],
+                title=track_info['name'],
+                spotify_track_id=track_info['id'],
+                spotify_track_uri=track_info['uri'],
+                duration_ms=track_info['duration_ms']
+            )
+            self._record('db_save', started)
+
+            get_playlist_writer().submit(submission_id, track_info['uri'], track_info['id'])
+            with self._stats_lock:
+                self.processed += 1
+            return
+
+        # Dodanie nie jest idempotentne - po odroczeniu (błąd o nieznanym wyniku) utwór mógł już trafić
+        # na playlistę; SpotifyUnavailableError z add_to_playlist odracza zgłoszenie (_defer)
+        if track['id'] in tracks_on_playlist([track['id']]):
+            success = True
+        else:
+            started = time.perf_counter()
+            success = spotify.add_to_playlist(track['uri'])
+            self._record('playlist_add', started)
+
+        if not success:
+            self._finish(submission_id, 'rejected', rejection_reason='Błąd podczas dodawania do playlisty')
+            return
+
+        self._finish(
+            submission_id,
+            'approved',
+            artist=track_info['artist'],
+            title=track_info['name'],
+            spotify_track_id=track_info['id'],
+            spotify_track_uri=track_info['uri'],
+            duration_ms=track_info['duration_ms']
+        )
+
+    def _finish(self, submission_id, status, **fields):
+        """Zapisuje wynik przetwarzania"""
+        with self._stats_lock:
+            self._unavailable_retries.pop(submission_id, None)
+
+        started = time.perf_counter()
+        update_submission(submission_id, status, **fields)
+        self._record('db_save', started)
+
+        with self._stats_lock:
+            self.processed += 1
@@ -0,0 +1,139 @@
+"""
+Ograniczanie liczby requestów (token bucket) per IP i per adres email.
+
+Dwa backendy:
+- 'memory' - kubełki w pamięci procesu (LRU z limitem kluczy),
+- 'sqlite' - kubełki w tabeli rate_buckets, współdzielone przez wszystkie
+  procesy (workery gunicorna) korzystające z tej samej bazy.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from app.database import consume_rate_bucket, purge_rate_buckets
+
+def parse_limit(value):
+    """Parsuje limit w formacie 'liczba/sekundy' (np. '5/3600') do (capacity, period)"""
+    count, _, period = str(value).partition('/')
+    return int(count), float(period or 1)
+
+class TokenBucketLimiter:
+    """Kubełki tokenów trzymane w pamięci procesu"""
+
+    def __init__(self, capacity, period, max_keys=10000):
+        """
+        Args:
+            capacity: Maksymalna liczba requestów "na raz" (pojemność kubełka)
+            period: Czas (sekundy) pełnego odnowienia kubełka
+            max_keys: Maksymalna liczba śledzonych kluczy (najstarsze są usuwane)
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.max_keys = max_keys
+
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost=1):
+        """
+        Pobiera token dla klucza.
+
+        Returns:
+            0 jeśli request jest dozwolony, w przeciwnym razie liczba sekund do odczekania
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0
+            else:
+                retry_after = (cost - tokens) / self.rate
+
+            self._buckets[key] = (tokens, now)
+            self._evict(now)
+
+        return retry_after
+
+    def _evict(self, now):
+        """Usuwa bezczynne kubełki (już pełne) i nadmiarowe klucze (wywoływane pod blokadą)"""
+        full_after = self.capacity / self.rate
+
+        while self._buckets:
+            key, (tokens, updated_at) = next(iter(self._buckets.items()))
+            if len(self._buckets) > self.max_keys or now - updated_at >= full_after:
+                del self._buckets[key]
+            else:
+                break
+
+    def __len__(self):
+        return len(self._buckets)
+
+class SQLiteTokenBucketLimiter:
+    """Kubełki tokenów w bazie SQLite (wspólne dla wielu procesów)"""
+
+    def __init__(self, name, capacity, period):
+        self.name = name
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+        self._calls = 0
+
+    def allow(self, key, cost=1):
+        """Jak TokenBucketLimiter.allow, ale stan jest w tabeli rate_buckets"""
+        now = time.time()
+        retry_after = consume_rate_bucket(f"{self.name}:{key}", self.capacity, self.rate, cost, now)
+
+        # Amortyzowane sprzątanie - kubełek bezczynny dłużej niż period jest pełny
+        self._calls += 1
+        if self._calls % 1000 == 0:
+            purge_rate_buckets(f"{self.name}:", now - self.period)
+
+        return retry_after
+
+class Throttle:
+    """Zestaw nazwanych limitów (np. 'request_code_ip', 'submit_email')"""
+
+    def __init__(self, limits, backend='memory', max_keys=10000):
+        """
+        Args:
+            limits: Słownik nazwa -> (capacity, period)
+            backend: 'memory' lub 'sqlite'
+            max_keys: Limit kluczy na limiter (tylko backend 'memory')
+        """
+        self.limiters = {}
+        for name, (capacity, period) in limits.items():
+            if backend == 'sqlite':
+                self.limiters[name] = SQLiteTokenBucketLimiter(name, capacity, period)
+            else:
+                self.limiters[name] = TokenBucketLimiter(capacity, period, max_keys=max_keys)
+
+    @classmethod
+    def from_config(cls, config):
+        """Tworzy limity na podstawie konfiguracji aplikacji"""
+        limits = {
+            'request_code_ip': parse_limit(config['THROTTLE_REQUEST_CODE_IP']),
+            'request_code_email': parse_limit(config['THROTTLE_REQUEST_CODE_EMAIL']),
+            'submit_ip': parse_limit(config['THROTTLE_SUBMIT_IP']),
+            'submit_email': parse_limit(config['THROTTLE_SUBMIT_EMAIL'])
+        }
+        return cls(limits, backend=config['THROTTLE_BACKEND'], max_keys=config['THROTTLE_MAX_KEYS'])
+
+    def check(self, name, key):
+        """
+        Sprawdza limit dla klucza.
+
+        Returns:
+            0 jeśli dozwolone, w przeciwnym razie liczba sekund (zaokrąglona w górę) do odczekania
+        """
+        limiter = self.limiters.get(name)
+        if limiter is None or not key:
+            return 0
+
+        retry_after = limiter.allow(key)
+        return math.ceil(retry_after) if retry_after else 0
@@ -0,0 +1,156 @@
+"""
+Cache tokenu OAuth Spotify.
+
+Dwa backendy:
+- 'sqlite' - tabela shared_state (domyślny): wszystkie procesy czytają ten sam
+  token, a odświeża go tylko jeden z nich (dzierżawa w bazie); pozostałe
+  czekają na nowy token zamiast wysyłać własne żądania do Spotify,
+- 'file' - plik .spotify_cache czytany raz na proces (tylko dla wdrożeń
+  z jednym procesem - workery odświeżają token niezależnie i nadpisują plik).
+
+Plik .spotify_cache pozostaje źródłem tokenu z ręcznej autoryzacji: backend
+'sqlite' importuje go, gdy w bazie nie ma tokenu albo plik jest nowszy.
+"""
+
+import json
+import os
+import secrets
+import time
+from spotipy.cache_handler import CacheFileHandler
+from app.database import acquire_state_lease, get_shared_state, release_state_lease, set_shared_state
+
+# Klucz tokenu w tabeli shared_state
+TOKEN_KEY = 'spotify_token'
+
+# Spotipy uznaje token za wygasły na minutę przed expires_at (is_token_expired)
+EXPIRY_MARGIN = 60
+
+def create_token_cache(config):
+    """Tworzy cache tokenu na podstawie konfiguracji aplikacji"""
+    if config['SPOTIFY_TOKEN_BACKEND'] == 'file':
+        return MemoryTokenCache(config['SPOTIFY_CACHE_PATH'])
+
+    return SharedTokenCache(config['SPOTIFY_CACHE_PATH'], lease_ttl=config['SPOTIFY_TOKEN_LEASE'])
+
+def _is_fresh(token_info):
+    """Odwrotność SpotifyOAuth.is_token_expired (to samo zaokrąglenie czasu)"""
+    return bool(token_info) and token_info['expires_at'] - int(time.time()) >= EXPIRY_MARGIN
+
+class MemoryTokenCache(CacheFileHandler):
+    """
+    Cache tokenu trzymany w pamięci.
+
+    Plik .spotify_cache jest czytany tylko raz, a zapisywany tylko po
+    odświeżeniu tokenu - zamiast odczytu z dysku przy każdym wywołaniu API.
+    """
+
+    def __init__(self, cache_path):
+        super().__init__(cache_path=cache_path)
+        self._token_info = None
+        self._loaded = False
+
+    def get_cached_token(self):
+        if not self._loaded:
+            self._token_info = super().get_cached_token()
+            self._loaded = True
+        return self._token_info
+
+    def save_token_to_cache(self, token_info):
+        self._token_info = token_info
+        self._loaded = True
+        super().save_token_to_cache(token_info)
+
+class SharedTokenCache(CacheFileHandler):
+    """Token w tabeli shared_state, wspólny dla wszystkich procesów aplikacji"""
+
+    def __init__(self, cache_path, lease_ttl=15, poll_interval=0.1):
+        """
+        Args:
+            cache_path: Plik .spotify_cache (import tokenu z ręcznej autoryzacji)
+            lease_ttl: Czas dzierżawy odświeżania (sekundy) - po tym czasie inny
+                proces przejmuje odświeżenie, jeśli lider nie zdążył
+            poll_interval: Co ile sekund sprawdzać, czy lider zapisał nowy token
+        """
+        super().__init__(cache_path=cache_path)
+        self.lease_ttl = lease_ttl
+        self.poll_interval = poll_interval
+        self.owner = f'{os.getpid()}-{secrets.token_hex(4)}'
+
+        self._token_info = None
+
+        self.refreshes = 0
+        self.waits = 0
+
+    def get_cached_token(self):
+        """Token z pamięci procesu; z bazy dopiero, gdy zbliża się jego wygaśnięcie"""
+        token_info = self._token_info
+        if _is_fresh(token_info):
+            return token_info
+        return self.reload()
+
+    def reload(self):
+        """Czyta token z bazy (lub importuje nowszy plik .spotify_cache)"""
+        state = get_shared_state(TOKEN_KEY)
+        token_info = json.loads(state['value']) if state else None
+
+        if self._file_is_newer(state):
+            file_token = super().get_cached_token()
+            if file_token:
+                set_shared_state(TOKEN_KEY, json.dumps(file_token))
+                token_info = file_token
+
+        if token_info:
+            self._token_info = token_info
+        return token_info
+
+    def _file_is_newer(self, state):
+        try:
+            modified = os.path.getmtime(self.cache_path)
+        except OSError:
+            return False
+        return state is None or modified > state['updated_at']
+
+    def save_token_to_cache(self, token_info):
+        """Zapis po odświeżeniu - od razu widoczny dla innych procesów"""
+        set_shared_state(TOKEN_KEY, json.dumps(token_info))
+        self._token_info = token_info
+
+    def refresh(self, refresh_access_token, refresh_token):
+        """
+        Odświeża token jako lider albo czeka, aż odświeży go inny proces.
+
+        Args:
+            refresh_access_token: Funkcja wysyłająca żądanie do Spotify
+                (zapisuje nowy token przez save_token_to_cache)
+            refresh_token: Refresh token z tokenu, który wygasł
+
+        Returns:
+            dict: Nowy token
+        """
+        # Po czasie dzierżawy inny proces ją przejmuje - dłuższe czekanie oznacza problem z bazą
+        deadline = time.monotonic() + 2 * self.lease_ttl
+        waited = False
+
+        while True:
+            token_info = self.reload()
+            if _is_fresh(token_info):
+                if waited:
+                    self.waits += 1
+                return token_info
+
+            if token_info and token_info.get('refresh_token'):
+                refresh_token = token_info['refresh_token']  # Spotify mógł wydać nowy
+
+            if acquire_state_lease(TOKEN_KEY, self.owner, self.lease_ttl):
+                try:
+                    token_info = refresh_access_token(refresh_token)
+                    self.refreshes += 1
+                    return token_info
+                finally:
+                    release_state_lease(TOKEN_KEY, self.owner)
+
+            if time.monotonic() >= deadline:
+                return refresh_access_token(refresh_token)
+
+            waited = True
+            time.sleep(self.poll_interval)
@@ -0,0 +1,131 @@
+"""
+Wybór utworu spośród wyników wyszukiwania Spotify.
+
+Spotify jest pytane o kilka kandydatów naraz, a najlepszy wybieramy lokalnie
+na podstawie podobieństwa znormalizowanego wykonawcy i tytułu. Normalizacja
+usuwa polskie znaki, dopiski "feat." oraz sufiksy wersji ("Remastered 2011",
+"Radio Edit"), więc "Podsiadlo - Nie ma fal (feat. X)" trafia w ten sam utwór
+co "Dawid Podsiadło - Nie Ma Fal".
+
+Jeśli ścisłe zapytanie (artist:/track:) nic nie znajdzie, szukamy jeszcze raz
+luźnym zapytaniem tekstowym - zamiast odrzucać zgłoszenie i czekać, aż
+uczeń spróbuje ponownie z inną pisownią.
+"""
+
+import re
+from difflib import SequenceMatcher
+from app.utils import normalize_text
+
+# Waga tytułu i wykonawcy w ocenie kandydata
+TITLE_WEIGHT = 0.6
+ARTIST_WEIGHT = 0.4
+
+# O ile gorzej może wypaść wersja bez explicit, żeby nadal była wybrana
+EXPLICIT_TOLERANCE = 0.1
+
+_FEATURING = r'(?:feat|ft|featuring|with)\b'
+_VERSION = (
+    r'(?:re-?master(?:ed)?|remaster(?:ed)?|radio edit|single version|album version|'
+    r'original mix|clean|explicit|mono|stereo|deluxe(?: edition)?|bonus track)'
+)
+
+# "(feat. X)", "[Remastered 2009]"
+_BRACKETED_TAG = re.compile(rf'[(\[][^)\]]*\b(?:{_FEATURING}|{_VERSION})[^)\]]*[)\]]', re.IGNORECASE)
+# "- Remastered 2011", "- Radio Edit"
+_DASH_TAG = re.compile(rf'\s+-\s+[^-]*\b{_VERSION}\b.*$', re.IGNORECASE)
+# "Wykonawca feat. Gość" (bez nawiasów - do końca napisu)
+_TRAILING_FEATURING = re.compile(r'\s+(?:feat|ft|featuring)\b\.?\s.*$', re.IGNORECASE)
+
+def strip_tags(text):
+    """Usuwa dopiski feat. i sufiksy wersji (bez zmiany wielkości liter i znaków)"""
+    text = text or ''
+    text = _BRACKETED_TAG.sub(' ', text)
+    text = _DASH_TAG.sub('', text)
+    text = _TRAILING_FEATURING.sub('', text)
+    return ' '.join(text.split())
+
+def normalize(text):
+    """Postać do porównań: jak utils.normalize_text, dodatkowo bez dopisków feat. i wersji"""
+    return normalize_text(strip_tags(text))
+
+def similarity(a, b):
+    """
+    Podobieństwo dwóch znormalizowanych napisów (0-1).
+
+    Większa z dwóch miar: podobieństwo znaków (literówki) oraz wspólne słowa
+    (inna kolejność, pominięte słowo).
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+
+    ratio = SequenceMatcher(None, a, b).ratio()
+    a_words, b_words = set(a.split()), set(b.split())
+    overlap = len(a_words & b_words) / max(len(a_words), len(b_words))
+    return max(ratio, overlap)
+
+def score_track(track, artist, title):
+    """
+    Ocenia kandydata względem zgłoszenia.
+
+    Args:
+        track: Obiekt utworu ze Spotify
+        artist, title: Znormalizowany wykonawca i tytuł ze zgłoszenia
+
+    Returns:
+        float: Ocena 0-1
+    """
+    names = [normalize(a['name']) for a in track.get('artists') or []]
+    # Zgłoszenie może wymieniać kilku wykonawców naraz ("Taco Hemingway, Dawid Podsiadło")
+    artist_score = max([similarity(artist, name) for name in names] + [similarity(artist, ' '.join(names))])
+    title_score = similarity(title, normalize(track.get('name')))
+
+    return TITLE_WEIGHT * title_score + ARTIST_WEIGHT * artist_score
+
+def pick_best(candidates, artist, title, min_score):
+    """
+    Wybiera najlepiej pasujący utwór.
+
+    Jeśli najlepszy kandydat jest explicit, a prawie równie dobrze pasuje wersja
+    bez explicit (np. "Clean" lub "Radio Edit"), wybierana jest ta druga.
+
+    Args:
+        candidates: Lista utworów ze Spotify
+        artist, title: Wykonawca i tytuł ze zgłoszenia
+        min_score: Minimalna ocena, poniżej której kandydat jest odrzucany
+
+    Returns:
+        dict utworu lub None
+    """
+    artist, title = normalize(artist), normalize(title)
+    scored = sorted(
+        ((score_track(track, artist, title), index, track) for index, track in enumerate(candidates) if track),
+        key=lambda item: (-item[0], item[1])
+    )
+    if not scored or scored[0][0] < min_score:
+        return None
+
+    best_score, _, best = scored[0]
+    if best.get('explicit'):
+        for score, _, track in scored[1:]:
+            if score < max(min_score, best_score - EXPLICIT_TOLERANCE):
+                break
+            if not track.get('explicit'):
+                return track
+
+    return best
+
+def search_queries(artist, title):
+    """
+    Zapytania do Spotify w kolejności prób.
+
+    Returns:
+        Lista krotek (nazwa, zapytanie) - ścisłe zapytanie po polach
+        i luźne zapytanie tekstowe bez dopisków
+    """
+    relaxed = f"{strip_tags(artist)} {strip_tags(title)}".strip()
+    return [
+        ('strict', f"artist:{artist} track:{title}"),
+        ('relaxed', relaxed)
+    ]
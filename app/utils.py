@@ -1,19 +1,51 @@
 import hashlib
 import re
-from flask import current_app
+import time
+import unicodedata
+from datetime import datetime, timedelta
 
 def hash_email(email):
     """Hashuje email dla prywatności (SHA256)"""
     return hashlib.sha256(email.lower().encode()).hexdigest()
 
-def validate_school_email(email):
-    """Sprawdza czy email jest z domeny szkolnej"""
-    domain = current_app.config.get('SCHOOL_EMAIL_DOMAIN', 'zspbytow.pl')
-    pattern = rf'^[a-zA-Z0-9._%+-]+@{re.escape(domain)}$'
-    return bool(re.match(pattern, email.lower()))
-
 def sanitize_input(text):
     """Oczyszcza input użytkownika"""
     if not text:
         return ''
     return text.strip()[:200]  # Max 200 znaków
+
+def fold_text(text):
+    """Małe litery, bez znaków diakrytycznych (NFKD - także znaki pełnej szerokości i ligatury)"""
+    if not text or text.isascii():
+        return (text or '').lower()
+    text = unicodedata.normalize('NFKD', (text or '').casefold().replace('ł', 'l'))
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+def normalize_text(text):
+    """
+    Normalizuje tekst do porównań: małe litery, bez polskich znaków
+    diakrytycznych i interpunkcji, pojedyncze spacje.
+    """
+    return ' '.join(re.sub(r'[\W_]+', ' ', fold_text(text)).split())
+
+def song_fingerprint(artist, title):
+    """Odcisk piosenki (znormalizowany wykonawca i tytuł) do wykrywania duplikatów"""
+    return f"{normalize_text(artist)}|{normalize_text(title)}"
+
+def parse_day(value, next_day=False):
+    """
+    Zamienia datę 'RRRR-MM-DD' (czas lokalny) na znacznik epoch początku dnia.
+
+    Args:
+        next_day: Początek dnia następnego (koniec zakresu "do" włącznie)
+
+    Raises:
+        ValueError: Nieprawidłowy format daty
+    """
+    if not value:
+        return None
+
+    day = datetime.strptime(value, '%Y-%m-%d')
+    if next_day:
+        day += timedelta(days=1)
+    return int(time.mktime(day.timetuple()))
@@ -0,0 +1,103 @@
+"""
+Magazyn kodów weryfikacyjnych.
+
+Dwa backendy:
+- 'sqlite' - tabela verification_codes (domyślny, działa z wieloma workerami),
+- 'memory' - słownik w pamięci procesu z TTL (tylko dla wdrożeń z jednym
+  procesem - kod zapisany w jednym workerze nie jest widoczny w innych).
+"""
+
+import hmac
+import threading
+import time
+from flask import current_app
+from app.database import save_verification_code, verify_code
+
+def create_code_store(config):
+    """Tworzy magazyn kodów na podstawie konfiguracji aplikacji"""
+    if config['VERIFICATION_BACKEND'] == 'memory':
+        return MemoryCodeStore(
+            max_per_email=config['VERIFICATION_MAX_CODES_PER_EMAIL'],
+            purge_every=config['VERIFICATION_PURGE_EVERY']
+        )
+
+    return SQLiteCodeStore(
+        max_per_email=config['VERIFICATION_MAX_CODES_PER_EMAIL'],
+        purge_every=config['VERIFICATION_PURGE_EVERY']
+    )
+
+def get_code_store():
+    """Zwraca magazyn kodów bieżącej aplikacji"""
+    return current_app.extensions['code_store']
+
+class SQLiteCodeStore:
+    """Kody w tabeli verification_codes"""
+
+    def __init__(self, max_per_email=3, purge_every=100):
+        self.max_per_email = max_per_email
+        self.purge_every = purge_every
+
+    def save(self, email, code, expires_minutes=10):
+        save_verification_code(
+            email,
+            code,
+            expires_minutes=expires_minutes,
+            max_per_email=self.max_per_email,
+            purge_every=self.purge_every
+        )
+
+    def verify(self, email, code):
+        return verify_code(email, code)
+
+class MemoryCodeStore:
+    """Kody w pamięci procesu: email -> lista (kod, czas wygaśnięcia)"""
+
+    def __init__(self, max_per_email=3, purge_every=100):
+        self.max_per_email = max_per_email
+        self.purge_every = purge_every
+
+        self._codes = {}
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def save(self, email, code, expires_minutes=10):
+        expires_at = time.monotonic() + expires_minutes * 60
+
+        with self._lock:
+            codes = self._codes.setdefault(email, [])
+            codes.append((code, expires_at))
+            del codes[:-self.max_per_email]
+
+            self._saves += 1
+            if self.purge_every and self._saves % self.purge_every == 0:
+                self._purge()
+
+    def verify(self, email, code):
+        now = time.monotonic()
+
+        with self._lock:
+            codes = self._codes.get(email, [])
+            for i in range(len(codes) - 1, -1, -1):
+                stored_code, expires_at = codes[i]
+                if expires_at > now and hmac.compare_digest(stored_code.encode(), code.encode()):
+                    # Kod jednorazowy - usuń po użyciu
+                    del codes[i]
+                    if not codes:
+                        del self._codes[email]
+                    return True
+
+        return False
+
+    def _purge(self):
+        """Usuwa wygasłe kody (wywoływane pod blokadą)"""
+        now = time.monotonic()
+
+        for email in list(self._codes):
+            codes = [entry for entry in self._codes[email] if entry[1] > now]
+            if codes:
+                self._codes[email] = codes
+            else:
+                del self._codes[email]
+
+    def __len__(self):
+        return sum(len(codes) for codes in self._codes.values())
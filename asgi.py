@@ -0,0 +1,5 @@
+"""Punkt wejścia ASGI (uvicorn asgi:app) - asynchroniczne zgłoszenia, reszta przez Flask"""
+
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
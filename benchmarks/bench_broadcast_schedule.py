@@ -0,0 +1,192 @@
+"""
+Symulacja tygodnia planu emisji w przerwach (bez Spotify i bazy).
+
+Zgłoszenia przychodzą w godzinach lekcji, każde od razu trafia na koniec
+playlisty (jak przez writer), a po każdym zgłoszeniu i każdej przerwie
+wykonywany jest cykl planowania. Porównuje:
+- plan przyrostowy (BroadcastScheduler): nowe utwory dopisywane do istniejącego
+  planu, zaplanowane się nie przesuwają,
+- plan liczony od nowa w każdym cyklu (first fit decreasing - najdłuższe utwory
+  najpierw).
+
+Dla obu podaje czas cyklu, wykorzystanie przerw, średnie czekanie na emisję
+i liczbę wywołań Spotify potrzebnych do ustawienia playlisty: według
+plan_playlist_update, przy zastępowaniu całej playlisty i przy przenoszeniu
+każdego utworu osobno. Plan od nowa trochę lepiej wypełnia przerwy i skraca
+czekanie, ale w każdym cyklu przestawia zaplanowane już utwory - plan
+widoczny w panelu admina ciągle się zmienia, a playlista wymaga więcej wywołań.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_broadcast_schedule.py [zgłoszeń_dziennie]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.broadcast_schedule import (
+    FREEZE_SECONDS, PLAYLIST_BATCH, BreakCalendar, BroadcastPlan, QueuedTrack, _increasing_run, plan_playlist_update,
+    playlist_order
+)
+
+BREAKS = '08:45-08:55,09:40-09:50,10:35-10:50,11:35-11:45,12:30-12:40,13:25-13:35'
+SPACING = 3
+HORIZON_DAYS = 3
+INITIAL_PLAYLIST = 200
+
+def submissions(per_day, monday, rng):
+    """Zgłoszenia z tygodnia: (czas, utwór) - popularni wykonawcy powtarzają się częściej"""
+    artists = [f'Wykonawca {i}' for i in range(60)]
+    weights = [1 / (rank + 1) for rank in range(len(artists))]
+
+    events = []
+    for day in range(5):
+        start = datetime.combine(monday + timedelta(days=day), datetime.min.time()).timestamp() + 7 * 3600
+        for _ in range(per_day):
+            events.append(start + rng.uniform(0, 8 * 3600))
+    events.sort()
+
+    tracks = []
+    for submission_id, ts in enumerate(events, 1):
+        artist = rng.choices(artists, weights)[0]
+        if rng.random() < 0.1:
+            artist += f', {rng.choice(artists)}'
+        tracks.append((ts, QueuedTrack(
+            submission_id, f'id{submission_id}', f'spotify:track:{submission_id}', artist,
+            rng.randrange(150, 330) * 1000, int(ts)
+        )))
+    return tracks
+
+class Simulation:
+    """Kolejka emisji i playlista w pamięci - jeden cykl jak BroadcastScheduler.tick"""
+
+    def __init__(self, calendar, incremental):
+        self.calendar = calendar
+        self.incremental = incremental
+        self.queued = {}
+        self.aired = []
+        self.playlist = [f'spotify:track:old{i}' for i in range(INITIAL_PLAYLIST)]
+        self.plan_seconds = 0.0
+        self.ticks = 0
+        self.calls = {'plan': 0, 'replace': 0, 'single': 0}
+
+    def submit(self, track):
+        self.queued[track.submission_id] = track
+        self.playlist.append(track.track_uri)
+
+    def tick(self, now):
+        self.ticks += 1
+        for track in list(self.queued.values()):
+            if track.break_start is not None and track.break_end <= now:
+                self.aired.append(track)
+                del self.queued[track.submission_id]
+
+        started = time.perf_counter()
+        plan = self.update_plan(now)
+        self.plan_seconds += time.perf_counter() - started
+
+        self.now = now
+        self.apply(plan)
+
+    def update_plan(self, now):
+        today = datetime.combine(date.fromtimestamp(now), datetime.min.time()).timestamp()
+        plan = BroadcastPlan(self.calendar.upcoming(today, HORIZON_DAYS), spacing=SPACING)
+        not_before = now + FREEZE_SECONDS
+
+        # Dzisiejsze wyemitowane utwory - kontekst dla odstępu wykonawców
+        for track in sorted(self.aired, key=lambda t: (t.break_start, t.slot)):
+            if track.break_start in plan:
+                plan.load(track)
+
+        waiting = []
+        for track in sorted(self.queued.values(), key=lambda t: (t.break_start or 0, t.slot or 0)):
+            # Od nowa - zostają tylko utwory z przerw, które już się zaczynają
+            if track.break_start in plan and (self.incremental or track.break_start < not_before):
+                plan.load(track)
+            else:
+                waiting.append(track)
+
+        if self.incremental:
+            waiting.sort(key=lambda t: (t.submitted_ts, t.submission_id))
+        else:
+            waiting.sort(key=lambda t: t.duration_ms, reverse=True)
+
+        for track in waiting:
+            track.break_start = None
+            plan.place(track, not_before)
+
+        for index, (_, end) in enumerate(plan.windows):
+            for slot, track in enumerate(plan.slots[index]):
+                track.slot = slot
+                track.break_end = end
+        return plan
+
+    def apply(self, plan):
+        order = playlist_order(self.playlist, [track.track_uri for track in plan.tracks(after=self.now)])
+        kind, moves = plan_playlist_update(order)
+        if kind is None:
+            return
+
+        self.calls['plan'] += len(moves) if kind == 'reorder' else -(-len(order) // PLAYLIST_BATCH)
+        self.calls['replace'] += -(-len(order) // PLAYLIST_BATCH)
+        # Po jednym utworze - przenoszone wszystkie spoza najdłuższego rosnącego podciągu
+        self.calls['single'] += len(order) - len(_increasing_run(order))
+        self.playlist = [self.playlist[position] for position in order]
+
+    def report(self, label, calendar, monday):
+        week = [
+            window for day in range(5)
+            for window in calendar.upcoming(
+                datetime.combine(monday + timedelta(days=day), datetime.min.time()).timestamp(), 0
+            )
+        ]
+        break_ms = sum(end - start for start, end in week) * 1000
+        aired_ms = sum(track.duration_ms for track in self.aired)
+        wait_h = sum(track.break_start - track.submitted_ts for track in self.aired) / max(len(self.aired), 1) / 3600
+
+        print(f"{label:<12} {self.plan_seconds / self.ticks * 1e3:9.2f} {len(self.aired):>9} "
+              f"{aired_ms / break_ms:10.0%} {wait_h:9.1f} {spacing_violations(self.aired):>8} "
+              f"{self.calls['plan']:>9} {self.calls['replace']:>9} {self.calls['single']:>9}")
+
+def spacing_violations(aired):
+    """Utwory tego samego wykonawcy bliżej niż SPACING w emisji jednego dnia"""
+    violations = 0
+    by_day = {}
+    for track in sorted(aired, key=lambda t: (t.break_start, t.slot)):
+        by_day.setdefault(date.fromtimestamp(track.break_start), []).append(track)
+    for tracks in by_day.values():
+        for index, track in enumerate(tracks):
+            violations += any(track.artists & other.artists for other in tracks[index + 1:index + 1 + SPACING])
+    return violations
+
+def main(per_day=15):
+    calendar = BreakCalendar.from_config({'BROADCAST_BREAKS': BREAKS, 'BROADCAST_DAYS': '1,2,3,4,5'})
+    today = date.today()
+    monday = today + timedelta(days=7 - today.weekday())
+
+    print(f"{per_day} zgłoszeń dziennie, {len(calendar.breaks)} przerw dziennie, playlista startowa "
+          f"{INITIAL_PLAYLIST} utworów\n")
+    print(f"{'plan':<12} {'cykl ms':>9} {'wyemit.':>9} {'przerwy':>10} {'czeka h':>9} {'odstęp':>8} "
+          f"{'wywołania':>9} {'zastąp.':>9} {'po 1':>9}")
+
+    for label, incremental in (('przyrostowy', True), ('od nowa', False)):
+        simulation = Simulation(calendar, incremental)
+        events = [(ts, 'submit', track) for ts, track in submissions(per_day, monday, random.Random(5))]
+        events += [(end, 'break', None) for day in range(7)
+                   for _, end in calendar.upcoming(
+                       datetime.combine(monday + timedelta(days=day), datetime.min.time()).timestamp(), 0)]
+        events.sort(key=lambda event: event[0])
+
+        for ts, kind, track in events:
+            if kind == 'submit':
+                simulation.submit(track)
+            simulation.tick(ts)
+
+        simulation.report(label, calendar, monday)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,126 @@
+"""
+Benchmark filtra wulgaryzmów na korpusie tytułów piosenek.
+
+Porównuje poprzedni filtr (stała lista słów, dokładne całe słowa) z regułami
+z pliku (normalizacja, prefiksy, wyjątki): ile zgłoszeń z ukrytymi
+wulgaryzmami wykrywa, ile zwykłych piosenek blokuje niesłusznie i ile
+kosztuje jedno sprawdzenie. Mierzy też czas kompilacji reguł (przeładowanie).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_content_filter.py [plik_reguł]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.content_filter import FilterRules, set_filter_rules, screen_submissions
+
+# Prawdziwe piosenki, które nie powinny być blokowane (także z cyframi,
+# symbolami i fragmentami przypominającymi wulgaryzmy)
+CLEAN = [
+    ('Taco Hemingway', 'Wosk'), ('Dawid Podsiadło', 'Małomiasteczkowy'), ('sanah', 'Szampan'),
+    ('Kult', 'Arahja'), ('Dżem', 'Whisky'), ('Kwiat Jabłoni', 'Dziś późno pójdę spać'),
+    ('Lady Pank', 'Mniej niż zero'), ('Perfect', 'Autobiografia'), ('Myslovitz', 'Długość dźwięku samotności'),
+    ('Republika', 'Mamona'), ('T.Love', 'King'), ('Maanam', 'Kocham cię, kochanie moje'),
+    ('Sylwia Grzeszczak', 'Tamta dziewczyna'), ('Mata', 'Patointeligencja'), ('Quebonafide', 'Bubbletea'),
+    ('Daria Zawiałow', 'Kinga'), ('Brodka', 'Granda'), ('Bajm', 'Biała armia'), ('Varius Manx', 'Orła cień'),
+    ('Budka Suflera', 'Jolka, Jolka pamiętasz'), ('Edyta Bartosiewicz', 'Szał'), ('Kombii', 'Słodkiego miłego życia'),
+    ('Krzysztof Krawczyk', 'Parostatek'), ('Ich Troje', 'Powiedz'), ('Sarsa', 'Naucz mnie'),
+    ('Ralph Kaminski', 'Kosmiczne energie'), ('Margaret', 'Cool Me Down'), ('Kayah', 'Supermenka'),
+    ('Doda', 'Nie daj się'), ('Feel', 'Jest już ciemno'), ('Happysad', 'Zanim pójdę'), ('Hey', 'Teksański'),
+    ('Wilki', 'Baśka'), ('Golec uOrkiestra', 'Lornetka'), ('Czesław Niemen', 'Dziwny jest ten świat'),
+    ('O.S.T.R.', 'Tabasko'), ('Łona i Webber', 'To nic nie znaczy'), ('Smolasty', 'Sukienka'),
+    ('Imagine Dragons', 'Believer'), ('Daft Punk', 'Get Lucky'), ('The Weeknd', 'Blinding Lights'),
+    ('Dua Lipa', 'Levitating'), ('Ed Sheeran', 'Shape of You'), ('Harry Styles', 'As It Was'),
+    ('Billie Eilish', 'bad guy'), ('Olivia Rodrigo', 'drivers license'), ('Coldplay', 'Viva la Vida'),
+    ('Nirvana', 'Smells Like Teen Spirit'), ('Queen', 'Bohemian Rhapsody'), ('AC/DC', 'Highway to Hell'),
+    ("Guns N' Roses", "Sweet Child O' Mine"), ('Michael Jackson', 'Billie Jean'), ('Bon Jovi', "Livin' on a Prayer"),
+    ('ABBA', 'Dancing Queen'), ('Toto', 'Africa'), ('a-ha', 'Take On Me'), ('Survivor', 'Eye of the Tiger'),
+    ('Avicii', 'Wake Me Up'), ('Post Malone', 'Circles'), ('Meghan Trainor', 'All About That Bass'),
+    ('Sabrina Carpenter', 'Espresso'), ('Bruno Mars', 'Uptown Funk'), ('Miley Cyrus', 'Flowers'),
+    ('SZA', 'Kill Bill'), ('Taylor Swift', 'Shake It Off'), ('Tones and I', 'Dance Monkey'),
+    ('Glass Animals', 'Heat Waves'), ('Arctic Monkeys', 'Do I Wanna Know?'), ('The Killers', 'Mr. Brightside'),
+    ('Linkin Park', 'In the End'), ('Green Day', 'Basket Case'), ('The Cranberries', 'Zombie'),
+    ('Black Sabbath', 'Paranoid'), ('Dick Dale', 'Misirlou'), ('Bastille', 'Pompeii'), ('Passenger', 'Let Her Go'),
+    ('Cocteau Twins', 'Heaven or Las Vegas'), ('Herbie Hancock', 'Cantaloupe Island'),
+    ('The Pussycat Dolls', 'Buttons'), ('Britney Spears', 'Toxic'), ('Spice Girls', 'Wannabe'),
+    ('Outkast', 'Hey Ya!'), ('Avril Lavigne', 'Sk8er Boi'), ('Eminem', 'Lose Yourself'),
+    ('Kendrick Lamar', 'HUMBLE.'), ('Lil Nas X', 'Old Town Road'), ('David Guetta', 'Titanium'),
+    ('Gorillaz', 'Feel Good Inc.'), ('Ke$ha', 'TiK ToK'), ('P!nk', 'So What'), ('t.A.T.u.', 'All the Things She Said'),
+    ('A$AP Rocky', 'Praise the Lord'), ('Ty Dolla $ign', 'Paranoid'), ('Blink-182', 'All the Small Things'),
+    ('Sum 41', 'In Too Deep'), ('Maroon 5', 'Sugar'), ('50 Cent', 'In Da Club'), ('Ariana Grande', '7 rings'),
+    ('Madonna', '4 Minutes'), ('M.I.A.', 'Paper Planes'), ('R.E.M.', 'Losing My Religion'), ('M83', 'Midnight City'),
+    ('UB40', 'Red Red Wine'), ('Panic! at the Disco', 'High Hopes'), ('Florence + The Machine', 'Dog Days Are Over'),
+    ('fun.', 'We Are Young'), ('5 Seconds of Summer', 'Youngblood'), ('Jay-Z', 'Empire State of Mind'),
+]
+
+# Zgłoszenia z wulgaryzmami w postaci, w jakiej wpisują je uczniowie
+OFFENSIVE = [
+    ('CeeLo Green', 'F**k You'), ('Rihanna', 'B*tch Better Have My Money'), ('Nieznany', 'Sh!t Happens'),
+    ('Nieznany', '$hit'), ('Nieznany', 'a55hole'), ('Nieznany', 'fuuuuuck'), ('Nieznany', 'ｆｕｃｋ'),
+    ('Nieznany', 'f.u.c.k'), ('Nieznany', 'k u r w a'), ('Nieznany', 'Kurwaaa mać'), ('Nieznany', 'KURWA'),
+    ('Nieznany', 'Kurewski dzień'), ('Nieznany', 'GÓWNO prawda'), ('Nieznany', 'gowno'), ('Nieznany', 'SKURW13L'),
+    ('Nieznany', 'ch*j'), ('Nieznany', 'chujowy dzień'), ('Nieznany', 'pierd0lę to'), ('Nieznany', 'zajebiście'),
+    ('Nieznany', 'wypierdalaj'), ('Nieznany', 'kurwа'), ('Nieznany', 'b1tch'), ('Nieznany', 'motherf*cker'),
+    ('Nieznany', 'Bullsh1t'), ('Nieznany', 'd!ckhead'), ('Nieznany', 'p1zda'), ('Nieznany', 'jebać szkołę'),
+    ('Nieznany', 'What the fuck'), ('Kurwa Band', 'Piosenka'), ('Nieznany', 'fucking hell'),
+]
+
+# Poprzednia, stała lista słów (dokładne dopasowanie całych słów)
+LEGACY_WORDS = [
+    'kurwa', 'kurwy', 'kurwo', 'kurwą', 'kurwie', 'kurewski', 'chuj', 'chuja', 'chuju', 'chujem', 'huj',
+    'dziwka', 'dziwki', 'dziwko', 'dziwką', 'pierdol', 'pierdolić', 'pierdoli', 'pierdolę',
+    'jebać', 'jebak', 'jebane', 'jebany', 'jebana', 'dupek', 'dupa', 'dupie', 'dupą', 'dupsko',
+    'suka', 'suko', 'suki', 'sukinsyn', 'skurwysyn', 'skurwiel', 'skurwysynowski',
+    'pizda', 'pizdy', 'pizdo', 'pizdą', 'gówno', 'gowno', 'gówna', 'spierdalaj', 'spierdala', 'spierdalać',
+    'zajebisty', 'zajebiste', 'zajebista', 'kutas', 'kutasa', 'kutasie', 'cipka', 'cipa', 'srać', 'sraka',
+    'pierdzieć', 'pierdnąć', 'fuck', 'fucking', 'fucker', 'fucked', 'fucks', 'shit', 'shitty', 'shithead',
+    'bitch', 'bitches', 'bitching', 'ass', 'asshole', 'asses', 'damn', 'damned', 'damnit', 'cunt', 'cunts',
+    'dick', 'dickhead', 'dicks', 'pussy', 'pussies', 'bastard', 'bastards', 'whore', 'whores',
+    'slut', 'sluts', 'slutty', 'cock', 'cocks', 'piss', 'pissed', 'pissing', 'motherfucker', 'motherfucking',
+    'bullshit', 'nigga', 'nigger', 'retard', 'retarded',
+]
+
+def legacy_matcher(words):
+    pattern = re.compile(r'\b(?:' + '|'.join(sorted(map(re.escape, words), key=len, reverse=True)) + r')\b')
+    return lambda text: pattern.search(text.lower()) is not None
+
+def legacy_screen(pairs, contains):
+    return [not (contains(artist) or contains(title)) for artist, title in pairs]
+
+def current_screen(pairs):
+    return [is_ok for is_ok, _ in screen_submissions(pairs)]
+
+def report(label, screen, number):
+    blocked = sum(not ok for ok in screen(OFFENSIVE))
+    false_positives = [pair for pair, ok in zip(CLEAN, screen(CLEAN)) if not ok]
+
+    corpus = CLEAN + OFFENSIVE
+    elapsed = timeit.timeit(lambda: screen(corpus), number=number)
+
+    print(f"{label:<22} {blocked:>3}/{len(OFFENSIVE)} wykrytych   {len(false_positives):>2}/{len(CLEAN)} niesłusznie"
+          f"   {elapsed / (number * len(corpus)) * 1e6:6.2f} µs / zgłoszenie")
+    for artist, title in false_positives:
+        print(f"{'':<22}   zablokowane: {artist} - {title}")
+
+def main(path='data/filter_rules.txt', number=200):
+    started = timeit.default_timer()
+    rules = FilterRules.from_file(path)
+    compile_ms = (timeit.default_timer() - started) * 1000
+    set_filter_rules(rules)
+
+    stats = rules.stats()
+    print(f"Reguły: {stats['words']} słów, {stats['prefixes']} prefiksów, {stats['allowed']} wyjątków, "
+          f"{stats['patterns']} wzorców - kompilacja {compile_ms:.1f} ms")
+    print(f"Korpus: {len(CLEAN)} zwykłych piosenek, {len(OFFENSIVE)} zgłoszeń z wulgaryzmami\n")
+
+    contains = legacy_matcher(LEGACY_WORDS)
+    report('Stała lista słów', lambda pairs: legacy_screen(pairs, contains), number)
+    report('Reguły z pliku', current_screen, number)
+
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
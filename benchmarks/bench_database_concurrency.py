@@ -0,0 +1,91 @@
+"""
+Benchmark współbieżnych zapisów do SQLite: warstwa połączeń z app.database
+(połączenie na wątek, WAL, busy_timeout) vs stare podejście (nowe połączenie
+na każdą operację, domyślny rollback journal).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_database_concurrency.py [liczba_wątków] [zgłoszeń_na_wątek]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import database
+
+def legacy_submit(path, i):
+    """Poprzednie zachowanie get_db/close_db - połączenie na request"""
+    db = sqlite3.connect(path)
+    try:
+        db.execute('''
+            SELECT COUNT(*) FROM submissions
+            WHERE email_hash = ? AND status = 'approved'
+        ''', (f'hash{i % 50}',)).fetchone()
+        db.execute('''
+            INSERT INTO submissions (email, email_hash, artist, title, status, verified)
+            VALUES (?, ?, ?, ?, 'approved', 1)
+        ''', (f'user{i}@zspbytow.pl', f'hash{i % 50}', 'Artist', 'Title'))
+        db.commit()
+    finally:
+        db.close()
+
+def pooled_submit(path, i):
+    database.count_user_submissions_in_period(f'hash{i % 50}')
+    database.save_submission(
+        email=f'user{i}@zspbytow.pl',
+        email_hash=f'hash{i % 50}',
+        artist='Artist',
+        title='Title',
+        spotify_track_id=None,
+        spotify_track_uri=None,
+        status='approved'
+    )
+
+def run(label, submit, path, threads, per_thread):
+    errors = []
+
+    def worker(offset):
+        for i in range(per_thread):
+            try:
+                submit(path, offset * per_thread + i)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    done = threads * per_thread - len(errors)
+    print(f"{label:<28} {done / elapsed:9.0f} zgłoszeń/s   błędy 'locked': {len(errors)}")
+
+def main(threads=8, per_thread=250):
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, 'legacy.db')
+        pooled_path = os.path.join(tmp, 'pooled.db')
+
+        for path in (legacy_path, pooled_path):
+            database.configure_database(path=path)
+            database.init_db()
+
+        # Baza "legacy" wraca do domyślnego trybu dziennika
+        db = sqlite3.connect(legacy_path)
+        db.execute('PRAGMA journal_mode=DELETE')
+        db.close()
+
+        print(f"{threads} wątków x {per_thread} zgłoszeń")
+        run('Połączenie na request', legacy_submit, legacy_path, threads, per_thread)
+
+        database.configure_database(path=pooled_path)
+        run('Połączenie na wątek + WAL', pooled_submit, pooled_path, threads, per_thread)
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,85 @@
+"""
+Benchmark wysyłki emaili przez kolejkę email_outbox.
+
+Uruchamia lokalny serwer SMTP (aiosmtpd) i mierzy:
+- czas dodania emaila do kolejki (to, na co czeka /api/request-code),
+- przepustowość wątku wysyłającego (jedno, utrzymywane połączenie SMTP).
+
+Wymaga: pip install aiosmtpd
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_email_outbox.py [liczba_emaili]
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+from aiosmtpd.controller import Controller
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+class CountingHandler:
+    """Handler aiosmtpd, który tylko liczy odebrane wiadomości"""
+
+    def __init__(self, expected):
+        self.received = 0
+        self.expected = expected
+        self.done = threading.Event()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        if self.received >= self.expected:
+            self.done.set()
+        return '250 OK'
+
+def free_port():
+    """Wolny port - Controller.start() sprawdza gotowość, łącząc się z podanym portem (0 nie zadziała)"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def main(count=500):
+    handler = CountingHandler(count)
+    port = free_port()
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            'SPOTIPY_CLIENT_ID': 'bench',
+            'SPOTIPY_CLIENT_SECRET': 'bench',
+            'SPOTIPY_REDIRECT_URI': 'http://localhost/callback',
+            'SPOTIFY_PLAYLIST_ID': 'bench',
+            'DATABASE_PATH': os.path.join(tmp, 'bench.db'),
+            'EMAIL_BACKEND': 'smtp',
+            'SMTP_SERVER': '127.0.0.1',
+            'SMTP_PORT': str(port),
+            'SMTP_USE_TLS': 'false',
+            'SMTP_FROM_EMAIL': 'radio@zspbytow.pl'
+        })
+
+        from app import create_app
+        from app.email_sender import send_verification_email
+
+        app = create_app()
+        with app.app_context():
+            started = time.perf_counter()
+            for i in range(count):
+                send_verification_email(f'uczen{i}@zspbytow.pl', '123456')
+            enqueue_time = time.perf_counter() - started
+
+            handler.done.wait(120)
+            total_time = time.perf_counter() - started
+
+    controller.stop()
+
+    print(f"Dodanie do kolejki: {enqueue_time / count * 1000:8.3f} ms / email")
+    print(f"Wysłano:            {handler.received}/{count} w {total_time:.2f} s")
+    print(f"Przepustowość:      {handler.received / total_time:8.1f} emaili/s")
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
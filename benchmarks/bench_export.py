@@ -0,0 +1,80 @@
+"""
+Benchmark eksportu historii zgłoszeń: strumień (fetchmany + gzip w locie)
+vs budowanie całego pliku w pamięci (fetchall).
+
+Dla kilku rozmiarów tabeli mierzy czas i szczytowe zużycie pamięci
+(tracemalloc). Przy eksporcie strumieniowym pamięć nie powinna rosnąć
+razem z liczbą wierszy.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_export.py [rozmiar ...]
+"""
+
+import csv
+import gzip
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import database
+from app.database import EXPORT_COLUMNS
+from app.export import export_submissions
+
+def fill(count):
+    """Wypełnia bazę count zgłoszeniami"""
+    db = database.get_db()
+    db.execute('DELETE FROM submissions')
+    now = int(time.time())
+    db.executemany('''
+        INSERT INTO submissions (email, email_hash, artist, title, status, submitted_ts, fingerprint)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (f'user{i}@zspbytow.pl', f'hash{i % 500}', f'Wykonawca {i % 700}', f'Tytuł piosenki {i}',
+         'approved' if i % 4 else 'rejected', now - (count - i) * 60, f'fp{i}')
+        for i in range(count)
+    ])
+    db.commit()
+
+def in_memory_export():
+    """Wszystkie wiersze naraz, cały plik budowany w pamięci, potem kompresja"""
+    rows = database.get_db().execute(f'''
+        SELECT {', '.join(EXPORT_COLUMNS)} FROM submissions ORDER BY submitted_ts, id
+    ''').fetchall()
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(tuple(row) for row in rows)
+    return len(gzip.compress(buffer.getvalue().encode('utf-8')))
+
+def streaming_export():
+    return sum(len(chunk) for chunk in export_submissions('csv', compress=True))
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, size
+
+def main(sizes=(10000, 100000)):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(path=os.path.join(tmp, 'export.db'), instrument=False)
+        database.init_db()
+
+        print(f"{'wiersze':>8}  {'metoda':<20} {'czas s':>7} {'pamięć MB':>10} {'gzip MB':>8}")
+        for count in sizes:
+            fill(count)
+            for label, fn in (('fetchall + pamięć', in_memory_export), ('strumień', streaming_export)):
+                elapsed, peak, size = measure(fn)
+                print(f"{count:>8}  {label:<20} {elapsed:7.2f} {peak / 1e6:10.1f} {size / 1e6:8.2f}")
+
+if __name__ == '__main__':
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (10000, 100000))
@@ -0,0 +1,80 @@
+"""
+Mikro-benchmark sprawdzeń tożsamości w ścieżce zgłoszenia: domena emaila,
+admin, hash emaila.
+
+Porównuje poprzednie funkcje (regex budowany z konfiguracji przy każdym
+wywołaniu, lista adminów, hash liczony od nowa) z Identity przygotowanym
+raz w create_app. Adresy się powtarzają - jak w prawdziwym ruchu, gdzie
+ten sam uczeń prosi o kod i zaraz potem wysyła zgłoszenie.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_identity.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.identity import Identity
+from app.utils import hash_email
+
+DOMAIN = 'zspbytow.pl'
+ADMINS = [f'nauczyciel{i}@{DOMAIN}' for i in range(25)]
+
+def legacy_validate(email):
+    """Poprzednie validate_school_email - regex z konfiguracji przy każdym wywołaniu"""
+    pattern = rf'^[a-zA-Z0-9._%+-]+@{re.escape(DOMAIN)}$'
+    return bool(re.match(pattern, email.lower()))
+
+def legacy_is_admin(email):
+    """Poprzednie Config.is_admin - przeszukanie listy"""
+    return email.lower() in ADMINS
+
+def legacy_path(email):
+    return legacy_validate(email) and (legacy_is_admin(email), hash_email(email))
+
+def current_path(identity, email):
+    return identity.is_school_email(email) and (identity.is_admin(email), identity.hash_email(email))
+
+def sample_emails(count=20000, students=800):
+    """Ruch: uczniowie (po kilka requestów każdy), część z innych domen"""
+    rng = random.Random(7)
+    emails = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            emails.append(f'ktos{rng.randrange(100)}@gmail.com')
+        elif roll < 0.08:
+            emails.append(rng.choice(ADMINS))
+        else:
+            emails.append(f'uczen{rng.randrange(students)}@{DOMAIN}')
+    return emails
+
+def main(number=5):
+    identity = Identity([DOMAIN], admins=ADMINS)
+    emails = sample_emails()
+
+    # Sanity check - obie ścieżki muszą dawać te same wyniki
+    for email in set(emails):
+        assert legacy_path(email) == current_path(identity, email), email
+
+    steps = [
+        ('domena', lambda e: legacy_validate(e), lambda e: identity.is_school_email(e)),
+        ('admin', lambda e: legacy_is_admin(e), lambda e: identity.is_admin(e)),
+        ('hash', lambda e: hash_email(e), lambda e: identity.hash_email(e)),
+        ('razem', legacy_path, lambda e: current_path(identity, e)),
+    ]
+
+    checks = number * len(emails)
+    print(f"{'krok':<8} {'poprzednio µs':>14} {'Identity µs':>12} {'przyspieszenie':>15}")
+    for label, legacy, current in steps:
+        before = timeit.timeit(lambda: [legacy(e) for e in emails], number=number) / checks * 1e6
+        after = timeit.timeit(lambda: [current(e) for e in emails], number=number) / checks * 1e6
+        print(f"{label:<8} {before:14.2f} {after:12.2f} {before / after:14.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark zapytania limitu zgłoszeń na wygenerowanej historii.
+
+Sprawdza EXPLAIN QUERY PLAN (indeks pokrywający idx_rate_limit) i porównuje
+czas zapytania z poprzednią wersją (indeks tylko na email_hash, porównanie
+tekstowych dat).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_rate_limit.py [liczba_wierszy]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import database
+
+LEGACY_QUERY = '''
+    SELECT COUNT(*) FROM submissions
+    WHERE email_hash = ? AND submitted_at >= ? AND status IN ('approved', 'pending')
+'''
+
+def generate_history(db, rows, users=2000, days=365):
+    """Wstawia losową historię zgłoszeń z ostatnich `days` dni"""
+    now = int(time.time())
+    statuses = ('approved', 'approved', 'rejected', 'pending')
+
+    def generate():
+        for _ in range(rows):
+            ts = now - random.randrange(days * 86400)
+            yield (
+                'user@zspbytow.pl',
+                f'hash{random.randrange(users)}',
+                'Artist',
+                'Title',
+                random.choice(statuses),
+                time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts)),
+                ts
+            )
+
+    db.executemany('''
+        INSERT INTO submissions (email, email_hash, artist, title, status, submitted_at, submitted_ts)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', generate())
+    db.commit()
+
+def main(rows=1_000_000, lookups=2000):
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(path=os.path.join(tmp, 'bench.db'))
+        database.init_db()
+        db = database.get_db()
+
+        print(f"Generowanie {rows} zgłoszeń...")
+        generate_history(db, rows)
+        db.execute('ANALYZE')
+
+        plan = ' '.join(row[3] for row in db.execute(
+            'EXPLAIN QUERY PLAN ' + database.RATE_LIMIT_QUERY, ('hash1', 0)
+        ))
+        print(f"Plan zapytania: {plan}")
+        assert 'COVERING INDEX idx_rate_limit' in plan, plan
+
+        hashes = [f'hash{random.randrange(2000)}' for _ in range(lookups)]
+
+        current = timeit.timeit(
+            lambda: [database.count_user_submissions_in_period(h, days=2) for h in hashes], number=1
+        )
+
+        # Poprzedni układ: indeks tylko na email_hash, daty jako tekst
+        db.execute('DROP INDEX idx_rate_limit')
+        db.execute('CREATE INDEX idx_email_hash ON submissions(email_hash)')
+        db.commit()
+        period_start = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - 2 * 86400))
+        legacy = timeit.timeit(
+            lambda: [db.execute(LEGACY_QUERY, (h, period_start)).fetchone() for h in hashes], number=1
+        )
+
+        print(f"Indeks email_hash:      {legacy / lookups * 1e6:8.1f} µs / zapytanie")
+        print(f"Indeks idx_rate_limit:  {current / lookups * 1e6:8.1f} µs / zapytanie")
+        print(f"Przyspieszenie:         {legacy / current:8.1f}x")
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:2]))
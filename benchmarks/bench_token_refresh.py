@@ -0,0 +1,124 @@
+"""
+Benchmark odświeżania tokenu Spotify przez wiele procesów (jak workery gunicorna).
+
+Procesy przez kilka sekund pobierają token w pętli (kilka wątków na proces),
+a fałszywy serwer wydaje tokeny ważne tylko chwilę (spotipy odświeża token na
+minutę przed expires_at, więc expires_in=62 to ~2 s ważności). Porównuje:
+- 'file'   - każdy proces ma własny token i nadpisuje wspólny plik .spotify_cache,
+- 'sqlite' - token w tabeli shared_state, odświeża jeden proces (dzierżawa).
+
+Idealnie na każde wygaśnięcie przypada jedno żądanie do endpointu tokenu,
+niezależnie od liczby procesów.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_token_refresh.py [procesy] [sekundy]
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.fake_spotify import FakeSpotify
+
+SCOPE = 'playlist-modify-public playlist-modify-private'
+TOKEN_TTL = 62
+THREADS = 4
+
+def worker(backend, db_path, cache_path, token_url, duration, results):
+    """Jeden proces aplikacji: kilka wątków pobiera token przez cały czas trwania testu"""
+    from app.database import configure_database
+    from app.spotify_client import _LockedSpotifyOAuth
+    from app.token_cache import create_token_cache
+
+    configure_database(path=db_path, instrument=False)
+    auth = _LockedSpotifyOAuth(
+        client_id='bench',
+        client_secret='bench',
+        redirect_uri='http://localhost/callback',
+        scope=SCOPE,
+        cache_handler=create_token_cache({
+            'SPOTIFY_TOKEN_BACKEND': backend,
+            'SPOTIFY_CACHE_PATH': cache_path,
+            'SPOTIFY_TOKEN_LEASE': 5
+        }),
+        open_browser=False
+    )
+    auth.OAUTH_TOKEN_URL = token_url
+
+    stats = {'calls': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run():
+        while time.monotonic() < deadline:
+            try:
+                auth.get_access_token(as_dict=False)
+                with lock:
+                    stats['calls'] += 1
+            except Exception:
+                with lock:
+                    stats['errors'] += 1
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=run) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results.put((stats['calls'], stats['errors']))
+
+def run_backend(backend, processes, duration):
+    from app import database
+
+    fake = FakeSpotify(token_ttl=TOKEN_TTL).start()
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'tokens.db')
+        cache_path = os.path.join(tmp, 'spotify_cache')
+
+        database.configure_database(path=db_path, instrument=False)
+        database.init_db()
+
+        # Token z ręcznej autoryzacji, który właśnie wygasa
+        with open(cache_path, 'w') as f:
+            json.dump({
+                'access_token': 'initial', 'token_type': 'Bearer', 'expires_in': 3600,
+                'expires_at': int(time.time()) + 60, 'refresh_token': 'bench', 'scope': SCOPE
+            }, f)
+
+        results = context.Queue()
+        workers = [
+            context.Process(target=worker, args=(backend, db_path, cache_path, fake.token_url, duration, results))
+            for _ in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        outcomes = [results.get() for _ in workers]
+        for process in workers:
+            process.join()
+
+    fake.stop()
+
+    calls = sum(outcome[0] for outcome in outcomes)
+    errors = sum(outcome[1] for outcome in outcomes)
+    return calls, errors, fake.counts['token']
+
+def main(processes=8, duration=10):
+    print(f"{THREADS} wątki na proces, {duration} s, token ważny ~{TOKEN_TTL - 60} s\n")
+    print(f"{'backend':<8} {'procesy':>8} {'pobrania':>9} {'błędy':>6} {'odświeżenia':>12}")
+
+    # Jeden proces - tyle odświeżeń powinno być niezależnie od liczby procesów
+    for backend, count in (('file', 1), ('file', processes), ('sqlite', processes)):
+        calls, errors, refreshes = run_backend(backend, count, duration)
+        print(f"{backend:<8} {count:>8} {calls:>9} {errors:>6} {refreshes:>12}")
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,187 @@
+"""
+Benchmark trafności wyszukiwania utworów: stare wyszukiwanie (limit=1) vs ranking kandydatów.
+
+Działa offline - zamiast Spotify używa małego katalogu i uproszczonej
+symulacji wyszukiwarki:
+- zapytanie ścisłe (artist:X track:Y) zwraca utwory, których wykonawca i tytuł
+  zawierają wszystkie słowa zapytania (bez ignorowania polskich znaków),
+- zapytanie luźne zwraca utwory zawierające większość słów zapytania
+  (tu polskie znaki są ignorowane - wyszukiwanie tekstowe Spotify jest bardziej tolerancyjne),
+- wyniki są posortowane według popularności, jak w Spotify.
+
+Dla każdego zgłoszenia z korpusu sprawdzamy, czy wybrano oczekiwany utwór
+(trafność), czy zamiast dostępnej wersji "clean" wybrano explicit oraz
+ile wywołań API przypada na trafnie obsłużone zgłoszenie (nietrafione
+zgłoszenie to w praktyce kolejne zgłoszenie ucznia i kolejne wywołania).
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_track_search.py
+"""
+
+import os
+import sys
+import timeit
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.track_search import pick_best, search_queries
+
+MIN_SCORE = 0.6
+CANDIDATES = 10
+
+# (id, wykonawcy, tytuł, explicit, popularność)
+CATALOG = [
+    ('wosk', ['Taco Hemingway'], 'Wosk', False, 70),
+    ('wosk-live', ['Taco Hemingway'], 'Wosk - Live', False, 20),
+    ('tamagotchi', ['Taco Hemingway'], 'Tamagotchi', True, 75),
+    ('tamagotchi-clean', ['Taco Hemingway'], 'Tamagotchi - Radio Edit', False, 40),
+    ('nie-ma-fal', ['Dawid Podsiadło'], 'Nie ma fal', False, 80),
+    ('nie-ma-fal-karaoke', ['Karaoke Hits PL'], 'Nie ma fal (Karaoke Version)', False, 10),
+    ('malomiasteczkowy', ['Dawid Podsiadło'], 'Małomiasteczkowy', False, 78),
+    ('let-you-down', ['Dawid Podsiadło'], 'Let You Down', False, 60),
+    ('szampan', ['sanah'], 'Szampan', False, 79),
+    ('ale-jazz', ['sanah', 'Vito Bambino'], 'Ale jazz!', False, 77),
+    ('melodia', ['sanah'], 'melodia', False, 65),
+    ('bohemian', ['Queen'], 'Bohemian Rhapsody - Remastered 2011', False, 90),
+    ('bohemian-live', ['Queen'], 'Bohemian Rhapsody - Live Aid', False, 55),
+    ('bohemian-cover', ['Panic! At The Disco'], 'Bohemian Rhapsody', False, 50),
+    ('dont-stop', ['Queen'], "Don't Stop Me Now - Remastered 2011", False, 88),
+    ('get-lucky', ['Daft Punk', 'Pharrell Williams', 'Nile Rodgers'], 'Get Lucky (feat. Pharrell Williams and Nile Rodgers)', False, 85),
+    ('get-lucky-edit', ['Daft Punk', 'Pharrell Williams', 'Nile Rodgers'], 'Get Lucky (Radio Edit)', False, 70),
+    ('believer', ['Imagine Dragons'], 'Believer', False, 88),
+    ('believer-remix', ['Imagine Dragons', 'Lil Wayne'], 'Believer (feat. Lil Wayne)', False, 45),
+    ('lose-yourself', ['Eminem'], 'Lose Yourself', True, 86),
+    ('lose-yourself-clean', ['Eminem'], 'Lose Yourself - Clean', False, 50),
+    ('zoska', ['Organek'], 'Zośka', False, 40),
+    ('kiedy-powiem-sobie-dosc', ['O.N.A.'], 'Kiedy powiem sobie dość', False, 62),
+    ('jolka', ['Budka Suflera'], 'Jolka, Jolka pamiętasz', False, 66),
+    ('autobiografia', ['Perfect'], 'Autobiografia', False, 64),
+    ('w-moim-ogrodku', ['Maryla Rodowicz'], 'Małgośka', False, 58),
+    ('supermoce', ['Sobel'], 'Supermoce', True, 60),
+    ('supermoce-clean', ['Sobel'], 'Supermoce (Clean)', False, 35),
+    ('blinding-lights', ['The Weeknd'], 'Blinding Lights', False, 92),
+    ('blinding-lights-remix', ['The Weeknd', 'Rosalía'], 'Blinding Lights (with ROSALÍA) - Remix', False, 60),
+    ('levitating', ['Dua Lipa', 'DaBaby'], 'Levitating (feat. DaBaby)', False, 80),
+    ('levitating-solo', ['Dua Lipa'], 'Levitating', False, 78),
+    ('przez-twe-oczy', ['Kamil Bednarek'], 'Cisza', False, 45),
+]
+
+# (wykonawca, tytuł ze zgłoszenia, oczekiwane ID lub None - utworu nie ma w katalogu)
+CORPUS = [
+    ('Taco Hemingway', 'Wosk', 'wosk'),
+    ('taco hemingway', 'tamagotchi', 'tamagotchi-clean'),
+    ('Dawid Podsiadlo', 'Nie ma fal', 'nie-ma-fal'),
+    ('Dawid Podsiadło', 'Nie Ma Fal', 'nie-ma-fal'),
+    ('Podsiadło', 'Malomiasteczkowy', 'malomiasteczkowy'),
+    ('Dawid Podsiadlo', 'Let you down', 'let-you-down'),
+    ('Sanah', 'Szampan', 'szampan'),
+    ('sanah & Vito Bambino', 'Ale Jazz', 'ale-jazz'),
+    ('sanah feat. Vito Bambino', 'Ale jazz!', 'ale-jazz'),
+    ('Queen', 'Bohemian Rhapsody', 'bohemian'),
+    ('Queen', 'Bohemian Rapsody', 'bohemian'),
+    ('Queen', 'Dont Stop Me Now', 'dont-stop'),
+    ('Daft Punk', 'Get Lucky', 'get-lucky'),
+    ('Daft Punk ft. Pharrell', 'Get Lucky', 'get-lucky'),
+    ('Imagine Dragons', 'Believer', 'believer'),
+    ('Eminem', 'Lose Yourself', 'lose-yourself-clean'),
+    ('Organek', 'Zoska', 'zoska'),
+    ('ONA', 'Kiedy powiem sobie dosc', 'kiedy-powiem-sobie-dosc'),
+    ('Budka Suflera', 'Jolka Jolka pamietasz', 'jolka'),
+    ('Perfect', 'Autobiografia (Remastered)', 'autobiografia'),
+    ('Sobel', 'Supermoce', 'supermoce-clean'),
+    ('The Weeknd', 'Blinding Lights', 'blinding-lights'),
+    ('Weeknd', 'Blinding lights', 'blinding-lights'),
+    ('Dua Lipa', 'Levitating', 'levitating'),
+    ('Dua Lipa feat. DaBaby', 'Levitating', 'levitating'),
+    ('Kamil Bednarek', 'Przez twe oczy zielone', None),
+    ('Metallica', 'Enter Sandman', None),
+]
+
+def _track(entry):
+    track_id, artists, name, explicit, popularity = entry
+    return {
+        'id': track_id,
+        'uri': f'spotify:track:{track_id}',
+        'name': name,
+        'artists': [{'name': artist} for artist in artists],
+        'explicit': explicit,
+        'popularity': popularity
+    }
+
+TRACKS = sorted((_track(entry) for entry in CATALOG), key=lambda t: -t['popularity'])
+
+def _words(text, fold=False):
+    text = text.casefold()
+    if fold:
+        text = ''.join(c for c in unicodedata.normalize('NFKD', text.replace('ł', 'l')) if not unicodedata.combining(c))
+    return [word.strip('!?,.()[]-\'"&') for word in text.split() if word.strip('!?,.()[]-\'"&')]
+
+def fake_search(query, limit):
+    """Uproszczona wyszukiwarka Spotify (zob. opis modułu)"""
+    if query.startswith('artist:') and ' track:' in query:
+        artist, _, title = query[len('artist:'):].partition(' track:')
+        artist_words, title_words = _words(artist), _words(title)
+        items = [
+            t for t in TRACKS
+            if all(w in _words(' '.join(a['name'] for a in t['artists'])) for w in artist_words)
+            and all(w in _words(t['name']) for w in title_words)
+        ]
+    else:
+        words = _words(query, fold=True)
+        items = []
+        for t in TRACKS:
+            text = _words(' '.join(a['name'] for a in t['artists']) + ' ' + t['name'], fold=True)
+            if words and sum(w in text for w in words) / len(words) >= 0.6:
+                items.append(t)
+
+    return {'tracks': {'items': items[:limit]}}
+
+def legacy_search(artist, title):
+    """Poprzednia implementacja - pierwszy wynik ścisłego zapytania z limit=1"""
+    results = fake_search(f"artist:{artist} track:{title}", 1)
+    items = results['tracks']['items']
+    return (items[0] if items else None), 1
+
+def ranked_search(artist, title):
+    """Obecna implementacja (jak SpotifyClient.search_track)"""
+    calls = 0
+    for _, query in search_queries(artist, title):
+        calls += 1
+        track = pick_best(fake_search(query, CANDIDATES)['tracks']['items'], artist, title, MIN_SCORE)
+        if track is not None:
+            return track, calls
+    return None, calls
+
+def evaluate(search, verbose=False):
+    correct = calls = explicit = 0
+    for artist, title, expected in CORPUS:
+        track, used = search(artist, title)
+        calls += used
+        found = track['id'] if track else None
+        if found == expected:
+            correct += 1
+        elif verbose:
+            print(f"  {artist} - {title}: oczekiwano {expected}, wybrano {found}")
+        if track and track['explicit'] and expected and not _by_id(expected)['explicit']:
+            explicit += 1
+    return correct, calls, explicit
+
+def _by_id(track_id):
+    return next(t for t in TRACKS if t['id'] == track_id)
+
+def main(number=200):
+    total = len(CORPUS)
+    print(f"Korpus: {total} zgłoszeń, katalog: {len(TRACKS)} utworów\n")
+
+    for label, search in (('Stare (limit=1)', legacy_search), ('Ranking kandydatów', ranked_search)):
+        print(f"{label}:")
+        correct, calls, explicit = evaluate(search, verbose=True)
+        seconds = timeit.timeit(lambda: evaluate(search), number=number)
+        print(f"  trafność:               {correct}/{total} ({correct / total:.0%})")
+        print(f"  explicit zamiast clean: {explicit}")
+        print(f"  wywołania API:          {calls} ({calls / max(correct, 1):.2f} / trafne zgłoszenie)")
+        print(f"  czas lokalny:           {seconds / (number * total) * 1e6:.1f} µs / zgłoszenie\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark weryfikacji kodów przy rosnącej historii tabeli verification_codes.
+
+Dla każdego rozmiaru historii (użyte i wygasłe kody innych osób) mierzy czas
+save + verify. Z indeksem idx_verification_lookup czas powinien być stały.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/bench_verification_codes.py
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import database
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+def add_history(db, rows):
+    """Dodaje martwe kody (użyte lub wygasłe) dla losowych adresów"""
+    db.executemany('''
+        INSERT INTO verification_codes (email, code, expires_at, used)
+        VALUES (?, ?, ?, ?)
+    ''', (
+        (f'uczen{random.randrange(5000)}@zspbytow.pl', f'{random.randrange(10**6):06d}',
+         '2024-01-01 00:00:00', random.randrange(2))
+        for _ in range(rows)
+    ))
+    db.commit()
+
+def measure(lookups=500):
+    started = time.perf_counter()
+    for i in range(lookups):
+        email = f'nowy{i}@zspbytow.pl'
+        database.save_verification_code(email, '123456', purge_every=0)
+        assert database.verify_code(email, '123456')
+    return (time.perf_counter() - started) / lookups
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(path=os.path.join(tmp, 'bench.db'))
+        database.init_db()
+        db = database.get_db()
+
+        plan = ' '.join(row[3] for row in db.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT id FROM verification_codes
+            WHERE email = ? AND used = 0 AND expires_at > ? AND code = ?
+        ''', ('a', 'b', 'c')))
+        print(f"Plan zapytania: {plan}")
+
+        total = 0
+        for size in SIZES:
+            add_history(db, size - total)
+            total = size
+            print(f"Historia {size:>9} wierszy: {measure() * 1e6:8.1f} µs / save+verify")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""
+Lokalny, fałszywy serwer Spotify Web API dla benchmarków.
+
+Obsługuje tylko to, czego używa aplikacja:
+- GET  /v1/search                      - zawsze jeden utwór (ID wyliczane z zapytania),
+- GET  /v1/playlists/<id>              - snapshot_id "playlisty",
+- GET  /v1/playlists/<id>/tracks       - zawartość "playlisty" (strony offset/limit),
+- POST /v1/playlists/<id>/tracks       - dodanie utworów,
+- PUT  /v1/playlists/<id>/tracks       - zmiana kolejności lub zastąpienie utworów,
+- POST /api/token                      - odświeżenie tokenu OAuth (SPOTIFY_TOKEN_URL).
+
+GET /_stats zwraca liczniki wywołań i otwartych połączeń (dla benchmarku
+w innym procesie).
+
+Opóźnienia odpowiedzi są losowane wokół zadanych wartości, żeby przypominały
+prawdziwe API. Część utworów jest explicit, część zapytań nic nie znajduje.
+
+Błędy API (429 z Retry-After, 5xx) można wstrzykiwać losowo (rate_limit_ratio,
+error_ratio) albo zaplanować dla kolejnych requestów metodą inject() - także
+po wykonaniu operacji, jak przy timeoucie bramy po dodaniu utworów.
+
+Serwer działa na asyncio (jeden wątek, HTTP/1.1 keep-alive). Serwer z wątkiem
+na połączenie (http.server) przy setkach połączeń sam stawał się wąskim
+gardłem i zawyżał opóźnienia mierzonej aplikacji.
+
+Uruchomienie samodzielne (z katalogu głównego repozytorium):
+    python benchmarks/fake_spotify.py [port]
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import random
+import socket
+import sys
+import threading
+from urllib.parse import parse_qs, urlparse
+
+REASONS = {
+    200: 'OK', 201: 'Created', 404: 'Not Found', 429: 'Too Many Requests',
+    500: 'Internal Server Error', 502: 'Bad Gateway', 503: 'Service Unavailable'
+}
+
+class FakeSpotify:
+    """Fałszywe Spotify API"""
+
+    def __init__(self, port=0, search_latency=0.08, add_latency=0.15,
+                 explicit_ratio=0.1, not_found_ratio=0.05, token_latency=0.05, token_ttl=3600,
+                 rate_limit_ratio=0.0, error_ratio=0.0, retry_after=1):
+        """
+        Args:
+            port: Port serwera (0 - dowolny wolny)
+            search_latency: Średnie opóźnienie wyszukiwania (sekundy)
+            add_latency: Średnie opóźnienie dodania do playlisty (sekundy)
+            token_latency: Średnie opóźnienie odświeżenia tokenu (sekundy)
+            token_ttl: Ważność wydawanych tokenów (expires_in, sekundy)
+            explicit_ratio: Odsetek utworów oznaczonych jako explicit
+            not_found_ratio: Odsetek zapytań bez wyników
+            rate_limit_ratio: Odsetek requestów API z odpowiedzią 429
+            error_ratio: Odsetek requestów API z odpowiedzią 503
+            retry_after: Wartość nagłówka Retry-After losowych odpowiedzi 429 (sekundy)
+        """
+        self.search_latency = search_latency
+        self.add_latency = add_latency
+        self.explicit_ratio = explicit_ratio
+        self.not_found_ratio = not_found_ratio
+        self.token_latency = token_latency
+        self.token_ttl = token_ttl
+        self.rate_limit_ratio = rate_limit_ratio
+        self.error_ratio = error_ratio
+        self.retry_after = retry_after
+
+        self.playlist = []
+        self.version = 0
+        self.counts = {'search': 0, 'playlist': 0, 'playlist_items': 0, 'playlist_add': 0,
+                       'playlist_reorder': 0, 'playlist_replace': 0, 'token': 0, 'connections': 0,
+                       'injected': 0}
+        self._failures = collections.deque()
+
+        self._socket = socket.create_server(('127.0.0.1', port), backlog=1024)
+        self._connections = {}
+        self._loop = None
+        self._stopped = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Prefiks API do ustawienia w SPOTIFY_API_PREFIX"""
+        host, port = self._socket.getsockname()[:2]
+        return f'http://{host}:{port}/v1/'
+
+    @property
+    def token_url(self):
+        """Adres odświeżania tokenu do ustawienia w SPOTIFY_TOKEN_URL"""
+        return f'{self.url[:-len("/v1/")]}/api/token'
+
+    def inject(self, status, count=1, retry_after=None, apply=False, path=''):
+        """
+        Kolejne count requestów API dostanie odpowiedź z błędem.
+
+        Args:
+            status: Kod odpowiedzi (429, 500, 502, 503)
+            retry_after: Nagłówek Retry-After (sekundy, None - bez nagłówka)
+            apply: Czy mimo błędu wykonać operację (np. dodanie utworów)
+            path: Tylko requesty, których ścieżka kończy się tym tekstem (np. '/tracks')
+        """
+        for _ in range(count):
+            self._failures.append((status, retry_after, apply, path))
+
+    def serve_forever(self):
+        """Obsługuje requesty w bieżącym wątku (proces benchmarku uruchamia serwer osobno)"""
+        self._loop = asyncio.new_event_loop()
+        self._stopped = asyncio.Event()
+        self._loop.run_until_complete(self._serve())
+        self._loop.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-spotify', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._handle, sock=self._socket)
+        async with server:
+            await self._stopped.wait()
+
+            # Połączenia keep-alive klientów nie kończą się same - zamykane razem z serwerem
+            for writer in list(self._connections.values()):
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _sleep(self, latency):
+        if latency > 0:
+            await asyncio.sleep(random.uniform(0.5, 1.5) * latency)
+
+    async def _handle(self, reader, writer):
+        """Jedno połączenie - kolejne requesty, dopóki klient go nie zamknie"""
+        self.counts['connections'] += 1
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                status, payload, extra_headers = await self._respond(method, urlparse(target), body)
+
+                data = json.dumps(payload).encode()
+                extra = ''.join(f'{name}: {value}\r\n' for name, value in extra_headers.items())
+                writer.write(
+                    f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+                    f'Content-Type: application/json\r\n{extra}'
+                    f'Content-Length: {len(data)}\r\n\r\n'.encode() + data
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    def _take_failure(self, path):
+        """Wstrzykiwany błąd dla requestu API: (status, retry_after, apply) lub None"""
+        if not path.startswith('/v1/'):
+            return None
+        for failure in self._failures:
+            if path.endswith(failure[3]):
+                self._failures.remove(failure)
+                return failure[:3]
+        if self.rate_limit_ratio and random.random() < self.rate_limit_ratio:
+            return 429, self.retry_after, False
+        if self.error_ratio and random.random() < self.error_ratio:
+            return 503, None, False
+        return None
+
+    async def _respond(self, method, url, body):
+        """Odpowiedź (status, payload, dodatkowe nagłówki) - z wstrzykniętym błędem, jeśli jest zaplanowany"""
+        failure = self._take_failure(url.path)
+        if failure is None:
+            status, payload = await self._route(method, url, body)
+            return status, payload, {}
+
+        status, retry_after, apply = failure
+        if apply:
+            await self._route(method, url, body)
+        self.counts['injected'] += 1
+
+        headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+        return status, {'error': {'status': status, 'message': REASONS[status]}}, headers
+
+    async def _route(self, method, url, body):
+        query = parse_qs(url.query)
+        is_playlist = url.path.startswith('/v1/playlists/')
+        is_tracks = is_playlist and url.path.endswith('/tracks')
+
+        if method == 'GET' and url.path == '/v1/search':
+            return 200, await self.search(query.get('q', [''])[0])
+        if method == 'GET' and is_tracks:
+            offset = int(query.get('offset', ['0'])[0])
+            limit = int(query.get('limit', ['100'])[0])
+            return 200, self.playlist_items(url.path, offset, limit)
+        if method == 'GET' and is_playlist:
+            return 200, self.playlist_snapshot()
+        if method == 'POST' and is_tracks:
+            payload = json.loads(body or b'[]')
+            uris = payload.get('uris', []) if isinstance(payload, dict) else payload
+            return 201, await self.playlist_add(uris)
+        if method == 'PUT' and is_tracks:
+            payload = json.loads(body or b'{}')
+            if 'uris' in payload:
+                return 200, await self.playlist_replace(payload['uris'])
+            return 200, await self.playlist_reorder(
+                payload['range_start'], payload.get('range_length', 1), payload['insert_before']
+            )
+        if method == 'POST' and url.path == '/api/token':
+            return 200, await self.token(parse_qs(body.decode()))
+        if method == 'GET' and url.path == '/_stats':
+            return 200, self.counts
+
+        return 404, {'error': {'status': 404, 'message': 'Not found'}}
+
+    async def search(self, query):
+        """Jeden deterministyczny wynik dla zapytania (lub brak wyników)"""
+        await self._sleep(self.search_latency)
+        self.counts['search'] += 1
+
+        digest = hashlib.sha1(query.lower().encode()).digest()
+        if digest[0] < self.not_found_ratio * 256:
+            return {'tracks': {'items': [], 'next': None, 'total': 0}}
+
+        track_id = digest.hex()[:22]
+        artist, _, title = query.partition(' track:')
+        track = {
+            'id': track_id,
+            'uri': f'spotify:track:{track_id}',
+            'name': title or query,
+            'artists': [{'name': artist.replace('artist:', '', 1) or 'Nieznany'}],
+            'album': {'name': 'Album', 'images': [{'url': f'https://i.scdn.co/image/{track_id}'}]},
+            'external_urls': {'spotify': f'https://open.spotify.com/track/{track_id}'},
+            'duration_ms': 180000 + digest[2] * 500,
+            'explicit': digest[1] < self.explicit_ratio * 256
+        }
+        return {'tracks': {'items': [track], 'next': None, 'total': 1}}
+
+    def playlist_snapshot(self):
+        self.counts['playlist'] += 1
+        return {'snapshot_id': f'snapshot-{self.version}', 'tracks': {'total': len(self.playlist)}}
+
+    def playlist_items(self, path, offset, limit):
+        self.counts['playlist_items'] += 1
+        items = [
+            {'added_at': None, 'track': {'id': uri.rsplit(':', 1)[-1], 'uri': uri, 'name': None, 'artists': []}}
+            for uri in self.playlist[offset:offset + limit]
+        ]
+        more = offset + limit < len(self.playlist)
+        next_url = f'{self.url[:-len("/v1/")]}{path}?offset={offset + limit}&limit={limit}' if more else None
+        return {'items': items, 'next': next_url, 'total': len(self.playlist)}
+
+    async def playlist_add(self, uris):
+        await self._sleep(self.add_latency)
+        self.counts['playlist_add'] += 1
+        self.playlist.extend(uris)
+        self.version += 1
+        return {'snapshot_id': f'snapshot-{self.version}'}
+
+    async def playlist_reorder(self, range_start, range_length, insert_before):
+        await self._sleep(self.add_latency)
+        self.counts['playlist_reorder'] += 1
+        moved = self.playlist[range_start:range_start + range_length]
+        rest = self.playlist[:range_start] + self.playlist[range_start + range_length:]
+        position = insert_before if insert_before <= range_start else insert_before - range_length
+        self.playlist = rest[:position] + moved + rest[position:]
+        self.version += 1
+        return {'snapshot_id': f'snapshot-{self.version}'}
+
+    async def playlist_replace(self, uris):
+        await self._sleep(self.add_latency)
+        self.counts['playlist_replace'] += 1
+        self.playlist = list(uris)
+        self.version += 1
+        return {'snapshot_id': f'snapshot-{self.version}'}
+
+    async def token(self, form):
+        """Nowy token dla grant_type=refresh_token (refresh token się nie zmienia)"""
+        await self._sleep(self.token_latency)
+        self.counts['token'] += 1
+        return {
+            'access_token': f"token-{self.counts['token']}",
+            'token_type': 'Bearer',
+            'expires_in': self.token_ttl,
+            'scope': 'playlist-modify-public playlist-modify-private'
+        }
+
+if __name__ == '__main__':
+    server = FakeSpotify(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8900)
+    print(f"Fałszywe Spotify API: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,377 @@
+"""
+Test obciążeniowy całej aplikacji.
+
+Uruchamia aplikację z create_app() (werkzeug lub uvicorn w osobnym procesie) na tymczasowej
+bazie SQLite, z fałszywym Spotify (benchmarks/fake_spotify.py) i zaślepką
+wysyłki emaili, która zapamiętuje kody weryfikacyjne. Wirtualni użytkownicy
+wykonują losową mieszankę requestów:
+- stats        - GET /api/stats (odświeżanie strony głównej),
+- submit       - POST /api/request-code, a potem /api/submit z otrzymanym kodem,
+- admin        - GET /api/admin/submissions (pierwsza strona z licznikami),
+- request_code - samo POST /api/request-code.
+
+Wynik (p50/p95/p99, przepustowość, kody odpowiedzi) jest wypisywany i zapisywany
+do benchmarks/results/<etykieta>-<czas>.json, a --compare porównuje z wcześniejszym
+przebiegiem.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python benchmarks/load_test.py --duration 30 --concurrency 16
+    python benchmarks/load_test.py --mix stats=50,submit=40,admin=10 --env ASYNC_SUBMISSIONS=true
+    python benchmarks/load_test.py --server asgi --concurrency 200
+    python benchmarks/load_test.py --compare benchmarks/results/baseline-20260101-120000.json
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fake_spotify import FakeSpotify
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+DEFAULT_MIX = 'stats=60,submit=25,admin=10,request_code=5'
+
+# Katalog piosenek - popularność według rozkładu Zipfa (powtórzenia trafiają w cache i duplikaty)
+CATALOG = [(f'Wykonawca {i % 120}', f'Piosenka numer {i}') for i in range(600)]
+CATALOG_WEIGHTS = [1 / (i + 1) for i in range(len(CATALOG))]
+
+def capture_code(codes, email, code):
+    """Zaślepka wysyłki emaili - kod trafia do współdzielonego słownika zamiast do skrzynki"""
+    codes[email] = code
+    return True
+
+class Recorder:
+    """Czasy odpowiedzi i kody statusu dla każdego rodzaju requestu"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, elapsed, status):
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(elapsed)
+            counts = self.statuses.setdefault(operation, {})
+            counts[status] = counts.get(status, 0) + 1
+
+def percentile(sorted_values, fraction):
+    """Percentyl metodą najbliższej pozycji"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('stats', 'submit', 'admin', 'request_code'):
+            raise SystemExit(f'Nieznany rodzaj requestu: {name}')
+        mix[name.strip()] = float(weight)
+    return mix
+
+def serve_app(port, server_kind, codes):
+    """Proces serwera: tworzy aplikację z create_app() i obsługuje requesty do zakończenia"""
+    from app import create_app
+    import app.routes
+
+    send = functools.partial(capture_code, codes)
+    app.routes.send_verification_email = send
+    flask_app = create_app()
+
+    if server_kind == 'asgi':
+        import uvicorn
+        import app.asgi
+
+        app.asgi.send_verification_email = send
+        uvicorn.run(app.asgi.create_asgi_app(flask_app), host='127.0.0.1', port=port, log_level='warning')
+    else:
+        from werkzeug.serving import make_server
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        make_server('127.0.0.1', port, flask_app, threaded=True).serve_forever()
+
+def serve_fake_spotify(port, search_latency, add_latency):
+    """Proces fałszywego Spotify"""
+    FakeSpotify(port=port, search_latency=search_latency, add_latency=add_latency).serve_forever()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_process(target, *args):
+    """
+    Uruchamia serwer w osobnym procesie (generator ruchu nie konkuruje z nim
+    o GIL) i czeka, aż zacznie przyjmować połączenia.
+
+    Returns:
+        Tuple (proces, port)
+    """
+    port = free_port()
+    process = multiprocessing.Process(target=target, args=(port, *args), daemon=True)
+    process.start()
+
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            if time.monotonic() > deadline or not process.is_alive():
+                raise SystemExit(f'Serwer {target.__name__} nie wystartował')
+            time.sleep(0.1)
+
+def start_app(spotify_url, tmp, extra_env, server_kind='wsgi'):
+    """
+    Konfiguruje środowisko i uruchamia aplikację w osobnym procesie.
+
+    Returns:
+        Tuple (adres aplikacji, proces serwera, przechwycone kody)
+    """
+    cache_path = os.path.join(tmp, 'spotify_cache')
+    with open(cache_path, 'w') as f:
+        json.dump({
+            'access_token': 'bench',
+            'token_type': 'Bearer',
+            'expires_in': 3600,
+            'expires_at': int(time.time()) + 365 * 86400,
+            'refresh_token': 'bench',
+            'scope': 'playlist-modify-public playlist-modify-private'
+        }, f)
+
+    os.environ.update({
+        'SPOTIPY_CLIENT_ID': 'bench',
+        'SPOTIPY_CLIENT_SECRET': 'bench',
+        'SPOTIPY_REDIRECT_URI': 'http://localhost/callback',
+        'SPOTIFY_PLAYLIST_ID': 'bench',
+        'SPOTIFY_API_PREFIX': spotify_url,
+        'SPOTIFY_CACHE_PATH': cache_path,
+        'DATABASE_PATH': os.path.join(tmp, 'bench.db'),
+        'SCHOOL_EMAIL_DOMAIN': 'zspbytow.pl',
+        'EMAIL_BACKEND': 'null',
+        'THROTTLE_REQUEST_CODE_IP': '1000000/1',
+        'THROTTLE_SUBMIT_IP': '1000000/1'
+    })
+    os.environ.update(extra_env)
+
+    codes = multiprocessing.Manager().dict()
+    process, port = start_process(serve_app, server_kind, codes)
+
+    return f'http://127.0.0.1:{port}', process, codes
+
+class VirtualUser(threading.Thread):
+    """Wątek wykonujący losowe requesty do końca czasu testu"""
+
+    def __init__(self, base_url, mix, codes, recorder, emails, deadline):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.codes = codes
+        self.recorder = recorder
+        self.emails = emails
+        self.deadline = deadline
+        self.session = requests.Session()
+
+    def run(self):
+        while time.monotonic() < self.deadline:
+            operation = random.choices(self.operations, self.weights)[0]
+            getattr(self, operation)()
+
+    def _call(self, operation, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+            status = response.status_code
+        except requests.RequestException:
+            response, status = None, 'error'
+        self.recorder.record(operation, time.perf_counter() - started, status)
+        return response
+
+    def stats(self):
+        self._call('stats', 'GET', '/api/stats')
+
+    def admin(self):
+        self._call('admin', 'GET', '/api/admin/submissions', params={'limit': 50})
+
+    def request_code(self):
+        email = f'uczen{next(self.emails)}@zspbytow.pl'
+        self._call('request_code', 'POST', '/api/request-code', json={'email': email})
+        return email
+
+    def submit(self):
+        email = self.request_code()
+        code = self.codes.pop(email, None)
+        if code is None:
+            return
+
+        artist, title = random.choices(CATALOG, CATALOG_WEIGHTS)[0]
+        self._call('submit', 'POST', '/api/submit', json={
+            'email': email,
+            'code': code,
+            'artist': artist,
+            'title': title
+        })
+
+def summarize(recorder, elapsed):
+    operations = {}
+    total = 0
+
+    for operation, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        total += len(values)
+        errors = sum(
+            count for status, count in recorder.statuses[operation].items()
+            if status == 'error' or status >= 500
+        )
+        operations[operation] = {
+            'count': len(values),
+            'errors': errors,
+            'throughput': len(values) / elapsed,
+            'mean_ms': sum(values) / len(values) * 1000,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': values[-1] * 1000,
+            'statuses': {str(status): count for status, count in sorted(recorder.statuses[operation].items(), key=str)}
+        }
+
+    return {'requests': total, 'throughput': total / elapsed, 'operations': operations}
+
+def print_summary(summary, baseline=None):
+    print(f"\n{'request':<14}{'liczba':>8}{'błędy':>7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}   statusy")
+    for operation, data in summary['operations'].items():
+        print(
+            f"{operation:<14}{data['count']:>8}{data['errors']:>7}{data['throughput']:>9.1f}"
+            f"{data['p50_ms']:>9.1f}{data['p95_ms']:>9.1f}{data['p99_ms']:>9.1f}   {data['statuses']}"
+        )
+    print(f"{'razem':<14}{summary['requests']:>8}{'':>7}{summary['throughput']:>9.1f}")
+
+    if not baseline:
+        return
+
+    print(f"\nPorównanie z: {baseline['label']} ({baseline['timestamp']}, {baseline.get('commit') or '?'})")
+    print(f"{'request':<14}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for operation, data in summary['operations'].items():
+        old = baseline['summary']['operations'].get(operation)
+        if not old:
+            continue
+
+        def delta(key):
+            return f"{(data[key] - old[key]) / old[key] * 100:+.1f}%" if old[key] else 'n/d'
+
+        print(f"{operation:<14}{delta('throughput'):>10}{delta('p50_ms'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}")
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Test obciążeniowy aplikacji z fałszywym Spotify')
+    parser.add_argument('--duration', type=float, default=20, help='czas testu (sekundy)')
+    parser.add_argument('--concurrency', type=int, default=8, help='liczba wirtualnych użytkowników')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'wagi requestów (domyślnie {DEFAULT_MIX})')
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi',
+                        help='serwer aplikacji: werkzeug (Flask) lub uvicorn (app/asgi.py)')
+    parser.add_argument('--search-latency', type=float, default=0.08, help='opóźnienie wyszukiwania Spotify (s)')
+    parser.add_argument('--add-latency', type=float, default=0.15, help='opóźnienie dodania do playlisty (s)')
+    parser.add_argument('--env', action='append', default=[], metavar='KLUCZ=WARTOŚĆ',
+                        help='dodatkowa zmienna konfiguracji aplikacji (można powtarzać)')
+    parser.add_argument('--label', default='run', help='etykieta przebiegu w nazwie pliku wyników')
+    parser.add_argument('--compare', help='plik JSON wcześniejszego przebiegu do porównania')
+    parser.add_argument('--no-save', action='store_true', help='nie zapisuj wyników')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    extra_env = dict(item.split('=', 1) for item in args.env)
+
+    fake, fake_port = start_process(serve_fake_spotify, args.search_latency, args.add_latency)
+    spotify_url = f'http://127.0.0.1:{fake_port}/v1/'
+    recorder = Recorder()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base_url, server, codes = start_app(spotify_url, tmp, extra_env, args.server)
+
+        print(f"Aplikacja: {base_url}, Spotify: {spotify_url}")
+        print(f"Czas: {args.duration:.0f} s, użytkownicy: {args.concurrency}, mieszanka: {args.mix}")
+
+        emails = itertools.count()
+        started = time.monotonic()
+        users = [
+            VirtualUser(base_url, mix, codes, recorder, emails, started + args.duration)
+            for _ in range(args.concurrency)
+        ]
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = time.monotonic() - started
+
+        # SIGTERM - uvicorn i create_app (atexit) zamykają wątki w tle
+        server.terminate()
+        server.join(30)
+
+    spotify_calls = requests.get(f'http://127.0.0.1:{fake_port}/_stats').json()
+    fake.terminate()
+
+    summary = summarize(recorder, elapsed)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_summary(summary, baseline)
+    print(f"\nWywołania Spotify: {spotify_calls}")
+
+    if args.no_save:
+        return
+
+    timestamp = time.strftime('%Y%m%d-%H%M%S')
+    result = {
+        'label': args.label,
+        'timestamp': timestamp,
+        'commit': git_commit(),
+        'config': {
+            'duration': args.duration,
+            'concurrency': args.concurrency,
+            'server': args.server,
+            'mix': mix,
+            'search_latency': args.search_latency,
+            'add_latency': args.add_latency,
+            'env': extra_env
+        },
+        'spotify_calls': spotify_calls,
+        'summary': summary
+    }
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f'{args.label}-{timestamp}.json')
+    with open(path, 'w') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"Wyniki zapisane: {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Konfiguracja gunicorna (serwer produkcyjny).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Parametry można nadpisać zmiennymi środowiskowymi WEB_*.
+
+Za reverse proxy (nginx itp.) ustaw TRUSTED_PROXY_HOPS na liczbę proxy
+przed aplikacją - inaczej limity requestów na IP liczą wszystkich klientów
+jako jeden adres proxy. Proxy musi dopisywać X-Forwarded-For
+(proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for).
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv('WEB_BIND', '0.0.0.0:5000')
+
+# Workery gthread - większość czasu requestu to czekanie na Spotify/SQLite,
+# więc kilka procesów z wieloma wątkami każdy
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_WORKERS', min(4, multiprocessing.cpu_count() + 1)))
+threads = int(os.getenv('WEB_THREADS', 8))
+
+# preload - create_app (konfiguracja, migracje) raz w procesie głównym;
+# połączenia z bazą i wątki w tle tworzy każdy worker przy pierwszym użyciu
+preload_app = os.getenv('WEB_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+# Limit zamykania wątków w tle (worker_exit) - graceful_timeout liczy się od SIGTERM,
+# razem z dokończeniem trwających requestów, więc z zapasem przed SIGKILL
+shutdown_timeout = int(os.getenv('WEB_SHUTDOWN_TIMEOUT', max(1, graceful_timeout - 10)))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+
+# Okresowy restart workerów (ogranicza skutki ewentualnych wycieków pamięci)
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 500))
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+
+def worker_exit(server, worker):
+    """Przed końcem workera przetwarza zaległe zgłoszenia, zapisy do playlisty i emaile"""
+    from app.lifecycle import shutdown_app
+
+    # Przy workerze uvicorn (asgi:app) aplikacja Flask jest w app.state
+    state = getattr(worker.wsgi, 'state', None)
+    shutdown_app(getattr(state, 'flask_app', worker.wsgi), timeout=shutdown_timeout)
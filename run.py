@@ -1,31 +1,34 @@
-from app import create_app
-import os
+"""
+Serwer deweloperski.
+
+Produkcyjnie aplikację uruchamia gunicorn (wiele procesów i wątków):
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
 
-app = create_app()
+import os
+import sys
 
 if __name__ == '__main__':
-    # Upewnij się że katalog data/ istnieje
-    os.makedirs('data', exist_ok=True)
-    
+    from app import create_app
+
+    try:
+        app = create_app()
+    except ValueError as e:
+        print(f"❌ BŁĄD KONFIGURACJI: {e}")
+        print("💡 Upewnij się, że plik .env jest poprawnie skonfigurowany")
+        sys.exit(1)
+
     print("=" * 50)
     print("🎵 System zgłaszania piosenek - ZSP Bytów")
     print("=" * 50)
     print("Aplikacja uruchomiona na: http://localhost:5000")
     print("Panel admin: http://localhost:5000/admin")
     print("=" * 50)
-    
-    # DEBUGGING - sprawdź ścieżki
-    print("\n🔍 DEBUGGING:")
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Template folder: {app.template_folder}")
-    print(f"Root path: {app.root_path}")
-    print(f"Templates exist: {os.path.exists('templates')}")
-    print(f"index.html exists: {os.path.exists('templates/index.html')}")
-    print("=" * 50 + "\n")
-    
-    # Uruchom aplikację
+
+    # Uruchom aplikację (debug tylko na życzenie - FLASK_DEBUG=1)
     app.run(
-        debug=True,
+        debug=os.getenv('FLASK_DEBUG', 'false').lower() in ('1', 'true', 'yes'),
         host='0.0.0.0',
-        port=5000
-    )
\ No newline at end of file
+        port=int(os.getenv('PORT', 5000)),
+        threaded=True
+    )
@@ -0,0 +1,138 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const filtersForm = document.getElementById('filtersForm');
+    const tbody = document.getElementById('submissionsBody');
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    const emptyMessage = document.getElementById('emptyMessage');
+    
+    const STATUS_LABELS = {
+        approved: '✅ Zaakceptowane',
+        rejected: '❌ Odrzucone',
+        pending: '⏳ W trakcie'
+    };
+    
+    // Filtry z ostatniego wysłania formularza - kolejne strony i eksport nie
+    // biorą zmian wpisanych w formularz, ale jeszcze niezatwierdzonych
+    let appliedFilters = new URLSearchParams(new FormData(filtersForm));
+    let nextCursor = null;
+    let loading = false;
+    // Numer bieżącego zestawu filtrów - odpowiedzi dla wcześniejszych są pomijane
+    let generation = 0;
+    let controller = null;
+    
+    filtersForm.addEventListener('submit', function(e) {
+        e.preventDefault();
+        appliedFilters = new URLSearchParams(new FormData(filtersForm));
+        loadPage(true);
+    });
+    
+    loadMoreBtn.addEventListener('click', function() {
+        loadPage(false);
+    });
+    
+    // Eksport całej historii z zastosowanymi filtrami (bez filtra wykonawcy)
+    document.getElementById('exportBtn').addEventListener('click', function() {
+        const params = new URLSearchParams(appliedFilters);
+        params.delete('artist');
+        params.set('format', 'csv');
+        window.location.href = '/api/admin/export?' + params.toString();
+    });
+    
+    // Doładuj kolejną stronę, gdy przycisk pojawi się na ekranie
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadPage(false);
+            }
+        }).observe(loadMoreBtn);
+    }
+    
+    loadPage(true);
+    
+    async function loadPage(firstPage) {
+        if (firstPage) {
+            // Nowe filtry - poprzednie zapytanie (pierwsza lub kolejna strona) jest już niepotrzebne
+            if (controller) {
+                controller.abort();
+            }
+            generation++;
+            tbody.innerHTML = '';
+            nextCursor = null;
+        } else if (loading || !nextCursor) {
+            return;
+        }
+        
+        const current = generation;
+        controller = new AbortController();
+        loading = true;
+        loadMoreBtn.disabled = true;
+        
+        const params = new URLSearchParams(appliedFilters);
+        if (!firstPage) {
+            params.set('cursor', nextCursor);
+        }
+        
+        try {
+            const response = await fetch('/api/admin/submissions?' + params.toString(), {
+                signal: controller.signal
+            });
+            const result = await response.json();
+            
+            if (current !== generation) {
+                return;
+            }
+            
+            if (!result.success) {
+                console.error('Błąd ładowania zgłoszeń:', result.message);
+                return;
+            }
+            
+            if (result.counts) {
+                document.getElementById('totalCount').textContent = result.counts.total;
+                document.getElementById('approvedCount').textContent = result.counts.approved;
+                document.getElementById('rejectedCount').textContent = result.counts.rejected;
+            }
+            
+            appendRows(result.items);
+            nextCursor = result.next_cursor;
+            
+            emptyMessage.style.display = tbody.children.length ? 'none' : 'block';
+            loadMoreBtn.style.display = nextCursor ? 'block' : 'none';
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Błąd ładowania zgłoszeń:', error);
+            }
+        } finally {
+            // Przerwane zapytanie nie zwalnia blokady nowszego
+            if (current === generation) {
+                loading = false;
+                loadMoreBtn.disabled = false;
+            }
+        }
+    }
+    
+    function appendRows(items) {
+        const fragment = document.createDocumentFragment();
+        
+        for (const submission of items) {
+            const row = document.createElement('tr');
+            
+            addCell(row, submission.id);
+            addCell(row, submission.submitted_at);
+            addCell(row, submission.artist);
+            addCell(row, submission.title);
+            addCell(row, STATUS_LABELS[submission.status] || submission.status).className = `status-${submission.status}`;
+            addCell(row, submission.rejection_reason || '-');
+            
+            fragment.appendChild(row);
+        }
+        
+        tbody.appendChild(fragment);
+    }
+    
+    function addCell(row, text) {
+        const cell = document.createElement('td');
+        cell.textContent = text;
+        row.appendChild(cell);
+        return cell;
+    }
+});
@@ -67,7 +67,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 body: JSON.stringify(formData)
             });
             
-            const result = await response.json();
+            let result = await response.json();
+            
+            // Tryb asynchroniczny - czekaj na wynik przetwarzania
+            if (result.success && result.pending) {
+                showMessage(result.message, 'success');
+                result = await pollSubmission(result.job_id);
+            }
             
             if (result.success) {
                 // Pokaż sukces z informacją o piosence
@@ -106,6 +112,29 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 15000);
     }
     
+    async function pollSubmission(jobId) {
+        // Odpytuj status zgłoszenia aż przestanie być 'pending'
+        for (let attempt = 0; attempt < 60; attempt++) {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            
+            const response = await fetch(`/api/submission/${jobId}`);
+            const status = await response.json();
+            
+            if (!status.success || status.status !== 'pending') {
+                return {
+                    success: status.status === 'approved',
+                    message: status.message,
+                    track: status.track
+                };
+            }
+        }
+        
+        return {
+            success: false,
+            message: 'Przetwarzanie trwa dłużej niż zwykle. Sprawdź status zgłoszenia później.'
+        };
+    }
+    
     async function loadStats() {
         try {
             const response = await fetch('/api/stats');
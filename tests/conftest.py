@@ -0,0 +1,64 @@
+"""
+Wspólne fixture'y testów.
+
+Wywołania Spotify idą do lokalnego, fałszywego serwera z benchmarks/fake_spotify.py
+(bez sieci i bez prawdziwego konta). Token OAuth jest zapisany w pliku
+tymczasowym, więc klient nie odświeża go podczas testów.
+
+Uruchomienie (z katalogu głównego repozytorium):
+    python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+from flask import Flask
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_spotify import FakeSpotify
+from app.config import Config
+
+@pytest.fixture
+def fake_spotify():
+    """Fałszywe Spotify bez opóźnień (testy ustawiają je same, jeśli potrzebują)"""
+    server = FakeSpotify(search_latency=0, add_latency=0, token_latency=0, explicit_ratio=0, not_found_ratio=0)
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def spotify_app(fake_spotify, tmp_path):
+    """Aplikacja Flask (bez bazy i blueprintu) z klientem Spotify skierowanym na fałszywy serwer"""
+    cache_path = tmp_path / 'spotify_cache'
+    cache_path.write_text(json.dumps({
+        'access_token': 'test',
+        'token_type': 'Bearer',
+        'expires_in': 3600,
+        'expires_at': int(time.time()) + 3600,
+        'refresh_token': 'test',
+        'scope': 'playlist-modify-public playlist-modify-private'
+    }))
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        SPOTIPY_CLIENT_ID='test',
+        SPOTIPY_CLIENT_SECRET='test',
+        SPOTIPY_REDIRECT_URI='http://localhost/callback',
+        SPOTIFY_PLAYLIST_ID='test',
+        SPOTIFY_API_PREFIX=fake_spotify.url,
+        SPOTIFY_TOKEN_URL=fake_spotify.token_url,
+        SPOTIFY_TOKEN_BACKEND='file',
+        SPOTIFY_CACHE_PATH=str(cache_path),
+        SPOTIFY_POOL_SIZE=4,
+        SEARCH_CACHE_PERSIST=False
+    )
+
+    with app.app_context():
+        yield app
@@ -0,0 +1,42 @@
+"""Filtr wulgaryzmów - zamaskowane słowa i czas sprawdzania długich serii masek"""
+
+import os
+import time
+
+import pytest
+
+from app.content_filter import MASK, MAX_MASK_RUN, FilterRules, normalize_for_filter
+
+RULES_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'filter_rules.txt')
+
+@pytest.fixture(scope='module')
+def rules():
+    return FilterRules.from_file(RULES_PATH)
+
+def _check(rules, text):
+    return rules.matches(normalize_for_filter(text))
+
+@pytest.mark.parametrize('text', ['f*ck', 'k*rwa', 'f#ck', 'sh!t', 'k.u.r.w.a', 'kurwaaa', 'ku' + '*' * 100 + 'rwa'])
+def test_masked_words_are_detected(rules, text):
+    assert _check(rules, text)
+
+@pytest.mark.parametrize('text', ['Hello', 'Dick Dale', '****', 's***', 'Scunthorpe'])
+def test_clean_text_passes(rules, text):
+    assert not _check(rules, text)
+
+def test_mask_runs_are_collapsed():
+    assert normalize_for_filter('f' + '#' * 50 + 'k') == 'f' + MASK * MAX_MASK_RUN + 'k'
+    assert normalize_for_filter('*' * 200) == MASK * MAX_MASK_RUN
+
+@pytest.mark.parametrize('text', [
+    '*' * 5000,
+    '#' * 5000,
+    'k' + '*' * 5000 + 'a',
+    ('*' * 30 + 'a') * 100,
+    ('d' + '#' * 20 + 'e') * 100
+])
+def test_long_mask_runs_are_fast(rules, text):
+    # Przed skracaniem serii 200 gwiazdek sprawdzało się ~3 s
+    started = time.perf_counter()
+    _check(rules, text)
+    assert time.perf_counter() - started < 0.1
@@ -0,0 +1,160 @@
+"""
+Wysyłka emaili z kolejki email_outbox przez lokalny serwer SMTP (aiosmtpd).
+
+Wymaga: pip install aiosmtpd
+"""
+
+import socket
+import time
+
+import pytest
+from flask import Flask
+
+from app.config import Config
+from app.database import configure_database, init_db, close_db, get_db, enqueue_email, purge_email_outbox
+from app.email_sender import EmailSender
+
+controller_module = pytest.importorskip('aiosmtpd.controller')
+
+class RecordingHandler:
+    """Handler aiosmtpd: zapisuje wiadomości, liczy połączenia (EHLO) i odrzuca zadaną liczbę wiadomości"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.reject = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.connections += 1
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject:
+            self.reject -= 1
+            return '451 Spróbuj później'
+        self.messages.append(envelope.content.decode('utf-8', 'replace'))
+        return '250 OK'
+
+def _free_port():
+    # Controller.start() sprawdza gotowość, łącząc się z podanym portem - port 0 nie zadziała
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    handler.port = _free_port()
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=handler.port)
+    controller.start()
+    yield handler
+    controller.stop()
+
+@pytest.fixture
+def app(smtp_server, tmp_path):
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        SMTP_SERVER='127.0.0.1',
+        SMTP_PORT=smtp_server.port,
+        SMTP_USERNAME=None,
+        SMTP_USE_TLS=False,
+        SMTP_FROM_EMAIL='radio@zspbytow.pl',
+        EMAIL_BACKEND='smtp',
+        EMAIL_MAX_ATTEMPTS=2,
+        EMAIL_POLL_INTERVAL=30
+    )
+    app.teardown_appcontext(close_db)
+    configure_database(path=str(tmp_path / 'radio.db'))
+
+    with app.app_context():
+        init_db()
+        yield app
+
+@pytest.fixture
+def sender(app):
+    sender = EmailSender(app)
+    yield sender
+    sender._disconnect()
+
+def _outbox():
+    return {row['id']: dict(row) for row in get_db().execute('SELECT * FROM email_outbox')}
+
+def _enqueue(count):
+    return [enqueue_email(f'uczen{i}@zspbytow.pl', 'Kod', f'Twój kod: {100000 + i}') for i in range(count)]
+
+def test_messages_share_one_connection(sender, smtp_server):
+    ids = _enqueue(5)
+    sender._drain()
+
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 1
+    assert sender.sent == 5
+    # Wysłany email nie przechowuje kodu
+    assert all(row['status'] == 'sent' and row['body'] == '' for row in _outbox().values())
+    assert sorted(_outbox()) == ids
+
+def test_reconnects_after_server_disconnect(sender, smtp_server):
+    _enqueue(1)
+    sender._drain()
+
+    # Serwer zamknął bezczynne połączenie - smtplib zgłosi SMTPServerDisconnected przy następnej komendzie
+    sender._smtp.close()
+    _enqueue(1)
+    sender._drain()
+
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+    assert [row['attempts'] for row in _outbox().values()] == [1, 1]
+
+def test_failed_delivery_backs_off_then_gives_up(sender, smtp_server):
+    smtp_server.reject = 2
+    (email_id,) = _enqueue(1)
+
+    sender._drain()
+    row = _outbox()[email_id]
+    assert row['status'] == 'queued' and row['attempts'] == 1
+    # Backoff ~2 s - przed terminem email nie jest pobierany ponownie
+    assert row['next_attempt_at'] > time.time() + 1
+    sender._drain()
+    assert _outbox()[email_id]['attempts'] == 1
+
+    get_db().execute('UPDATE email_outbox SET next_attempt_at = 0')
+    get_db().commit()
+    sender._drain()
+
+    # EMAIL_MAX_ATTEMPTS=2 - bez kolejnych prób, treść z kodem usunięta
+    row = _outbox()[email_id]
+    assert row['status'] == 'failed' and row['attempts'] == 2 and row['body'] == ''
+    assert row['last_error']
+    assert sender.failed == 1
+    assert smtp_server.messages == []
+
+def test_started_sender_delivers_leftover_mail(app, smtp_server):
+    # Emaile zostawione przez poprzedni proces - bez wake() i bez czekania EMAIL_POLL_INTERVAL
+    _enqueue(2)
+    sender = EmailSender(app)
+    sender.start()
+
+    deadline = time.monotonic() + 5
+    while len(smtp_server.messages) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sender.stop(5)
+
+    assert len(smtp_server.messages) == 2
+
+def test_purge_expires_unsent_and_removes_old_rows(app):
+    stale, fresh, sent = _enqueue(3)
+    db = get_db()
+    db.execute("UPDATE email_outbox SET created_at = DATETIME('now', '-700 seconds') WHERE id = ?", (stale,))
+    db.execute("UPDATE email_outbox SET status = 'sent', body = '', created_at = DATETIME('now', '-2 days') WHERE id = ?",
+               (sent,))
+    db.commit()
+
+    assert purge_email_outbox(expire_after=600, keep_for=86400) == (1, 1)
+
+    rows = _outbox()
+    assert sorted(rows) == [stale, fresh]
+    assert rows[stale]['status'] == 'failed' and rows[stale]['body'] == ''
+    assert rows[fresh]['status'] == 'queued' and rows[fresh]['body']
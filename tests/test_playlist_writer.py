@@ -0,0 +1,44 @@
+"""Ponowienia zapisu paczki do playlisty - bez duplikatów po błędzie o nieznanym wyniku"""
+
+import pytest
+
+from app.playlist_writer import PlaylistWriter
+from app.spotify_client import get_spotify_client
+
+@pytest.fixture
+def writer(spotify_app):
+    spotify = get_spotify_client()
+    spotify.calls.backoff_base = 0.01
+    return PlaylistWriter(spotify_app, spotify, window=0, max_retries=2)
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch):
+    """Backoff między próbami zapisu - zapisany zamiast czekania"""
+    sleeps = []
+    monkeypatch.setattr('app.playlist_writer.time.sleep', sleeps.append)
+    return sleeps
+
+def test_applied_add_is_not_repeated(writer, fake_spotify):
+    # Spotify dodało utwory, ale odpowiedziało 502
+    fake_spotify.inject(502, apply=True, path='/tracks')
+
+    assert writer._write_with_retry(['spotify:track:a', 'spotify:track:b']) is True
+    assert fake_spotify.playlist == ['spotify:track:a', 'spotify:track:b']
+    assert fake_spotify.counts['playlist_add'] == 1
+
+def test_failed_add_is_retried(writer, fake_spotify):
+    fake_spotify.inject(502, path='/tracks')
+
+    assert writer._write_with_retry(['spotify:track:a']) is True
+    assert fake_spotify.playlist == ['spotify:track:a']
+    # Niezmieniony snapshot_id - bez pobierania zawartości playlisty
+    assert fake_spotify.counts['playlist_items'] == 0
+
+def test_open_breaker_leaves_batch_pending(writer, fake_spotify, sleeps):
+    writer.spotify.calls.breaker.failure_threshold = 1
+    fake_spotify.inject(503, count=10)
+
+    assert writer._write_with_retry(['spotify:track:a']) is None
+    # Bez backoffu writera (2 ** próba s) - zgłoszenia wznowi kolejka
+    assert all(seconds < 1 for seconds in sleeps)
+    assert fake_spotify.playlist == []
@@ -0,0 +1,38 @@
+"""Współdzielony klient Spotify - jedna pula połączeń keep-alive na proces"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.spotify_client import get_spotify_client
+
+POOL_SIZE = 4
+
+def _search_rounds(client, rounds):
+    """Rundy po POOL_SIZE równoczesnych wyszukiwań (każde z innym tytułem - bez cache)"""
+    barrier = threading.Barrier(POOL_SIZE)
+
+    def search(query):
+        barrier.wait()
+        return client.search_track(*query)
+
+    with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+        for round_number in rounds:
+            queries = [(f'Wykonawca {index}', f'Piosenka {round_number}-{index}') for index in range(POOL_SIZE)]
+            assert all(executor.map(search, queries))
+
+def test_client_is_shared_per_app(spotify_app):
+    assert get_spotify_client() is get_spotify_client()
+
+def test_no_new_connections_after_warmup(spotify_app, fake_spotify):
+    # Opóźnienie - wywołania wątków nakładają się, więc każdy potrzebuje własnego połączenia
+    fake_spotify.search_latency = 0.05
+    client = get_spotify_client()
+
+    _search_rounds(client, range(2))
+    warm = fake_spotify.counts['connections']
+    searches = fake_spotify.counts['search']
+    assert 0 < warm <= POOL_SIZE
+
+    _search_rounds(client, range(2, 12))
+    assert fake_spotify.counts['search'] >= searches + 10 * POOL_SIZE
+    assert fake_spotify.counts['connections'] == warm
@@ -0,0 +1,189 @@
+"""Odporność wywołań Spotify: 429 Retry-After, błędy serwera, opóźnienia i circuit breaker"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+import requests
+
+from app.spotify_client import get_spotify_client
+from app.spotify_resilience import CircuitBreaker, SpotifyCallWrapper, SpotifyUnavailableError
+
+@pytest.fixture
+def spotify(spotify_app):
+    client = get_spotify_client()
+    # Krótkie opóźnienia ponowień - testy nie czekają sekundami na backoff
+    client.calls.backoff_base = 0.01
+    return client
+
+def test_breaker_states():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.state == 'closed'
+
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    # Jedno wywołanie próbne naraz
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # Nieudana próba od razu otwiera breaker ponownie
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow()
+
+def _open_wrapper():
+    """Wrapper z breakerem otwartym jednym błędem sieci i już gotowym na próbę half-open"""
+    calls = SpotifyCallWrapper(max_retries=0, failure_threshold=1, reset_timeout=0.05)
+
+    def timeout():
+        raise requests.exceptions.Timeout('timeout')
+
+    with pytest.raises(SpotifyUnavailableError):
+        calls.call(timeout)
+    time.sleep(0.06)
+    assert calls.breaker.state == 'half_open'
+    return calls
+
+def test_half_open_probe_with_unexpected_error_reopens_breaker():
+    calls = _open_wrapper()
+
+    def truncated():
+        raise requests.exceptions.ChunkedEncodingError('ucięta odpowiedź')
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        calls.call(truncated)
+    # Nieudana próba liczy się jak awaria - breaker otwarty, ale nie zablokowany
+    assert calls.breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert calls.call(lambda: 'ok') == 'ok'
+    assert calls.breaker.state == 'closed'
+
+def test_cancelled_half_open_probe_is_released():
+    calls = _open_wrapper()
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(calls.call_async(hang))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    # Anulowanie nie mówi nic o API - kolejne wywołanie jest nową próbą
+    assert calls.breaker.state == 'half_open'
+    assert calls.call(lambda: 'ok') == 'ok'
+
+def test_retry_after_delays_all_threads(spotify, fake_spotify):
+    fake_spotify.inject(429, retry_after=1)
+    results = {}
+
+    def search(name):
+        started = time.monotonic()
+        results[name] = (spotify.search_track('Wykonawca', f'Piosenka {name}'), time.monotonic() - started)
+
+    first = threading.Thread(target=search, args=('first',))
+    first.start()
+    time.sleep(0.2)
+    # Drugi wątek nie dostał 429, ale też czeka do końca okresu Retry-After
+    second = threading.Thread(target=search, args=('second',))
+    second.start()
+    first.join()
+    second.join()
+
+    assert results['first'][0] and results['first'][1] >= 0.9
+    assert results['second'][0] and results['second'][1] >= 0.6
+    assert fake_spotify.counts['injected'] == 1
+    assert fake_spotify.counts['search'] == 2
+
+def test_retry_after_beyond_deadline_fails_fast(spotify, fake_spotify):
+    fake_spotify.inject(429, retry_after=30)
+
+    started = time.monotonic()
+    with pytest.raises(SpotifyUnavailableError):
+        spotify.calls.call(spotify.sp.search, q='artist:A track:B', type='track', deadline=2)
+
+    assert time.monotonic() - started < 1
+    assert fake_spotify.counts['search'] == 0
+
+    # Limit dotyczy całego procesu - kolejne wywołanie nie idzie do API
+    with pytest.raises(SpotifyUnavailableError):
+        spotify.search_track('Wykonawca', 'Inna piosenka')
+    assert fake_spotify.counts['injected'] == 1
+
+def test_server_errors_are_retried_for_reads(spotify, fake_spotify):
+    fake_spotify.inject(503, count=2)
+
+    assert spotify.search_track('Wykonawca', 'Piosenka')
+    assert fake_spotify.counts['injected'] == 2
+    assert fake_spotify.counts['search'] == 1
+    assert spotify.calls.breaker.state == 'closed'
+
+def test_playlist_add_is_not_retried_after_server_error(spotify, fake_spotify):
+    # Spotify dodało utwór, ale odpowiedziało błędem - ponowienie dodałoby go drugi raz
+    fake_spotify.inject(502, apply=True)
+
+    with pytest.raises(SpotifyUnavailableError):
+        spotify.add_tracks_to_playlist(['spotify:track:a'])
+
+    assert fake_spotify.playlist == ['spotify:track:a']
+    assert fake_spotify.counts['injected'] == 1
+
+def test_playlist_add_is_retried_after_rate_limit(spotify, fake_spotify):
+    fake_spotify.inject(429, retry_after=0)
+
+    spotify.add_tracks_to_playlist(['spotify:track:a'])
+
+    assert fake_spotify.playlist == ['spotify:track:a']
+    assert fake_spotify.counts['playlist_add'] == 1
+
+def test_breaker_opens_after_server_errors_and_recovers(spotify_app, fake_spotify):
+    spotify_app.config.update(SPOTIFY_MAX_RETRIES=0, SPOTIFY_BREAKER_THRESHOLD=2)
+    spotify = get_spotify_client()
+    spotify.calls.breaker.reset_timeout = 0.1
+    fake_spotify.inject(503, count=3)
+
+    for title in ('A', 'B'):
+        with pytest.raises(SpotifyUnavailableError):
+            spotify.search_track('Wykonawca', title)
+    assert spotify.calls.breaker.state == 'open'
+
+    # Otwarty breaker - wywołanie kończy się od razu, bez requestu
+    with pytest.raises(SpotifyUnavailableError):
+        spotify.search_track('Wykonawca', 'C')
+    assert fake_spotify.counts['injected'] == 2
+
+    # Próba po reset_timeout dostaje trzeci błąd i otwiera breaker ponownie
+    time.sleep(0.15)
+    with pytest.raises(SpotifyUnavailableError):
+        spotify.search_track('Wykonawca', 'D')
+    assert spotify.calls.breaker.state == 'open'
+
+    time.sleep(0.15)
+    assert spotify.search_track('Wykonawca', 'E')
+    assert spotify.calls.breaker.state == 'closed'
+
+def test_slow_api_respects_deadline(spotify_app, fake_spotify):
+    spotify_app.config.update(SPOTIFY_REQUESTS_TIMEOUT=0.1, SPOTIFY_CALL_DEADLINE=0.5)
+    spotify = get_spotify_client()
+    spotify.calls.backoff_base = 0.01
+    fake_spotify.search_latency = 1
+
+    started = time.monotonic()
+    with pytest.raises(SpotifyUnavailableError):
+        spotify.search_track('Wykonawca', 'Piosenka')
+
+    assert time.monotonic() - started < 1
@@ -0,0 +1,59 @@
+"""Kolejka zgłoszeń - niedostępne Spotify odracza zgłoszenie zamiast je odrzucać"""
+
+import time
+
+import pytest
+
+from app.database import configure_database, init_db, close_db, save_submission, get_submission
+from app.spotify_client import get_spotify_client
+from app.submission_queue import SubmissionQueue
+
+@pytest.fixture
+def submission_queue(spotify_app, tmp_path):
+    configure_database(path=str(tmp_path / 'radio.db'))
+    init_db()
+    spotify_app.teardown_appcontext(close_db)
+
+    submission_queue = SubmissionQueue(spotify_app, workers=1, sweep_interval=0)
+    submission_queue.start()
+    yield submission_queue
+    submission_queue.shutdown(5)
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'przekroczony czas oczekiwania'
+        time.sleep(0.01)
+
+def _pending(artist, title):
+    return save_submission('uczen@zspbytow.pl', 'hash', artist, title, None, None, 'pending')
+
+def test_open_breaker_during_add_defers_submission(submission_queue, fake_spotify):
+    spotify = get_spotify_client()
+    breaker = spotify.calls.breaker
+    add_to_playlist = spotify.add_to_playlist
+
+    def add_with_open_breaker(track_uri):
+        # Wyszukiwanie i sprawdzenie explicit przeszły, breaker otwiera się tuż przed dodaniem
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        return add_to_playlist(track_uri)
+
+    spotify.add_to_playlist = add_with_open_breaker
+    submission_id = _pending('Wykonawca', 'Piosenka')
+    submission_queue.enqueue(submission_id)
+    _wait_for(lambda: submission_queue.deferred == 1)
+
+    submission = get_submission(submission_id)
+    assert submission['status'] == 'pending'
+    assert submission['claimed_at'] is not None
+    assert fake_spotify.playlist == []
+    assert submission_queue.failed == 0
+
+    # Spotify znów działa - ponowienie kończy zgłoszenie
+    breaker.record_success()
+    spotify.add_to_playlist = add_to_playlist
+    submission_queue._process(submission_id)
+
+    assert get_submission(submission_id)['status'] == 'approved'
+    assert len(fake_spotify.playlist) == 1
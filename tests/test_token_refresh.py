@@ -0,0 +1,142 @@
+"""
+Wspólny token Spotify (backend 'sqlite') - jedno odświeżenie na wygaśnięcie, niezależnie od liczby procesów.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from app.database import configure_database, init_db, get_shared_state, set_shared_state, acquire_state_lease
+from app.token_cache import TOKEN_KEY, EXPIRY_MARGIN, SharedTokenCache
+
+SCOPE = 'playlist-modify-public playlist-modify-private'
+PROCESSES = 4
+ROUNDS = 2
+
+# Spotipy odświeża token na minutę przed expires_at - expires_in=61 to 1-2 s ważności
+TOKEN_TTL = EXPIRY_MARGIN + 1
+
+def _token(access_token, expires_in):
+    return {
+        'access_token': access_token, 'token_type': 'Bearer', 'expires_in': expires_in,
+        'expires_at': int(time.time()) + expires_in, 'refresh_token': 'test', 'scope': SCOPE
+    }
+
+def worker(db_path, cache_path, token_url, barrier, results):
+    """Jeden proces aplikacji: w każdej rundzie wszystkie procesy naraz pobierają wygasły token"""
+    from app.spotify_client import _LockedSpotifyOAuth
+    from app.token_cache import create_token_cache
+
+    configure_database(path=db_path, instrument=False)
+    auth = _LockedSpotifyOAuth(
+        client_id='test',
+        client_secret='test',
+        redirect_uri='http://localhost/callback',
+        scope=SCOPE,
+        cache_handler=create_token_cache({
+            'SPOTIFY_TOKEN_BACKEND': 'sqlite',
+            'SPOTIFY_CACHE_PATH': cache_path,
+            'SPOTIFY_TOKEN_LEASE': 5
+        }),
+        open_browser=False
+    )
+    auth.OAUTH_TOKEN_URL = token_url
+
+    tokens = []
+    for _ in range(ROUNDS):
+        barrier.wait()
+        tokens.append(auth.get_access_token(as_dict=False))
+        # Wszystkie procesy mają token z tej rundy - czekamy, aż wygaśnie
+        barrier.wait()
+        time.sleep(TOKEN_TTL - EXPIRY_MARGIN + 1.1)
+
+    results.put(tokens)
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'radio.db')
+    configure_database(path=path)
+    init_db()
+    return path
+
+def test_one_refresh_per_expiry_across_processes(fake_spotify, db_path, tmp_path):
+    fake_spotify.token_ttl = TOKEN_TTL
+    # Token w bazie właśnie wygasł (brak pliku .spotify_cache - nic do importu)
+    set_shared_state(TOKEN_KEY, json.dumps(_token('initial', EXPIRY_MARGIN - 1)))
+
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(PROCESSES, timeout=30)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(db_path, str(tmp_path / 'spotify_cache'), fake_spotify.token_url,
+                                             barrier, results))
+        for _ in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(10)
+
+    assert fake_spotify.counts['token'] == ROUNDS
+    # W każdej rundzie wszystkie procesy dostały token odświeżony przez lidera
+    for round_tokens, expected in zip(zip(*outcomes), ('token-1', 'token-2')):
+        assert set(round_tokens) == {expected}
+
+def test_waits_for_leader_instead_of_refreshing(db_path, tmp_path):
+    set_shared_state(TOKEN_KEY, json.dumps(_token('expired', EXPIRY_MARGIN - 1)))
+    assert acquire_state_lease(TOKEN_KEY, 'leader', 5)
+
+    def leader_refresh():
+        time.sleep(0.1)
+        set_shared_state(TOKEN_KEY, json.dumps(_token('from-leader', 3600)))
+
+    leader = threading.Thread(target=leader_refresh)
+    leader.start()
+
+    cache = SharedTokenCache(str(tmp_path / 'spotify_cache'), lease_ttl=5, poll_interval=0.01)
+    token_info = cache.refresh(pytest.fail, 'test')
+    leader.join()
+
+    assert token_info['access_token'] == 'from-leader'
+    assert cache.refreshes == 0 and cache.waits == 1
+
+def test_expired_lease_is_taken_over(db_path, tmp_path):
+    set_shared_state(TOKEN_KEY, json.dumps(_token('expired', EXPIRY_MARGIN - 1)))
+    # Lider padł w trakcie odświeżania - dzierżawa wygasa sama
+    assert acquire_state_lease(TOKEN_KEY, 'crashed-worker', 0.3)
+
+    cache = SharedTokenCache(str(tmp_path / 'spotify_cache'), lease_ttl=5, poll_interval=0.01)
+
+    def refresh_access_token(refresh_token):
+        token_info = _token('taken-over', 3600)
+        cache.save_token_to_cache(token_info)
+        return token_info
+
+    started = time.monotonic()
+    token_info = cache.refresh(refresh_access_token, 'test')
+
+    assert time.monotonic() - started >= 0.25
+    assert token_info['access_token'] == 'taken-over'
+    assert cache.refreshes == 1
+    assert json.loads(get_shared_state(TOKEN_KEY)['value'])['access_token'] == 'taken-over'
+
+def test_newer_cache_file_is_imported(db_path, tmp_path):
+    cache_path = tmp_path / 'spotify_cache'
+    set_shared_state(TOKEN_KEY, json.dumps(_token('in-database', 3600)))
+    cache = SharedTokenCache(str(cache_path), lease_ttl=5)
+
+    # Plik starszy niż token w bazie - zostaje token z bazy
+    cache_path.write_text(json.dumps(_token('old-file', 3600)))
+    os.utime(cache_path, (time.time() - 100, time.time() - 100))
+    assert cache.reload()['access_token'] == 'in-database'
+
+    # Ręczna autoryzacja zapisała nowy plik - trafia do bazy i do pozostałych procesów
+    cache_path.write_text(json.dumps(_token('new-file', 3600)))
+    os.utime(cache_path, (time.time() + 5, time.time() + 5))
+    assert cache.reload()['access_token'] == 'new-file'
+    assert json.loads(get_shared_state(TOKEN_KEY)['value'])['access_token'] == 'new-file'